@@ -0,0 +1,260 @@
+"""
+Scripted stand-in for the Anthropic, Ollama and Cohere chat HTTP APIs.
+
+The server answers every request from a Script: it first asks for the
+configured tool calls (for `tool_rounds` rounds) and then replies with text.
+Latency before the first byte and the delay between streamed tokens are
+configurable, so the chatbots can be benchmarked without any live service.
+"""
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+
+@dataclass
+class Script:
+    # Seconds to wait before answering (simulated time-to-first-token)
+    latency: float = 0.05
+    # Seconds between streamed tokens
+    token_delay: float = 0.0
+    # Final text answer, streamed word by word when streaming is requested
+    text: str = "This is a scripted answer from the fake LLM."
+    # Tool calls requested in each tool round: (tool name, arguments)
+    tool_calls: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    tool_rounds: int = 1
+
+    def tokens(self) -> List[str]:
+        words = self.text.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    def wants_tools(self, tool_results_seen: int) -> bool:
+        if not self.tool_calls:
+            return False
+        return tool_results_seen // len(self.tool_calls) < self.tool_rounds
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def script(self) -> Script:
+        return self.server.script
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/api/tags":
+            self.send_json({"models": [{"name": m, "model": m} for m in self.server.models]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests += 1
+
+        time.sleep(self.script.latency)
+
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/messages"):
+            self.anthropic_messages(body)
+        elif path == "/api/chat":
+            self.ollama_chat(body)
+        elif path.endswith("/chat"):
+            self.cohere_chat(body)
+        else:
+            self.send_error(404)
+
+    # Anthropic Messages API
+
+    def anthropic_messages(self, body):
+        seen = sum(
+            1
+            for message in body.get("messages", [])
+            if isinstance(message.get("content"), list)
+            for block in message["content"]
+            if isinstance(block, dict) and block.get("type") == "tool_result"
+        )
+        if self.script.wants_tools(seen):
+            content = [
+                {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:12]}", "name": name, "input": args}
+                for name, args in self.script.tool_calls
+            ]
+            stop_reason = "tool_use"
+        else:
+            content = [{"type": "text", "text": self.script.text}]
+            stop_reason = "end_turn"
+
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:12]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": len(self.script.tokens())},
+        }
+        if body.get("stream"):
+            self.anthropic_stream(message)
+        else:
+            self.send_json(message)
+
+    def anthropic_stream(self, message):
+        self.start_stream("text/event-stream")
+        content = message.pop("content")
+        self.send_event("message_start", {
+            "type": "message_start", "message": {**message, "content": [], "stop_reason": None}
+        })
+        for index, block in enumerate(content):
+            if block["type"] == "text":
+                self.send_event("content_block_start", {
+                    "type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""}
+                })
+                for token in self.script.tokens():
+                    time.sleep(self.script.token_delay)
+                    self.send_event("content_block_delta", {
+                        "type": "content_block_delta", "index": index,
+                        "delta": {"type": "text_delta", "text": token}
+                    })
+            else:
+                self.send_event("content_block_start", {
+                    "type": "content_block_start", "index": index, "content_block": {**block, "input": {}}
+                })
+                self.send_event("content_block_delta", {
+                    "type": "content_block_delta", "index": index,
+                    "delta": {"type": "input_json_delta", "partial_json": json.dumps(block["input"])}
+                })
+            self.send_event("content_block_stop", {"type": "content_block_stop", "index": index})
+        self.send_event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+            "usage": {"output_tokens": message["usage"]["output_tokens"]}
+        })
+        self.send_event("message_stop", {"type": "message_stop"})
+        self.end_stream()
+
+    # Ollama /api/chat
+
+    def ollama_chat(self, body):
+        seen = sum(1 for message in body.get("messages", []) if message.get("role") == "tool")
+        reply = {
+            "model": body.get("model", "fake"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+        }
+        if body.get("tools") and self.script.wants_tools(seen):
+            reply["message"] = {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"function": {"name": name, "arguments": args}}
+                               for name, args in self.script.tool_calls],
+            }
+            self.send_json(reply)
+        elif body.get("stream", True):
+            self.start_stream("application/x-ndjson")
+            for token in self.script.tokens():
+                time.sleep(self.script.token_delay)
+                self.send_chunk(json.dumps({
+                    **reply, "done": False, "message": {"role": "assistant", "content": token}
+                }) + "\n")
+            self.send_chunk(json.dumps({**reply, "message": {"role": "assistant", "content": ""}}) + "\n")
+            self.end_stream()
+        else:
+            reply["message"] = {"role": "assistant", "content": self.script.text}
+            self.send_json(reply)
+
+    # Cohere v1 /chat
+
+    def cohere_chat(self, body):
+        seen = len(body.get("tool_results") or [])
+        seen += sum(len(turn.get("tool_results") or []) for turn in body.get("chat_history") or []
+                    if turn.get("role") == "TOOL")
+        history = list(body.get("chat_history") or [])
+        if body.get("message"):
+            history.append({"role": "USER", "message": body["message"]})
+        if body.get("tool_results"):
+            history.append({"role": "TOOL", "tool_results": body["tool_results"]})
+
+        reply = {
+            "response_id": uuid.uuid4().hex,
+            "generation_id": uuid.uuid4().hex,
+            "finish_reason": "COMPLETE",
+            "meta": {"billed_units": {"input_tokens": 10, "output_tokens": len(self.script.tokens())}},
+        }
+        if body.get("tools") and self.script.wants_tools(seen):
+            tool_calls = [{"name": name, "parameters": args} for name, args in self.script.tool_calls]
+            history.append({"role": "CHATBOT", "message": "", "tool_calls": tool_calls})
+            reply.update(text="", tool_calls=tool_calls, chat_history=history)
+        else:
+            history.append({"role": "CHATBOT", "message": self.script.text})
+            reply.update(text=self.script.text, chat_history=history)
+        self.send_json(reply)
+
+    # Response helpers
+
+    def send_json(self, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def send_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def send_event(self, event, payload):
+        self.send_chunk(f"event: {event}\ndata: {json.dumps(payload)}\n\n")
+
+    def end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for many concurrent clients (see run_service_benchmark.py)
+    request_queue_size = 256
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, script: Script = None,
+                 models: List[str] = None):
+        super().__init__((host, port), FakeLLMHandler)
+        self.script = script or Script()
+        self.models = models or ["fake-model"]
+        self.requests = 0
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    server = FakeLLMServer(port=8765)
+    print(f"Fake LLM listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,52 @@
+"""
+In-process MCP servers for the benchmarks.
+
+The mock server mimics the research and filesystem servers' read-only tools
+with a fixed latency and payload size, and is connected to the chatbots over
+memory streams instead of a stdio subprocess.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+
+def build_mock_server(tool_latency: float = 0.01, payload_bytes: int = 2048) -> FastMCP:
+    """Create a FastMCP server whose tools sleep for tool_latency seconds."""
+    mcp = FastMCP("mock")
+    payload = "x" * payload_bytes
+
+    @mcp.tool()
+    async def extract_info(paper_id: str) -> str:
+        """Return stored information about a paper."""
+        await asyncio.sleep(tool_latency)
+        return json.dumps({"paper_id": paper_id, "title": f"Paper {paper_id}", "summary": payload})
+
+    @mcp.tool()
+    async def read_file(file_path: str) -> str:
+        """Read contents of a text file."""
+        await asyncio.sleep(tool_latency)
+        return f"Content of '{file_path}':\n{payload}"
+
+    @mcp.tool()
+    async def list_directory(path: str = ".") -> list:
+        """List contents of a directory."""
+        await asyncio.sleep(tool_latency)
+        return [f"file_{i}.txt" for i in range(20)]
+
+    @mcp.resource("papers://folders")
+    def get_available_folders() -> str:
+        """List all available topic folders."""
+        return "# Available Topics\n\n- mock\n"
+
+    return mcp
+
+
+@asynccontextmanager
+async def connect_mock_server(tool_latency: float = 0.01, payload_bytes: int = 2048):
+    """Yield an initialized ClientSession connected to a fresh mock server."""
+    server = build_mock_server(tool_latency, payload_bytes)
+    async with create_connected_server_and_client_session(server._mcp_server) as session:
+        yield session
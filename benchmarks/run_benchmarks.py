@@ -0,0 +1,345 @@
+"""
+Offline benchmarks for the chatbots.
+
+Each scenario drives one chatbot against the scripted fake LLM server and an
+in-process mock MCP server, and reports per-turn latency split into LLM wait,
+tool wait and client overhead (everything else), plus throughput and peak
+memory. Results can be saved as a baseline and compared on later runs.
+
+Usage:
+    python run_benchmarks.py
+    python run_benchmarks.py --turns 50 --save-baseline
+    python run_benchmarks.py --scenarios mcp_chatbot document_qa --fail-on-regression
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import traceback
+import tracemalloc
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from fake_llm_server import FakeLLMServer, Script
+from mock_mcp_server import connect_mock_server
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines.json"
+
+# Metrics compared against the baseline (lower is better)
+REGRESSION_METRICS = ["overhead_ms", "peak_kib"]
+
+
+def load_module(relative_path: str, name: str):
+    """Import a chatbot script by path, with its own directory on sys.path."""
+    path = ROOT / relative_path
+    directory = str(path.parent)
+    # Project directories carry their own copies of helper modules (response_cache,
+    # tool_cache, ..., see tools/sync_helpers.py), so drop any previously imported ones
+    for sibling in path.parent.glob("*.py"):
+        sys.modules.pop(sibling.stem, None)
+
+    sys.path.insert(0, directory)
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(directory)
+
+
+class TurnTimer:
+    """
+    Records when a turn was waiting on the LLM and on tools. The tool calls of
+    one response run concurrently, so a wait is the wall-clock time covered by
+    at least one call (the union of their intervals), not the sum of them.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # bucket -> (start, end) of every call
+        self.intervals = {"llm": [], "tool": []}
+
+    def wrap(self, fn, bucket: str):
+        if asyncio.iscoroutinefunction(fn):
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.intervals[bucket].append((start, time.perf_counter()))
+        else:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.intervals[bucket].append((start, time.perf_counter()))
+        return timed
+
+    def waited(self, *buckets: str) -> float:
+        """Seconds during which a call in any of the buckets was running."""
+        total, covered_until = 0.0, float("-inf")
+        for start, end in sorted(i for bucket in buckets for i in self.intervals[bucket]):
+            if end > covered_until:
+                total += end - max(start, covered_until)
+                covered_until = end
+        return total
+
+
+# Scenarios: each sets up a chatbot and returns an async function running one turn
+
+async def setup_mcp_chatbot(stack, llm, timer, args):
+    os.environ["ANTHROPIC_BASE_URL"] = llm.url
+    module = load_module("mcp-course/L7/mcp_project/mcp_chatbot.py", "bench_mcp_chatbot")
+    bot = module.MCP_ChatBot()
+    session = await stack.enter_async_context(connect_mock_server(args.tool_latency, args.payload_bytes))
+    session.call_tool = timer.wrap(session.call_tool, "tool")
+    await bot.add_session("mock", session)
+    bot.create_message = timer.wrap(bot.create_message, "llm")
+
+    async def turn(i):
+        await bot.process_query(f"Tell me about paper {i}")
+    return turn
+
+
+async def setup_local_llm_mcp_chatbot(stack, llm, timer, args):
+    # The ollama package reads OLLAMA_HOST when its default client is created
+    os.environ["OLLAMA_HOST"] = llm.url
+    sys.modules.pop("ollama", None)
+    module = load_module("local_llm/mcp_project/local_llm_mcp_chatbot.py", "bench_local_llm_mcp_chatbot")
+    bot = module.LocalMCPChatbot(desired_model="fake-model")
+    session = await stack.enter_async_context(connect_mock_server(args.tool_latency, args.payload_bytes))
+    session.call_tool = timer.wrap(session.call_tool, "tool")
+    await bot.add_session("mock", session)
+    bot.ollama_chat = timer.wrap(bot.ollama_chat, "llm")
+
+    async def turn(i):
+        await bot.process_query(f"Read file_{i}.txt", [{"role": "system", "content": "You are helpful."}])
+    return turn
+
+
+async def setup_chatbot_via_llm_api(stack, llm, timer, args):
+    module = load_module("local_llm/mcp_project/local_api_llm/chatbot_via_llm_api.py", "bench_chatbot_via_llm_api")
+    host, port = llm.server_address[:2]
+    bot = module.LocalMCPChatbot(desired_model="fake-model", ollama_host=host, ollama_port=port)
+    session = await stack.enter_async_context(connect_mock_server(args.tool_latency, args.payload_bytes))
+    session.call_tool = timer.wrap(session.call_tool, "tool")
+    await bot.add_session("mock", session)
+    bot.ollama_chat = timer.wrap(bot.ollama_chat, "llm")
+
+    async def turn(i):
+        await bot.process_query(f"Read file_{i}.txt", [{"role": "system", "content": "You are helpful."}])
+    return turn
+
+
+async def setup_cohere_chatbot(stack, llm, timer, args):
+    import cohere
+    os.environ.setdefault("COHERE_TRIAL_KEY", "test")
+    module = load_module("mcp-course/L4/mcp_project/mcp_chatbot_cohere.py", "bench_mcp_chatbot_cohere")
+    bot = module.MCP_ChatBot()
+    bot.cohere_client = cohere.AsyncClient(api_key="test", base_url=llm.url)
+    session = await stack.enter_async_context(connect_mock_server(args.tool_latency, args.payload_bytes))
+    session.call_tool = timer.wrap(session.call_tool, "tool")
+    bot.session = session
+    response = await session.list_tools()
+    bot.available_tools = [{
+        "name": tool.name,
+        "description": tool.description,
+        "input_schema": tool.inputSchema
+    } for tool in response.tools]
+    bot.cohere_chat = timer.wrap(bot.cohere_chat, "llm")
+
+    async def turn(i):
+        bot.conversation_history = []
+        await bot.process_query(f"Tell me about paper {i}")
+    return turn
+
+
+async def setup_document_qa(stack, llm, timer, args):
+    # DocumentQABot has no tools, so it gets a fake LLM that only answers with text
+    text_llm = FakeLLMServer(script=Script(latency=llm.script.latency, token_delay=llm.script.token_delay)).start()
+    stack.callback(text_llm.stop)
+    os.environ["ANTHROPIC_BASE_URL"] = text_llm.url
+    module = load_module("anthropic_pure/document_qa_anthro.py", "bench_document_qa")
+    bot = module.DocumentQABot(api_key="test")
+    bot.add_document("Acme Corporation was founded in 2010. " * 50, "Overview")
+
+    create = bot.client.messages.create
+
+    def create_with_context(context=None, **params):
+        # The Messages SDK has no `context` parameter; send it as an extra body field
+        if context:
+            params["extra_body"] = {"context": context}
+        return create(**params)
+    bot.client.messages.create = timer.wrap(create_with_context, "llm")
+
+    async def turn(i):
+        # Keep the history bounded so turns stay comparable
+        del bot.messages[1:]
+        bot.ask(f"Question {i}: what does Acme do?")
+    return turn
+
+
+SCENARIOS = {
+    "mcp_chatbot": setup_mcp_chatbot,
+    "local_llm_mcp_chatbot": setup_local_llm_mcp_chatbot,
+    "chatbot_via_llm_api": setup_chatbot_via_llm_api,
+    "cohere_chatbot": setup_cohere_chatbot,
+    "document_qa": setup_document_qa,
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_scenario(name, llm, args):
+    timer = TurnTimer()
+    async with AsyncExitStack() as stack:
+        turn = await SCENARIOS[name](stack, llm, timer, args)
+
+        totals, llm_waits, tool_waits, overheads = [], [], [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(args.warmup):
+                await turn(i)
+
+            started = time.perf_counter()
+            for i in range(args.turns):
+                timer.reset()
+                start = time.perf_counter()
+                await turn(i)
+                total = time.perf_counter() - start
+                totals.append(total)
+                llm_waits.append(timer.waited("llm"))
+                tool_waits.append(timer.waited("tool"))
+                overheads.append(total - timer.waited("llm", "tool"))
+            elapsed = time.perf_counter() - started
+
+            # Separate pass for memory, since tracemalloc inflates timings
+            tracemalloc.start()
+            for i in range(args.memory_turns):
+                await turn(i)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "turns": args.turns,
+        "turn_ms": ms(statistics.mean(totals)),
+        "turn_p50_ms": ms(percentile(totals, 0.5)),
+        "turn_p95_ms": ms(percentile(totals, 0.95)),
+        "llm_ms": ms(statistics.mean(llm_waits)),
+        "tool_ms": ms(statistics.mean(tool_waits)),
+        "overhead_ms": ms(statistics.mean(overheads)),
+        "throughput_tps": round(args.turns / elapsed, 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Print deltas against the baseline and return the list of regressions."""
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric in REGRESSION_METRICS:
+            old, new = baseline[name].get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            if old <= 0:
+                # A relative change from a zero or negative baseline means nothing
+                print(f"  {name}.{metric}: {old} -> {new} (baseline <= 0, not compared)")
+                continue
+            change = (new - old) / old
+            flag = "REGRESSION" if change > tolerance else "ok"
+            print(f"  {name}.{metric}: {old} -> {new} ({change:+.1%}) {flag}")
+            if change > tolerance:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline chatbot benchmarks")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--memory-turns", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds before the fake LLM answers")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--tool-latency", type=float, default=0.01, help="seconds each mock tool sleeps")
+    parser.add_argument("--payload-bytes", type=int, default=2048, help="size of mock tool results")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store results in {BASELINE_FILE.name}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    script = Script(
+        latency=args.llm_latency,
+        token_delay=args.token_delay,
+        tool_calls=[("extract_info", {"paper_id": "2401.00001"}), ("read_file", {"file_path": "notes.txt"})],
+    )
+    llm = FakeLLMServer(script=script).start()
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+
+    results = {}
+    failures = []
+    try:
+        for name in args.scenarios:
+            try:
+                results[name] = await run_scenario(name, llm, args)
+            except ImportError as e:
+                print(f"Skipping {name}: {e}")
+                continue
+            except Exception as e:
+                # Report the failure and keep benchmarking the other scenarios
+                print(f"❌ {name} failed: {e!r}")
+                traceback.print_exc()
+                failures.append(name)
+                continue
+            print(f"{name}: {results[name]}")
+    finally:
+        llm.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if BASELINE_FILE.exists():
+        print("\nComparison with baseline:")
+        with open(BASELINE_FILE, "r") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+
+    if args.save_baseline:
+        baseline = {}
+        if BASELINE_FILE.exists():
+            with open(BASELINE_FILE, "r") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_FILE}")
+
+    if failures:
+        print(f"\nFailed scenarios: {', '.join(failures)}")
+    if regressions and args.fail_on_regression:
+        print(f"\nRegressions: {', '.join(regressions)}")
+    if failures or (regressions and args.fail_on_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
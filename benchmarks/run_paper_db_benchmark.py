@@ -0,0 +1,198 @@
+"""
+Benchmark for the SQLite paper store (mcp-course/L7/mcp_project/paper_db.py).
+
+Inserts --papers synthetic papers in batches, the way search results are
+saved, then re-tags a fraction of them with a second topic (the same paper
+found by another search). Measures insert throughput, lookups by paper id,
+listing one topic's papers and listing all topics.
+
+With --json the same operations are also run against the
+papers/<topic>/papers_info.json layout for comparison; it rewrites a whole
+topic file per batch and scans every file per lookup, so use a smaller
+--papers with it.
+
+Usage:
+    python run_paper_db_benchmark.py                       # 1M papers
+    python run_paper_db_benchmark.py --papers 100000 --json
+    python run_paper_db_benchmark.py --output paper_db.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from run_benchmarks import load_module, percentile
+
+
+def paper_id(i):
+    return f"{2400 + i // 100000}.{i % 100000:05d}"
+
+
+def synthetic_batches(args, seed):
+    """
+    (topic, {paper_id: info}) batches, generated on the fly so 1M papers
+    need not be held in memory: first the inserts, then the re-tags.
+    """
+    rng = random.Random(seed)
+    summaries = [
+        " ".join(f"w{rng.randrange(20000)}" for _ in range(args.summary_chars // 6))
+        for _ in range(1000)
+    ]
+
+    def info(i):
+        return {
+            "title": f"Paper {i} on w{i % 977} and w{i % 1013}",
+            "authors": [f"Author {i % 5003}", f"Author {i % 7919}"],
+            "summary": summaries[i % len(summaries)],
+            "pdf_url": f"http://arxiv.org/pdf/{i}",
+            "published": "2024-01-01",
+        }
+
+    for start in range(0, args.papers, args.batch):
+        topic = f"topic_{rng.randrange(args.topics)}"
+        yield "insert", topic, {paper_id(i): info(i) for i in range(start, min(start + args.batch, args.papers))}
+
+    retagged = rng.sample(range(args.papers), int(args.papers * args.retag))
+    for start in range(0, len(retagged), args.batch):
+        topic = f"topic_{rng.randrange(args.topics)}"
+        yield "retag", topic, {paper_id(i): info(i) for i in retagged[start:start + args.batch]}
+
+
+def timed_each(fn, items):
+    """Run fn on every item; returns the latencies in ms."""
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(name, latencies):
+    result = {
+        f"{name}_ms": round(statistics.mean(latencies), 3),
+        f"{name}_p95_ms": round(percentile(latencies, 0.95), 3),
+    }
+    print(f"   {name:<14} mean {result[f'{name}_ms']:>9.3f} ms   p95 {result[f'{name}_p95_ms']:>9.3f} ms")
+    return result
+
+
+def run_operations(label, save, get, topic_papers, topics, args, lookups):
+    print(f"\n🧪 {label}")
+    # Only the save calls are timed, not generating the papers
+    elapsed = {"insert": 0.0, "retag": 0.0}
+    retagged = 0
+    for kind, topic, papers_info in synthetic_batches(args, seed=0):
+        start = time.perf_counter()
+        save({topic: papers_info})
+        elapsed[kind] += time.perf_counter() - start
+        if kind == "retag":
+            retagged += len(papers_info)
+    insert_s, retag_s = elapsed["insert"], elapsed["retag"]
+    print(f"   insert         {args.papers / insert_s:>9.0f} papers/s ({insert_s:.1f}s)")
+    print(f"   re-tag         {retagged / max(retag_s, 1e-9):>9.0f} papers/s ({retag_s:.1f}s)")
+
+    results = {
+        "insert_papers_per_s": round(args.papers / insert_s, 1),
+        "insert_s": round(insert_s, 3),
+        "retag_s": round(retag_s, 3),
+    }
+    rng = random.Random(1)
+    paper_ids = [paper_id(i) for i in rng.sample(range(args.papers), lookups)]
+    results.update(summarize("lookup", timed_each(get, paper_ids)))
+    topic_names = [f"topic_{rng.randrange(args.topics)}" for _ in range(args.topic_reads)]
+    results.update(summarize("topic_listing", timed_each(topic_papers, topic_names)))
+    results.update(summarize("folder_listing", timed_each(lambda _: topics(), range(args.topic_reads))))
+    return results
+
+
+def json_store(paper_dir):
+    """save / get / topic_papers / topics over the papers/<topic>/papers_info.json layout."""
+    def save(results):
+        for topic, papers_info in results.items():
+            path = os.path.join(paper_dir, topic)
+            os.makedirs(path, exist_ok=True)
+            file_path = os.path.join(path, "papers_info.json")
+            try:
+                with open(file_path) as f:
+                    stored = json.load(f)
+            except FileNotFoundError:
+                stored = {}
+            stored.update(papers_info)
+            with open(file_path, "w") as f:
+                json.dump(stored, f)
+
+    def get(paper_id):
+        for topic in os.listdir(paper_dir):
+            with open(os.path.join(paper_dir, topic, "papers_info.json")) as f:
+                papers_info = json.load(f)
+            if paper_id in papers_info:
+                return papers_info[paper_id]
+        return None
+
+    def topic_papers(topic):
+        try:
+            with open(os.path.join(paper_dir, topic, "papers_info.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def topics():
+        return [
+            topic for topic in os.listdir(paper_dir)
+            if os.path.exists(os.path.join(paper_dir, topic, "papers_info.json"))
+        ]
+
+    return save, get, topic_papers, topics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite paper store")
+    parser.add_argument("--papers", type=int, default=1_000_000)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="papers saved per call, like one search")
+    parser.add_argument("--retag", type=float, default=0.2, help="fraction of papers saved under a second topic")
+    parser.add_argument("--summary-chars", type=int, default=600)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--topic-reads", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="also measure the papers_info.json layout")
+    parser.add_argument("--json-lookups", type=int, default=50, help="lookups for the JSON layout, which scan every file")
+    parser.add_argument("--dir", help="directory for the database and JSON files (default: a temporary one)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    module = load_module("mcp-course/L7/mcp_project/paper_db.py", "bench_paper_db")
+    print(f"🧪 {args.papers} papers over {args.topics} topics, saved {args.batch} at a time")
+
+    results = {"papers": args.papers, "topics": args.topics}
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        db_path = os.path.join(workdir, "papers.db")
+        store = module.PaperDatabase(db_path)
+        results["sqlite"] = run_operations(
+            "SQLite store", store.save, store.get, store.topic_papers, store.topics,
+            args, args.lookups,
+        )
+        store.connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        results["sqlite"]["size_mib"] = round(os.path.getsize(db_path) / 2**20, 1)
+        print(f"   database size  {results['sqlite']['size_mib']:>9.1f} MiB")
+        store.close()
+
+        if args.json:
+            paper_dir = os.path.join(workdir, "papers")
+            os.makedirs(paper_dir)
+            results["json"] = run_operations(
+                "papers_info.json layout", *json_store(paper_dir),
+                args, args.json_lookups,
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
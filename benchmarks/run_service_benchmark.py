@@ -0,0 +1,138 @@
+"""
+Load benchmark for the multi-session chat service (mcp-course/L7/mcp_project/chat_service.py).
+
+Opens --sessions conversations at once against the fake LLM server and the
+in-process mock MCP server, sends --turns messages in each, and reports
+per-turn latency, time spent queued, throughput and rejected messages.
+With --http the requests go through the Starlette app instead of calling
+ChatService directly.
+
+Usage:
+    python run_service_benchmark.py
+    python run_service_benchmark.py --sessions 200 --turns 5 --max-concurrent-turns 32
+    python run_service_benchmark.py --http --output service.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+
+from fake_llm_server import FakeLLMServer, Script
+from mock_mcp_server import connect_mock_server
+from run_benchmarks import load_module, percentile
+
+
+async def run(args, llm):
+    os.environ["ANTHROPIC_BASE_URL"] = llm.url
+    module = load_module("mcp-course/L7/mcp_project/chat_service.py", "bench_chat_service")
+    chatbot = module.MCP_ChatBot()
+    service = module.ChatService(
+        chatbot,
+        max_concurrent_turns=args.max_concurrent_turns,
+        max_pending=args.max_pending,
+        max_pending_per_session=args.turns,
+    )
+
+    async with connect_mock_server(args.tool_latency, args.payload_bytes) as session:
+        await chatbot.add_session("mock", session)
+        await service.start()
+
+        if args.http:
+            import httpx
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=module.build_app(service)),
+                base_url="http://service", timeout=None,
+            )
+
+            async def open_session():
+                response = await client.post("/sessions")
+                return response.json()["session_id"]
+
+            async def send(session_id, text):
+                response = await client.post(f"/sessions/{session_id}/messages", json={"message": text})
+                if response.status_code == 429:
+                    raise module.ServiceBusy(response.json()["error"])
+                response.raise_for_status()
+        else:
+            client = None
+
+            async def open_session():
+                return service.create_session().session_id
+
+            async def send(session_id, text):
+                await service.submit(session_id, text)
+
+        latencies, rejected = [], 0
+
+        async def conversation(n):
+            nonlocal rejected
+            session_id = await open_session()
+            for i in range(args.turns):
+                start = time.perf_counter()
+                try:
+                    await send(session_id, f"Session {n}: tell me about paper {i}")
+                except module.ServiceBusy:
+                    rejected += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(conversation(n) for n in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+
+        await service.stop()
+        if client is not None:
+            await client.aclose()
+
+    ms = lambda seconds: round(seconds * 1000, 3)
+    stats = service.stats()
+    return {
+        "sessions": args.sessions,
+        "turns": len(latencies),
+        "rejected": rejected,
+        "turn_ms": ms(statistics.mean(latencies)) if latencies else None,
+        "turn_p50_ms": ms(percentile(latencies, 0.5)) if latencies else None,
+        "turn_p95_ms": ms(percentile(latencies, 0.95)) if latencies else None,
+        "queue_wait_p95_ms": stats["queue_wait_ms"]["p95"],
+        "throughput_tps": round(len(latencies) / elapsed, 2),
+        "llm_requests": llm.requests,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session benchmark for chat_service")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=3, help="messages per session")
+    parser.add_argument("--max-concurrent-turns", type=int, default=16)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds before the fake LLM answers")
+    parser.add_argument("--tool-latency", type=float, default=0.01, help="seconds each mock tool sleeps")
+    parser.add_argument("--payload-bytes", type=int, default=2048, help="size of mock tool results")
+    parser.add_argument("--http", action="store_true", help="go through the HTTP API")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    script = Script(
+        latency=args.llm_latency,
+        tool_calls=[("extract_info", {"paper_id": "2401.00001"}), ("read_file", {"file_path": "notes.txt"})],
+    )
+    llm = FakeLLMServer(script=script).start()
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+    try:
+        results = await run(args, llm)
+    finally:
+        llm.stop()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Benchmark for similarity search and deduplication over stored papers
+(mcp-course/L7/mcp_project/paper_vectors.py).
+
+Generates --papers synthetic papers spread over --topics topic folders, with
+Zipf-distributed words. A fraction of them is planted as duplicates: the
+same paper saved under a second topic, or resubmitted under a new id with a
+few words changed. Reports the time to build the embedding matrix, batched
+top-k query throughput, and the time and recall of duplicate detection.
+
+Usage:
+    python run_similarity_benchmark.py                    # 100k papers
+    python run_similarity_benchmark.py --papers 20000 --dim 256
+    python run_similarity_benchmark.py --output similarity.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from run_benchmarks import load_module
+
+
+def synthetic_papers(args, rng):
+    """(topic, paper_id, info) triples and the planted duplicate pairs as row indices."""
+    ranks = np.arange(1, args.vocabulary + 1)
+    probabilities = 1 / ranks
+    probabilities /= probabilities.sum()
+    words = np.array([f"w{i}" for i in range(args.vocabulary)])
+
+    titles = rng.choice(args.vocabulary, size=(args.papers, 8), p=probabilities)
+    summaries = rng.choice(args.vocabulary, size=(args.papers, args.summary_words), p=probabilities)
+    topics = rng.integers(args.topics, size=args.papers)
+
+    papers = []
+    for i in range(args.papers):
+        papers.append((f"topic_{topics[i]}", f"{2400 + i // 100000}.{i % 100000:05d}v1", {
+            "title": " ".join(words[titles[i]]),
+            "summary": " ".join(words[summaries[i]]),
+            "authors": ["A. Author"],
+        }))
+
+    planted = []
+    originals = rng.choice(args.papers, size=int(args.papers * args.duplicates), replace=False)
+    for n, original in enumerate(originals):
+        topic, paper_id, info = papers[original]
+        if n % 2 == 0:
+            # Same paper saved under another topic
+            copy = (f"topic_{(topics[original] + 1) % args.topics}", paper_id, info)
+        else:
+            # Resubmitted under a new id with a few summary words replaced
+            summary = summaries[original].copy()
+            changed = rng.choice(len(summary), size=max(1, len(summary) // 20), replace=False)
+            summary[changed] = rng.choice(args.vocabulary, size=len(changed), p=probabilities)
+            copy = (topic, f"9{paper_id[1:]}", dict(info, summary=" ".join(words[summary])))
+        planted.append((original, len(papers)))
+        papers.append(copy)
+    return papers, planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark similarity search and dedup over stored papers")
+    parser.add_argument("--papers", type=int, default=100_000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--summary-words", type=int, default=120)
+    parser.add_argument("--duplicates", type=float, default=0.02, help="fraction of papers planted as duplicates")
+    parser.add_argument("--dim", type=int, default=512, help="embedding dimensions")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    module = load_module("mcp-course/L7/mcp_project/paper_vectors.py", "bench_paper_vectors")
+    rng = np.random.default_rng(0)
+
+    print(f"🧪 Generating {args.papers} papers over {args.topics} topics...")
+    papers, planted = synthetic_papers(args, rng)
+    vectors = module.PaperVectors(module.HashedTfidfEmbedder(args.dim))
+
+    start = time.perf_counter()
+    vectors.build(papers)
+    build_s = time.perf_counter() - start
+    print(f"✅ Built {len(vectors)} x {args.dim} matrix in {build_s:.2f}s")
+
+    sample = rng.choice(len(papers), size=args.queries, replace=False)
+    by_id = [papers[row][1] for row in sample]
+    by_text = [papers[row][2]["summary"][:200] for row in sample]
+
+    start = time.perf_counter()
+    vectors.similar(by_id, args.k)
+    by_id_s = time.perf_counter() - start
+    start = time.perf_counter()
+    vectors.similar(by_text, args.k)
+    by_text_s = time.perf_counter() - start
+    print(f"✅ {args.queries} queries by paper id in {by_id_s:.2f}s ({args.queries / by_id_s:.0f}/s)")
+    print(f"✅ {args.queries} queries by text in {by_text_s:.2f}s ({args.queries / by_text_s:.0f}/s)")
+
+    start = time.perf_counter()
+    groups = vectors.duplicate_groups(args.threshold)
+    dedupe_s = time.perf_counter() - start
+    group_of = {}
+    for n, group in enumerate(groups):
+        for paper in group:
+            group_of[(paper["topic"], paper["paper_id"])] = n
+    found = sum(
+        1 for original, copy in planted
+        if group_of.get(papers[original][:2]) is not None
+        and group_of.get(papers[original][:2]) == group_of.get(papers[copy][:2])
+    )
+    recall = found / len(planted) if planted else 1.0
+    print(f"✅ Found {len(groups)} duplicate groups in {dedupe_s:.2f}s, "
+          f"recall {recall:.1%} of {len(planted)} planted")
+
+    results = {
+        "papers": len(papers),
+        "dim": args.dim,
+        "build_s": round(build_s, 3),
+        "queries_by_id_per_s": round(args.queries / by_id_s, 1),
+        "queries_by_text_per_s": round(args.queries / by_text_s, 1),
+        "dedupe_s": round(dedupe_s, 3),
+        "duplicate_groups": len(groups),
+        "dedupe_recall": round(recall, 4),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
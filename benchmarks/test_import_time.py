@@ -0,0 +1,184 @@
+"""
+Import-time budget check for the chatbot and server entry points.
+
+Each entry point is imported in a fresh interpreter with `python -X importtime`
+and its cumulative import time, less the time spent importing the MCP SDK
+package in the same run, is compared with a budget. `import mcp` alone
+takes about half a second and already loads every transport and uvicorn,
+so the budgets only cover what the entry point adds on top of it. Modules
+that are deliberately imported on first use (LLM SDKs, the LangChain agent
+stack, arxiv, NumPy) must not show up at import time at all.
+
+An entry point whose third-party dependencies are not installed is skipped
+(and reported as skipped); any other import error is a failure.
+
+Usage:
+    python test_import_time.py
+    python test_import_time.py --scale 2      # slower machine: double every budget
+    pytest test_import_time.py
+"""
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+# Package whose import time is not counted against the budgets
+SDK_PACKAGE = "mcp"
+MISSING_MODULE = re.compile(r"ModuleNotFoundError: No module named '([\w.]+)'")
+
+
+class MissingDependency(Exception):
+    """An entry point cannot be imported because a third-party package is not installed."""
+
+
+@dataclass
+class EntryPoint:
+    path: str
+    # Import time allowed on top of the MCP SDK
+    budget_ms: float
+    # Modules that must not be imported along with the entry point
+    deferred: List[str] = field(default_factory=list)
+
+
+ENTRY_POINTS = [
+    EntryPoint("mcp-course/L7/mcp_project/mcp_chatbot.py", 150, ["anthropic", "nest_asyncio"]),
+    EntryPoint("mcp-course/L7/mcp_project/chat_service.py", 200, ["anthropic"]),
+    EntryPoint("mcp-course/L7/mcp_project/research_server.py", 200, ["arxiv", "numpy", "pypdf"]),
+    EntryPoint("mcp-course/L4/mcp_project/mcp_chatbot_cohere.py", 150, ["cohere", "nest_asyncio"]),
+    EntryPoint("mcp-course/L4/mcp_project/mcp_chatbot_langchain.py", 400, ["langchain_cohere", "langchain.agents", "cohere"]),
+    EntryPoint("local_llm/mcp_project/local_llm_mcp_chatbot.py", 150, ["ollama"]),
+    EntryPoint("local_llm/mcp_project/local_api_llm/chatbot_via_llm_api.py", 250),
+    EntryPoint("local_llm/mcp_project/filesystem_server.py", 150),
+]
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Map module name -> (self us, cumulative us) from -X importtime output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def added_ms(times: Dict[str, Tuple[int, int]], stem: str) -> float:
+    """Import time of an entry point beyond the MCP SDK package it imports."""
+    return (times[stem][1] - times.get(SDK_PACKAGE, (0, 0))[1]) / 1000
+
+
+def import_problem(entry: EntryPoint, stderr: str) -> str:
+    """Why an import failed; raises MissingDependency if a third-party package is missing."""
+    error = (stderr.strip().splitlines() or ["unknown error"])[-1]
+    missing = MISSING_MODULE.search(error)
+    if missing:
+        module = missing.group(1).split(".")[0]
+        directory = (ROOT / entry.path).parent
+        if not (directory / f"{module}.py").exists() and not (directory / module).is_dir():
+            raise MissingDependency(f"{entry.path}: {module} is not installed")
+    return f"{entry.path}: cannot import ({error})"
+
+
+def measure(entry: EntryPoint, runs: int = 3) -> Tuple[Optional[Dict[str, Tuple[int, int]]], Optional[str]]:
+    """
+    Fastest of several imports of the entry point, as (times, None), or
+    (None, error) if it fails to import. Raises MissingDependency when the
+    failure is only a third-party package that is not installed.
+    """
+    path = ROOT / entry.path
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {path.stem}"],
+            cwd=path.parent, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            return None, import_problem(entry, result.stderr)
+        times = parse_importtime(result.stderr)
+        if best is None or added_ms(times, path.stem) < added_ms(best, path.stem):
+            best = times
+    return best, None
+
+
+def check(entry: EntryPoint, scale: float = 1.0, runs: int = 3) -> List[str]:
+    """
+    Print the import time of one entry point and return any budget violations
+    or import errors. Raises MissingDependency if it cannot be measured here.
+    """
+    times, error = measure(entry, runs)
+    if error is not None:
+        print(f"❌ {error}")
+        return [error]
+    stem = Path(entry.path).stem
+    own_ms = added_ms(times, stem)
+    sdk_ms = times.get(SDK_PACKAGE, (0, 0))[1] / 1000
+    budget_ms = entry.budget_ms * scale
+    problems = []
+
+    if own_ms > budget_ms:
+        problems.append(f"{entry.path}: {own_ms:.0f} ms on top of {SDK_PACKAGE} exceeds the {budget_ms:.0f} ms budget")
+    for module in entry.deferred:
+        if module in times:
+            problems.append(f"{entry.path}: imports {module} eagerly ({times[module][1] / 1000:.0f} ms)")
+
+    status = "❌" if problems else "✅"
+    print(f"{status} {entry.path}: {own_ms:.0f} ms + {sdk_ms:.0f} ms {SDK_PACKAGE} (budget {budget_ms:.0f} ms)")
+    heaviest = sorted(
+        ((cumulative, name) for name, (_, cumulative) in times.items() if "." not in name and name != stem),
+        reverse=True,
+    )[:5]
+    for cumulative, name in heaviest:
+        print(f"     {name:<24} {cumulative / 1000:>8.1f} ms")
+    return problems
+
+
+def pytest_generate_tests(metafunc):
+    if "entry" in metafunc.fixturenames:
+        metafunc.parametrize("entry", ENTRY_POINTS, ids=[entry.path for entry in ENTRY_POINTS])
+
+
+def test_import_budget(entry):
+    import pytest
+
+    try:
+        problems = check(entry)
+    except MissingDependency as e:
+        pytest.skip(str(e))
+    assert not problems, "\n".join(problems)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time of the entry points")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget by this factor")
+    parser.add_argument("--runs", type=int, default=3, help="imports per entry point (fastest counts)")
+    args = parser.parse_args()
+
+    print("🧪 Measuring import time with -X importtime...\n")
+    problems, skipped = [], []
+    for entry in ENTRY_POINTS:
+        try:
+            problems += check(entry, args.scale, args.runs)
+        except MissingDependency as e:
+            print(f"⏭️  {e}")
+            skipped.append(str(e))
+
+    if skipped:
+        print(f"\n⏭️  {len(skipped)} of {len(ENTRY_POINTS)} entry points skipped (missing dependencies)")
+    if problems:
+        print("\n❌ Import budget exceeded:")
+        for problem in problems:
+            print(f"  • {problem}")
+        sys.exit(1)
+    if len(skipped) == len(ENTRY_POINTS):
+        print("\n❌ No entry point could be imported, nothing was checked")
+        sys.exit(1)
+    print(f"\n🎉 All {len(ENTRY_POINTS) - len(skipped)} checked entry points within budget!")
+
+
+if __name__ == "__main__":
+    main()
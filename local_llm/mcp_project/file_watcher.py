@@ -0,0 +1,338 @@
+# Shared helper: canonical copy in mcp-course/L7/mcp_project/file_watcher.py, kept in sync by tools/sync_helpers.py
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def walk_paths(directory: str) -> List[str]:
+    """Every file and directory below directory."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in dirs + files)
+    return paths
+
+
+class InotifyBackend:
+    """Linux inotify through libc, one watch per directory."""
+
+    name = "inotify"
+    # Longest wait for events, so the watcher notices stop()
+    wait_seconds = 0.5
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+        self.lock = threading.Lock()
+        # watch descriptor -> directory
+        self.dirs: Dict[int, str] = {}
+        # Directories whose new subdirectories are watched too
+        self.recursive: Set[str] = set()
+
+    def add(self, directory: str, recursive: bool) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}", directory)
+        with self.lock:
+            self.dirs[wd] = directory
+            if recursive:
+                self.recursive.add(directory)
+        if recursive:
+            for entry in os.scandir(directory):
+                if entry.is_dir(follow_symlinks=False):
+                    self.add(entry.path, True)
+
+    def poll(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            with self.lock:
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped: anything watched may have changed
+                    changed.update(self.dirs.values())
+                    continue
+                directory = self.dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    # The directory was removed or unmounted
+                    del self.dirs[wd]
+                    self.recursive.discard(directory)
+                    continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and directory in self.recursive:
+                try:
+                    self.add(path, True)
+                except OSError:
+                    continue
+                # Files created before the watch was in place
+                changed.update(walk_paths(path))
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Portable fallback: rescans watched directories every interval and compares stat results."""
+
+    name = "polling"
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.wait_seconds = interval
+        self.lock = threading.Lock()
+        # directory -> recursive
+        self.roots: Dict[str, bool] = {}
+        # directory -> {path: (mtime_ns, size, inode)}; directories are stored as (0, 0, inode)
+        self.snapshots: Dict[str, Dict[str, Tuple[int, int, int]]] = {}
+        self.next_scan = time.monotonic() + interval
+
+    def _scan(self, directory: str, recursive: bool) -> Dict[str, Tuple[int, int, int]]:
+        state = {}
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            # A directory's mtime changes with its entries, which are reported themselves
+                            state[entry.path] = (0, 0, stat.st_ino)
+                            if recursive:
+                                stack.append(entry.path)
+                        else:
+                            state[entry.path] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            except OSError:
+                continue
+        return state
+
+    def add(self, directory: str, recursive: bool) -> None:
+        snapshot = self._scan(directory, recursive)
+        with self.lock:
+            self.roots[directory] = recursive or self.roots.get(directory, False)
+            self.snapshots[directory] = snapshot
+
+    def poll(self, timeout: float) -> Set[str]:
+        time.sleep(max(0.0, min(timeout, self.next_scan - time.monotonic())))
+        if time.monotonic() < self.next_scan:
+            return set()
+        self.next_scan = time.monotonic() + self.interval
+
+        changed: Set[str] = set()
+        with self.lock:
+            roots = list(self.roots.items())
+        for directory, recursive in roots:
+            snapshot = self._scan(directory, recursive)
+            with self.lock:
+                previous = self.snapshots.get(directory, {})
+                self.snapshots[directory] = snapshot
+            changed.update(path for path in snapshot.keys() | previous.keys() if snapshot.get(path) != previous.get(path))
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class FileWatcher:
+    """
+    Reports changes to files in watched directories, whoever made them, so
+    caches of file contents can be dropped when a file changes outside the
+    server.
+
+    Uses inotify on Linux and falls back to polling elsewhere (or with
+    backend="polling"). Changes are collected for debounce seconds and
+    passed to every subscriber as one set of absolute paths, on the
+    watcher's thread. A directory in the set means anything below it may
+    have changed, e.g. after inotify dropped events.
+    """
+
+    def __init__(self, backend: str = "auto", debounce: float = 0.05, poll_interval: float = 1.0):
+        self.debounce = debounce
+        self.backend = None
+        if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                self.backend = InotifyBackend()
+            except (OSError, AttributeError) as e:
+                if backend == "inotify":
+                    raise
+                print(f"inotify unavailable ({e}), polling for file changes", file=sys.stderr)
+        if self.backend is None:
+            if backend == "inotify":
+                raise OSError("inotify is only available on Linux")
+            self.backend = PollingBackend(poll_interval)
+        self.callbacks: List[Callable[[Set[str]], None]] = []
+        self.watched: Dict[str, bool] = {}
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def watch(self, directory: str, recursive: bool = False) -> None:
+        """Start watching a directory (and, if recursive, everything below it)."""
+        directory = os.path.abspath(directory)
+        if self.watched.get(directory) in (True, recursive):
+            return
+        self.backend.add(directory, recursive)
+        self.watched[directory] = recursive
+
+    def subscribe(self, callback: Callable[[Set[str]], None]) -> None:
+        self.callbacks.append(callback)
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name=f"watcher-{self.backend.name}", daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.backend.close()
+
+    def _run(self) -> None:
+        pending: Set[str] = set()
+        deadline = None
+        while not self.stopped.is_set():
+            timeout = self.backend.wait_seconds if deadline is None else max(0.0, deadline - time.monotonic())
+            changed = self.backend.poll(timeout)
+            if changed:
+                pending |= changed
+                if deadline is None:
+                    deadline = time.monotonic() + self.debounce
+            if pending and time.monotonic() >= deadline:
+                self._dispatch(pending)
+                pending, deadline = set(), None
+
+    def _dispatch(self, paths: Set[str]) -> None:
+        for callback in self.callbacks:
+            try:
+                callback(paths)
+            except Exception as e:
+                print(f"File watcher callback {getattr(callback, '__name__', callback)} failed: {e}", file=sys.stderr)
+
+
+def watcher_from_env() -> Optional[FileWatcher]:
+    """FileWatcher configured by FILE_WATCHER (auto, inotify, polling or off) and FILE_POLL_SECONDS."""
+    backend = os.getenv("FILE_WATCHER", "auto")
+    if backend == "off":
+        return None
+    return FileWatcher(backend, poll_interval=float(os.getenv("FILE_POLL_SECONDS", "1.0")))
+
+
+class ResourceSubscriptions:
+    """
+    Handles resources/subscribe and resources/unsubscribe for a server and
+    sends notifications/resources/updated to the subscribed sessions.
+    notify() may be called from any thread, such as a FileWatcher's.
+    Subscriptions belong to a session, so they need a stateful transport
+    (stdio, or streamable HTTP without stateless_http), and something that
+    calls notify() on every change; while enabled() is false, subscribe is
+    rejected with METHOD_NOT_FOUND so clients read the resource every time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # URI -> sessions subscribed to it
+        self.sessions: Dict[str, Set[Any]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def install(self, server, enabled: Callable[[], bool] = lambda: True,
+                on_subscribe: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Register the handlers on a low-level MCP server (FastMCP's _mcp_server).
+        on_subscribe(uri) runs before a subscription is accepted, e.g. to
+        watch the file behind the URI; an exception from it rejects the
+        subscription.
+        """
+        from mcp.shared.exceptions import McpError
+        from mcp.types import METHOD_NOT_FOUND, ErrorData
+
+        @server.subscribe_resource()
+        async def subscribe_resource(uri) -> None:
+            if not enabled():
+                raise McpError(ErrorData(code=METHOD_NOT_FOUND, message="Resource subscriptions are not available"))
+            if on_subscribe is not None:
+                on_subscribe(str(uri))
+            self.loop = asyncio.get_running_loop()
+            with self.lock:
+                self.sessions.setdefault(str(uri), set()).add(server.request_context.session)
+
+        @server.unsubscribe_resource()
+        async def unsubscribe_resource(uri) -> None:
+            with self.lock:
+                sessions = self.sessions.get(str(uri), set())
+                sessions.discard(server.request_context.session)
+                if not sessions:
+                    self.sessions.pop(str(uri), None)
+
+    def uris(self) -> List[str]:
+        with self.lock:
+            return list(self.sessions)
+
+    def notify(self, uris: Iterable[str]) -> None:
+        with self.lock:
+            uris = [uri for uri in uris if uri in self.sessions]
+        if uris and self.loop is not None and not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._send(uris), self.loop)
+
+    async def _send(self, uris: List[str]) -> None:
+        from pydantic import AnyUrl
+
+        for uri in uris:
+            with self.lock:
+                sessions = list(self.sessions.get(uri, ()))
+            for session in sessions:
+                try:
+                    await session.send_resource_updated(AnyUrl(uri))
+                except Exception:
+                    # The client went away; forget its subscriptions
+                    with self.lock:
+                        for subscribed in self.sessions.values():
+                            subscribed.discard(session)
+                        self.sessions = {u: s for u, s in self.sessions.items() if s}
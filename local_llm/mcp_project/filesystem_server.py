@@ -1,13 +1,116 @@
 import os
 import json
-from typing import List, Optional
-from mcp.server.fastmcp import FastMCP
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+from mcp.types import ToolAnnotations
+from file_watcher import ResourceSubscriptions, watcher_from_env
+from instrumentation import InstrumentedFastMCP
+from serve import serve
+from tracing import get_tracer
 import shutil
 
-# Initialize FastMCP server for filesystem operations
-mcp = FastMCP("filesystem")
+# Spans are exported to $TRACE_FILE (JSONL) when it is set
+tracer = get_tracer("filesystem")
 
-@mcp.tool()
+# Initialize FastMCP server for filesystem operations; handler metrics are served at metrics://summary
+mcp = InstrumentedFastMCP("filesystem", tracer=tracer)
+
+def uri_path(uri: str) -> str:
+    """Absolute path of a file:/// resource URI."""
+    return os.path.abspath(unquote(uri[len("file:///"):]))
+
+def watch_subscribed(uri: str) -> None:
+    """Watch the directory of a file a client subscribes to, which may not have been read (and watched) yet."""
+    if uri.startswith("file:///"):
+        file_watcher.watch(os.path.dirname(uri_path(uri)))
+
+# Clients subscribed to file:/// resources are notified when the file changes; only offered while the
+# file watcher runs on a stateful transport, since nothing else would send the notifications
+subscriptions = ResourceSubscriptions()
+subscriptions.install(
+    mcp._mcp_server,
+    lambda: file_watcher is not None and not mcp.settings.stateless_http,
+    watch_subscribed,
+)
+# Watches the directories of cached paths for changes made outside this server; started by start_watching()
+file_watcher = None
+# ("file" | "dir", absolute path) -> file text or directory listing, only kept while file_watcher runs
+file_cache: Dict[Tuple[str, str], Any] = {}
+# Bumped on every invalidation, so a read that raced with one is not cached
+cache_generation = 0
+cache_lock = threading.Lock()
+
+def cached(kind: str, path: str, build: Callable[[], Any]) -> Any:
+    """build() for a file or directory, cached while the file watcher keeps the cache fresh."""
+    if file_watcher is None:
+        return build()
+    key = (kind, os.path.abspath(path))
+    with cache_lock:
+        value = file_cache.get(key)
+        generation = cache_generation
+    if value is not None:
+        return value
+    # Watch before reading, so a change made during the read is not missed
+    try:
+        file_watcher.watch(key[1] if kind == "dir" else os.path.dirname(key[1]))
+    except OSError:
+        return build()
+    value = build()
+    with cache_lock:
+        if generation == cache_generation:
+            file_cache[key] = value
+    return value
+
+def invalidate(paths: Set[str]) -> None:
+    """Drop cached entries for the given absolute paths, their parent listings and anything below them."""
+    global cache_generation
+    parents = {os.path.dirname(path) for path in paths}
+    prefixes = tuple(path + os.sep for path in paths)
+    with cache_lock:
+        cache_generation += 1
+        for key in list(file_cache):
+            _, path = key
+            if path in paths or (key[0] == "dir" and path in parents) or path.startswith(prefixes):
+                del file_cache[key]
+
+def on_files_changed(paths: Set[str]) -> None:
+    """File watcher callback: drop stale cache entries and notify subscribed clients."""
+    invalidate(paths)
+    prefixes = tuple(path + os.sep for path in paths)
+    updated = []
+    for uri in subscriptions.uris():
+        if uri.startswith("file:///"):
+            path = uri_path(uri)
+            if path in paths or path.startswith(prefixes):
+                updated.append(uri)
+    subscriptions.notify(updated)
+
+def start_watching() -> None:
+    """Cache file reads and drop them on change (FILE_WATCHER=off disables both)."""
+    global file_watcher
+    watcher = watcher_from_env()
+    if watcher is None:
+        return
+    watcher.subscribe(on_files_changed)
+    watcher.start()
+    file_watcher = watcher
+
+def stop_watching() -> None:
+    global file_watcher
+    if file_watcher is not None:
+        file_watcher.stop()
+        file_watcher = None
+        invalidate({os.path.abspath(os.sep)})
+
+def file_text(file_path: str) -> str:
+    """Contents of a text file, from the cache while the file watcher is running."""
+    def read() -> str:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    return cached("file", file_path, read)
+
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
 def list_directory(path: str = ".") -> List[str]:
     """
     List contents of a directory.
@@ -25,21 +128,23 @@ def list_directory(path: str = ".") -> List[str]:
         if not os.path.isdir(path):
             return [f"Error: '{path}' is not a directory"]
         
-        items = os.listdir(path)
-        # Add type indicators
-        result = []
-        for item in items:
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path):
-                result.append(f"📁 {item}/")
-            else:
-                result.append(f"📄 {item}")
-        
-        return result
+        def listing() -> List[str]:
+            items = os.listdir(path)
+            # Add type indicators
+            result = []
+            for item in items:
+                item_path = os.path.join(path, item)
+                if os.path.isdir(item_path):
+                    result.append(f"📁 {item}/")
+                else:
+                    result.append(f"📄 {item}")
+            return result
+        
+        return list(cached("dir", path, listing))
     except Exception as e:
         return [f"Error listing directory: {str(e)}"]
 
-@mcp.tool()
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
 def read_file(file_path: str) -> str:
     """
     Read contents of a text file.
@@ -57,9 +162,7 @@ def read_file(file_path: str) -> str:
         if not os.path.isfile(file_path):
             return f"Error: '{file_path}' is not a file"
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
+        content = file_text(file_path)
         return f"Content of '{file_path}':\n{content}"
     except Exception as e:
         return f"Error reading file: {str(e)}"
@@ -84,6 +187,7 @@ def write_file(file_path: str, content: str) -> str:
         
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
+        invalidate({os.path.abspath(file_path)})
         
         return f"Successfully wrote {len(content)} characters to '{file_path}'"
     except Exception as e:
@@ -105,6 +209,7 @@ def create_directory(dir_path: str) -> str:
             return f"Directory '{dir_path}' already exists"
         
         os.makedirs(dir_path)
+        invalidate({os.path.abspath(dir_path)})
         return f"Successfully created directory '{dir_path}'"
     except Exception as e:
         return f"Error creating directory: {str(e)}"
@@ -128,11 +233,12 @@ def delete_file(file_path: str) -> str:
             return f"Error: '{file_path}' is not a file"
         
         os.remove(file_path)
+        invalidate({os.path.abspath(file_path)})
         return f"Successfully deleted file '{file_path}'"
     except Exception as e:
         return f"Error deleting file: {str(e)}"
 
-@mcp.tool()
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
 def get_file_info(file_path: str) -> str:
     """
     Get information about a file or directory.
@@ -160,7 +266,7 @@ def get_file_info(file_path: str) -> str:
     except Exception as e:
         return f"Error getting file info: {str(e)}"
 
-@mcp.tool()
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
 def search_files(directory: str, pattern: str) -> List[str]:
     """
     Search for files matching a pattern in a directory.
@@ -188,6 +294,24 @@ def search_files(directory: str, pattern: str) -> List[str]:
     except Exception as e:
         return [f"Error searching files: {str(e)}"]
 
+@mcp.resource("file:///{path}")
+def read_file_resource(path: str) -> str:
+    """
+    Contents of a text file, as a resource clients can subscribe to.
+    
+    Args:
+        path: Path of the file, URL-encoded (e.g. notes%2Ftodo.txt)
+    """
+    return file_text(unquote(path))
+
+def http_app():
+    """ASGI app factory used when serving several stateless HTTP workers."""
+    mcp.settings.stateless_http = True
+    # Stateless workers cannot keep subscriptions; each caches reads for itself only
+    start_watching()
+    return mcp.streamable_http_app()
+
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport='stdio')
\ No newline at end of file
+    start_watching()
+    # Initialize and run the server (stdio by default, see serve.py for HTTP)
+    serve(mcp, "filesystem_server")
\ No newline at end of file
@@ -0,0 +1,337 @@
+# Shared helper: canonical copy in mcp-course/L7/mcp_project/instrumentation.py, kept in sync by tools/sync_helpers.py
+import bisect
+import contextvars
+import functools
+import heapq
+import inspect
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+
+from tracing import Tracer, traced
+
+LATENCY_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+SIZE_BUCKETS_BYTES = [256, 1024, 4096, 16384, 65536, 262144, 1048576]
+# Seconds between stack samples of profiled calls
+SAMPLE_INTERVAL = 0.005
+
+
+class Histogram:
+    """Fixed-bucket histogram plus a window of recent values for percentiles."""
+
+    def __init__(self, buckets: List[float], window: int = 1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.recent = deque(maxlen=window)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.recent.append(value)
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "mean": round(self.total / count, 3) if count else 0.0,
+            "p50": round(self.percentile(0.5), 3),
+            "p95": round(self.percentile(0.95), 3),
+            "max": round(self.max, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class HandlerMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.response_bytes = Histogram(SIZE_BUCKETS_BYTES)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_ms": self.latency_ms.summary(),
+            "response_bytes": self.response_bytes.summary(),
+        }
+
+
+class CallProfile:
+    """Stack samples taken while one handler call was running, on any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = 0
+        self.threads = set()
+        # (file, line, function) -> samples with it on top of the stack / anywhere on it
+        self.own: Counter = Counter()
+        self.cumulative: Counter = Counter()
+
+    def add(self, thread: int, stack: List[Tuple[str, int, str]]) -> None:
+        with self.lock:
+            self.samples += 1
+            self.threads.add(thread)
+            if stack:
+                self.own[stack[0]] += 1
+            self.cumulative.update(set(stack))
+
+    def report(self, interval: float, limit: int = 25) -> str:
+        with self.lock:
+            if not self.samples:
+                return "No samples (the work took less than the sampling interval, or ran on the event loop).\n"
+            lines = [f"{self.samples} samples on {len(self.threads)} thread(s), every {interval * 1000:g} ms",
+                     f"{'own ms':>10} {'cum ms':>10}  function"]
+            for function, count in self.cumulative.most_common(limit):
+                filename, line, name = function
+                lines.append(f"{self.own[function] * interval * 1000:>10.0f} {count * interval * 1000:>10.0f}  "
+                             f"{os.path.basename(filename)}:{line}({name})")
+        return "\n".join(lines) + "\n"
+
+
+class StackSampler:
+    """
+    Samples the stacks of threads working for profiled calls from a
+    background thread. Unlike cProfile, which only sees the thread that
+    enabled it and allows one profiler per process on recent Pythons, it
+    profiles any number of concurrent calls on any threads.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        # thread id -> (profile, frame the profiled work runs below) for each call it is working for
+        self.threads: Dict[int, List[Tuple[CallProfile, Any]]] = {}
+        self.thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def sampling(self, profile: CallProfile):
+        """Sample the current thread into profile while the block runs."""
+        ident = threading.get_ident()
+        entry = (profile, sys._getframe(2))
+        with self.lock:
+            self.threads.setdefault(ident, []).append(entry)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self.thread.start()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.threads[ident].remove(entry)
+                if not self.threads[ident]:
+                    del self.threads[ident]
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                if not self.threads:
+                    self.thread = None
+                    return
+                for ident, entries in self.threads.items():
+                    for profile, base in entries:
+                        stack = []
+                        frame = frames.get(ident)
+                        while frame is not None and frame is not base:
+                            code = frame.f_code
+                            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                            frame = frame.f_back
+                        profile.add(ident, stack)
+
+
+sampler = StackSampler()
+# Profile of the handler call being served, if it is profiled
+current_profile: contextvars.ContextVar[Optional[CallProfile]] = contextvars.ContextVar("current_profile", default=None)
+
+
+def profiled(fn, *args):
+    """
+    fn(*args) as a callable for a worker thread (run_in_executor), sampled
+    into the profile of the handler call that submits it. Executors do not
+    carry context variables over, so the profile is looked up here.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return functools.partial(fn, *args)
+
+    def run():
+        with sampler.sampling(profile):
+            return fn(*args)
+    return run
+
+
+def _payload_size(result: Any) -> int:
+    if isinstance(result, (str, bytes)):
+        return len(result.encode("utf-8") if isinstance(result, str) else result)
+    return len(json.dumps(result, default=str).encode("utf-8"))
+
+
+class InstrumentedFastMCP(FastMCP):
+    """
+    FastMCP server whose tool, resource and prompt decorators record per-handler
+    call counts, errors, latency and response-size histograms (and trace spans
+    when a tracer is given). Metrics are served as JSON at metrics://summary.
+
+    With profile_slowest > 0 (or $MCP_PROFILE_SLOWEST), each call's stacks
+    are sampled and the profiles of the N slowest calls are kept; see
+    profile_report() for what they cover.
+    """
+
+    def __init__(self, name: str, tracer: Optional[Tracer] = None,
+                 profile_slowest: Optional[int] = None, **settings: Any):
+        super().__init__(name, **settings)
+        self.tracer = tracer
+        self.metrics: Dict[str, HandlerMetrics] = {}
+        self.metrics_lock = threading.Lock()
+        if profile_slowest is None:
+            profile_slowest = int(os.getenv("MCP_PROFILE_SLOWEST", "0"))
+        self.profile_slowest = profile_slowest
+        # Min-heap of (duration_ms, seq, handler, report text) for the slowest calls
+        self.slowest_profiles: List[tuple] = []
+        self._profile_seq = itertools.count()
+
+        super().resource("metrics://summary")(self.metrics_summary)
+        super().resource("metrics://profile")(self.profile_report)
+
+    def tool(self, *args, **kwargs):
+        register = super().tool(*args, **kwargs)
+        # The name may be passed positionally, as in FastMCP's own signature
+        name = inspect.signature(super().tool).bind(*args, **kwargs).arguments.get("name")
+        return self._instrumented(register, "tool", lambda fn: name or fn.__name__)
+
+    def resource(self, uri: str, *args, **kwargs):
+        register = super().resource(uri, *args, **kwargs)
+        return self._instrumented(register, "resource", lambda fn: uri)
+
+    def prompt(self, *args, **kwargs):
+        register = super().prompt(*args, **kwargs)
+        name = inspect.signature(super().prompt).bind(*args, **kwargs).arguments.get("name")
+        return self._instrumented(register, "prompt", lambda fn: name or fn.__name__)
+
+    def _instrumented(self, register, kind, key_for):
+        def decorator(fn):
+            handler = fn
+            if self.tracer is not None:
+                handler = traced(self.tracer, self, kind)(handler)
+            register(self._measure(f"{kind}:{key_for(fn)}", handler))
+            return fn
+        return decorator
+
+    def _measure(self, key: str, fn):
+        with self.metrics_lock:
+            self.metrics.setdefault(key, HandlerMetrics())
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                # The event loop thread is shared with other calls, so only work the
+                # handler hands to worker threads through profiled() is sampled
+                profile = CallProfile() if self.profile_slowest > 0 else None
+                token = current_profile.set(profile)
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception:
+                    self._record(key, start, None, profile, failed=True)
+                    raise
+                finally:
+                    current_profile.reset(token)
+                self._record(key, start, result, profile)
+                return result
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                # A synchronous handler blocks its thread, so that thread is sampled
+                profile = CallProfile() if self.profile_slowest > 0 else None
+                token = current_profile.set(profile)
+                start = time.perf_counter()
+                try:
+                    if profile is None:
+                        result = fn(*args, **kwargs)
+                    else:
+                        with sampler.sampling(profile):
+                            result = fn(*args, **kwargs)
+                except Exception:
+                    self._record(key, start, None, profile, failed=True)
+                    raise
+                finally:
+                    current_profile.reset(token)
+                self._record(key, start, result, profile)
+                return result
+        return wrapper
+
+    def _record(self, key: str, start: float, result: Any, profile: Optional[CallProfile],
+                failed: bool = False) -> None:
+        duration = (time.perf_counter() - start) * 1000
+        if profile is not None:
+            self._keep_profile(key, duration, profile)
+
+        with self.metrics_lock:
+            metrics = self.metrics[key]
+            metrics.calls += 1
+            metrics.latency_ms.observe(duration)
+            if failed:
+                metrics.errors += 1
+            else:
+                metrics.response_bytes.observe(_payload_size(result))
+
+    def _keep_profile(self, key: str, duration: float, profile: CallProfile) -> None:
+        heap = self.slowest_profiles
+        if len(heap) >= self.profile_slowest and duration <= heap[0][0]:
+            return
+        entry = (duration, next(self._profile_seq), key, profile.report(sampler.interval))
+        with self.metrics_lock:
+            if len(heap) < self.profile_slowest:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heappushpop(heap, entry)
+
+    def metrics_summary(self) -> str:
+        """Per-handler call counts, error counts, latency and response size histograms."""
+        with self.metrics_lock:
+            summary = {key: metrics.summary() for key, metrics in self.metrics.items()}
+        return json.dumps(summary, indent=2)
+
+    def profile_report(self) -> str:
+        """
+        Sampled profiles of the slowest calls. Every call is profiled, however
+        many run at once. The numbers cover the handler's own thread for
+        synchronous handlers, and for async handlers only the blocking work
+        they pass to worker threads through profiled() (run_blocking); time
+        spent on the event loop itself is not sampled. Times are sample
+        counts times the sampling interval, so calls much shorter than it may
+        show no samples.
+        """
+        if self.profile_slowest <= 0:
+            return "Profiling is off. Set MCP_PROFILE_SLOWEST=<n> to keep profiles of the n slowest calls."
+        with self.metrics_lock:
+            entries = sorted(self.slowest_profiles, reverse=True)
+        if not entries:
+            return "No calls profiled yet."
+        return "\n".join(
+            f"# {key} took {duration:.1f} ms\n{stats}" for duration, _, key, stats in entries
+        )
+
+    def dump_profiles(self, path: str) -> None:
+        """Write the slowest-call profiles to a file."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.profile_report())
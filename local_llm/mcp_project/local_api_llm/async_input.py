@@ -0,0 +1,36 @@
+# Shared helper: canonical copy in mcp-course/L7/mcp_project/async_input.py, kept in sync by tools/sync_helpers.py
+import asyncio
+import threading
+
+
+def _resolve(future: asyncio.Future, result=None, error=None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+async def ainput(prompt: str = "") -> str:
+    """
+    input() for async chat loops: waits for the user without blocking the
+    event loop, so MCP sessions, pings and other background tasks keep
+    running between turns. The line is read in a daemon thread, so a
+    pending prompt never holds up interpreter exit.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def read():
+        try:
+            line, error = input(prompt), None
+        except Exception as e:  # EOFError when stdin is closed
+            line, error = None, e
+        try:
+            loop.call_soon_threadsafe(_resolve, future, line, error)
+        except RuntimeError:
+            pass  # the event loop has already closed
+
+    threading.Thread(target=read, name="ainput", daemon=True).start()
+    return await future
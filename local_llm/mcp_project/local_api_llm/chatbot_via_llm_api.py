@@ -3,9 +3,16 @@ import json
 import asyncio
 import time
 from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp.client.stdio import stdio_client, get_default_environment
 from contextlib import AsyncExitStack
 from typing import List, Dict, TypedDict
+from response_cache import load_response_cache
+from tool_cache import ToolResultCache
+import tracing
+from async_input import ainput
+
+# Spans are exported to $TRACE_FILE (JSONL) when it is set
+tracer = tracing.get_tracer("chatbot")
 
 class ToolDefinition(TypedDict):
     name: str
@@ -23,6 +30,10 @@ class LocalMCPChatbot:
         self.exit_stack = AsyncExitStack()
         self.available_tools: List[ToolDefinition] = []
         self.tool_to_session: Dict[str, ClientSession] = {}
+        # Optional LLM response cache (see response_cache.load_response_cache)
+        self.response_cache = load_response_cache()
+        # Cache of results from read-only tools, filled in by call_mcp_tool
+        self.tool_cache = ToolResultCache(call_tool=tracing.call_tool)
         
     def test_ollama_connection(self):
         """Test connection to Ollama API"""
@@ -53,6 +64,16 @@ class LocalMCPChatbot:
             return False
 
     def ollama_chat(self, messages, tools=None, stream=False):
+        """Make a chat request to Ollama API, going through the response cache if enabled"""
+        with tracer.span("llm.request", model=self.desired_model, stream=stream):
+            if self.response_cache is None:
+                return self._ollama_chat(messages, tools, stream)
+            params = {"model": self.desired_model, "messages": messages, "tools": tools}
+            return self.response_cache.cached_call(
+                params, lambda: self._ollama_chat(messages, tools, stream)
+            )
+
+    def _ollama_chat(self, messages, tools=None, stream=False):
         """Make a chat request to Ollama API"""
         url = f"{self.ollama_base_url}/api/chat"
         headers = {"Content-Type": "application/json"}
@@ -80,6 +101,8 @@ class LocalMCPChatbot:
                     try:
                         json_data = json.loads(line.decode("utf-8"))
                         if "message" in json_data:
+                            if not result_content:
+                                tracing.current_span().add_event("first_token")
                             content = json_data["message"].get("content", "")
                             result_content += content
                             if json_data.get("done", False):
@@ -106,33 +129,44 @@ class LocalMCPChatbot:
 
     async def connect_to_server(self, server_name: str, server_config: dict) -> None:
         """Connect to a single MCP server."""
+        if tracer.enabled:
+            # Let the server export its spans to the same trace file
+            server_config = {**server_config, "env": {
+                **get_default_environment(), **(server_config.get("env") or {}), **tracer.child_env()
+            }}
         try:
-            server_params = StdioServerParameters(**server_config)
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
-            read, write = stdio_transport
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            await session.initialize()
-            self.sessions.append(session)
-            
-            # List available tools for this session
-            response = await session.list_tools()
-            tools = response.tools
-            print(f"\nConnected to {server_name} with tools:", [t.name for t in tools])
-            
-            for tool in tools:
-                self.tool_to_session[tool.name] = session
-                self.available_tools.append({
-                    "name": tool.name,
-                    "description": tool.description,
-                    "input_schema": tool.inputSchema
-                })
+            with tracer.span("mcp.server_spawn", server=server_name):
+                server_params = StdioServerParameters(**server_config)
+                stdio_transport = await self.exit_stack.enter_async_context(
+                    stdio_client(server_params)
+                )
+                read, write = stdio_transport
+                session = await self.exit_stack.enter_async_context(
+                    ClientSession(read, write)
+                )
+                await session.initialize()
+                await self.add_session(server_name, session)
         except Exception as e:
             print(f"Failed to connect to {server_name}: {e}")
 
+    async def add_session(self, server_name: str, session: ClientSession) -> None:
+        """Register the tools of an initialized session."""
+        self.sessions.append(session)
+        
+        # List available tools for this session
+        response = await session.list_tools()
+        tools = response.tools
+        print(f"\nConnected to {server_name} with tools:", [t.name for t in tools])
+        
+        for tool in tools:
+            self.tool_to_session[tool.name] = session
+            self.tool_cache.register_tool(tool.name, server_name, tool.annotations)
+            self.available_tools.append({
+                "name": tool.name,
+                "description": tool.description,
+                "input_schema": tool.inputSchema
+            })
+
     async def connect_to_servers(self):
         """Connect to all configured MCP servers."""
         try:
@@ -140,6 +174,8 @@ class LocalMCPChatbot:
                 data = json.load(file)
             
             servers = data.get("mcpServers", {})
+            # Extra tools to treat as read-only, for servers without annotations
+            self.tool_cache.cacheable_tools.update(data.get("cacheableTools", []))
             
             for server_name, server_config in servers.items():
                 await self.connect_to_server(server_name, server_config)
@@ -168,7 +204,8 @@ class LocalMCPChatbot:
         """Call an MCP tool and return the result"""
         try:
             session = self.tool_to_session[tool_name]
-            result = await session.call_tool(tool_name, arguments=arguments)
+            with tracer.span("mcp.call_tool", tool=tool_name):
+                result = await self.tool_cache.call_tool(session, tool_name, arguments)
             
             # Extract content from MCP result
             if hasattr(result, 'content'):
@@ -183,59 +220,60 @@ class LocalMCPChatbot:
 
     async def process_query(self, query: str, messages: List[Dict]) -> List[Dict]:
         """Process a query with potential tool calls"""
+        with tracer.span("chat.turn"):
         
-        # Add user query to messages
-        messages.append({"role": "user", "content": query})
+            # Add user query to messages
+            messages.append({"role": "user", "content": query})
         
-        # Format tools for Ollama
-        tools = self.format_tools_for_ollama() if self.available_tools else None
+            # Format tools for Ollama
+            tools = self.format_tools_for_ollama() if self.available_tools else None
         
-        try:
-            # Make request to Ollama with tools
-            response = self.ollama_chat(
-                messages=messages,
-                tools=tools
-            )
+            try:
+                # Make request to Ollama with tools
+                response = self.ollama_chat(
+                    messages=messages,
+                    tools=tools
+                )
             
-            assistant_message = response['message']
-            messages.append(assistant_message)
+                assistant_message = response['message']
+                messages.append(assistant_message)
             
-            # Check if the model wants to call tools
-            if 'tool_calls' in assistant_message and assistant_message['tool_calls']:
-                print(f"\n🔧 LLM Model is calling tools...")
+                # Check if the model wants to call tools
+                if 'tool_calls' in assistant_message and assistant_message['tool_calls']:
+                    print(f"\n🔧 LLM Model is calling tools...")
                 
-                # Process each tool call
-                for tool_call in assistant_message['tool_calls']:
-                    function_name = tool_call['function']['name']
-                    function_args = tool_call['function']['arguments']
+                    # Process each tool call
+                    for tool_call in assistant_message['tool_calls']:
+                        function_name = tool_call['function']['name']
+                        function_args = tool_call['function']['arguments']
                     
-                    print(f"   Calling {function_name} with args: {function_args}")
+                        print(f"   Calling {function_name} with args: {function_args}")
                     
-                    # Call the MCP tool
-                    tool_result = await self.call_mcp_tool(function_name, function_args)
+                        # Call the MCP tool
+                        tool_result = await self.call_mcp_tool(function_name, function_args)
                     
-                    # Add tool result to messages
-                    messages.append({
-                        "role": "tool",
-                        "content": tool_result,
-                        "tool_call_id": tool_call.get('id', 'unknown')
-                    })
+                        # Add tool result to messages
+                        messages.append({
+                            "role": "tool",
+                            "content": tool_result,
+                            "tool_call_id": tool_call.get('id', 'unknown')
+                        })
                 
-                # Get final response after tool calls
-                final_response = self.ollama_chat(messages=messages)
+                    # Get final response after tool calls
+                    final_response = self.ollama_chat(messages=messages)
                 
-                final_message = final_response['message']
-                messages.append(final_message)
-                print(f"\n{self.desired_model}: {final_message['content']}")
+                    final_message = final_response['message']
+                    messages.append(final_message)
+                    print(f"\n{self.desired_model}: {final_message['content']}")
                 
-            else:
-                # No tool calls, just display the response
-                print(f"\n{self.desired_model}: {assistant_message['content']}")
+                else:
+                    # No tool calls, just display the response
+                    print(f"\n{self.desired_model}: {assistant_message['content']}")
             
-        except Exception as e:
-            print(f"Error processing query: {e}")
+            except Exception as e:
+                print(f"Error processing query: {e}")
         
-        return messages
+            return messages
 
     async def chat_loop(self):
         """Run an interactive chat loop with tool support"""
@@ -248,7 +286,7 @@ class LocalMCPChatbot:
         messages = []
         
         # Optional: Set a system prompt
-        system_prompt = input("\nEnter a system prompt (or press Enter to use default): ").strip()
+        system_prompt = (await ainput("\nEnter a system prompt (or press Enter to use default): ")).strip()
         if not system_prompt:
             system_prompt = ("You are a helpful AI assistant with access to filesystem tools. "
                            "You can read, write, list, and manage files and directories. "
@@ -259,7 +297,7 @@ class LocalMCPChatbot:
         
         while True:
             try:
-                user_input = input("\n💬 You: ").strip()
+                user_input = (await ainput("\n💬 You: ")).strip()
                 
                 if user_input.lower() in ['exit', 'quit', 'bye']:
                     print("👋 Ending conversation. Goodbye!")
@@ -270,7 +308,7 @@ class LocalMCPChatbot:
                 
                 messages = await self.process_query(user_input, messages)
                 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\n\n👋 Conversation interrupted. Goodbye!")
                 break
             except Exception as e:
@@ -278,6 +316,10 @@ class LocalMCPChatbot:
 
     async def cleanup(self):
         """Cleanly close all resources"""
+        if self.response_cache is not None:
+            print(f"Response cache: {self.response_cache.stats()}")
+            self.response_cache.close()
+        print(f"Tool cache: {self.tool_cache.stats()}")
         await self.exit_stack.aclose()
 
 async def main():
@@ -0,0 +1,177 @@
+# Shared helper: canonical copy in mcp-course/L7/mcp_project/response_cache.py, kept in sync by tools/sync_helpers.py
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Fallback serializer for SDK objects found inside messages/tools."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "__dict__"):
+        return vars(value)
+    return str(value)
+
+
+class ResponseCache:
+    """
+    LLM response cache shared by the chatbots.
+
+    Responses are kept in an in-memory LRU and, if db_path is given, also
+    persisted to SQLite so they survive restarts. Keys are a canonical hash of
+    the request parameters (model, messages, tools, sampling parameters).
+    """
+
+    def __init__(self, max_entries: int = 256, db_path: Optional[str] = None,
+                 deterministic_only: bool = False):
+        self.max_entries = max_entries
+        # Only cache requests sampled with temperature 0
+        self.deterministic_only = deterministic_only
+        self.entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value BLOB, created REAL)"
+            )
+            self.db.commit()
+
+    @staticmethod
+    def make_key(params: Dict[str, Any]) -> str:
+        """Canonical hash of the request parameters."""
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"),
+                               default=_to_jsonable)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_deterministic(params: Dict[str, Any]) -> bool:
+        """True if the request asks for temperature 0 sampling."""
+        temperature = params.get("temperature")
+        if temperature is None and isinstance(params.get("options"), dict):
+            # Ollama passes sampling parameters through "options"
+            temperature = params["options"].get("temperature")
+        return temperature == 0
+
+    def is_cacheable(self, params: Dict[str, Any]) -> bool:
+        return not self.deterministic_only or self.is_deterministic(params)
+
+    def get(self, key: str) -> Optional[Any]:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                value = pickle.loads(row[0])
+                self._remember(key, value)
+                return value
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+
+        if self.db is not None:
+            try:
+                blob = pickle.dumps(value)
+            except Exception as e:
+                print(f"Response not persisted: {e}")
+                return
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+            self.db.commit()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def lookup(self, params: Dict[str, Any]) -> Optional[Any]:
+        """Look up a response for params, recording hit/miss/bypass."""
+        if not self.is_cacheable(params):
+            self.bypasses += 1
+            return None
+        value = self.get(self.make_key(params))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, params: Dict[str, Any], value: Any) -> None:
+        if self.is_cacheable(params):
+            self.put(self.make_key(params), value)
+
+    def cached_call(self, params: Dict[str, Any], call: Callable[[], Any]) -> Any:
+        """Return the cached response for params, or run call() and cache it."""
+        value = self.lookup(params)
+        if value is None:
+            value = call()
+            self.store(params, value)
+        return value
+
+    async def cached_acall(self, params: Dict[str, Any], call: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of cached_call for async LLM clients."""
+        value = self.lookup(params)
+        if value is None:
+            value = await call()
+            self.store(params, value)
+        return value
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": round(self.hit_rate, 3),
+            "entries": len(self.entries),
+        }
+
+    def clear(self) -> None:
+        self.entries.clear()
+        if self.db is not None:
+            self.db.execute("DELETE FROM responses")
+            self.db.commit()
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def load_response_cache() -> Optional[ResponseCache]:
+    """
+    Build a ResponseCache from environment variables, or None if disabled.
+
+    RESPONSE_CACHE: "memory" for an in-memory cache, or a path to a SQLite file
+    RESPONSE_CACHE_SIZE: max in-memory entries (default: 256)
+    RESPONSE_CACHE_DETERMINISTIC: "1" to only cache temperature-0 requests
+    """
+    backend = os.getenv("RESPONSE_CACHE")
+    if not backend:
+        return None
+    return ResponseCache(
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+        db_path=None if backend == "memory" else backend,
+        deterministic_only=os.getenv("RESPONSE_CACHE_DETERMINISTIC") == "1",
+    )
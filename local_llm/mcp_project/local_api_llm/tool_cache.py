@@ -0,0 +1,163 @@
+# Shared helper: canonical copy in mcp-course/L7/mcp_project/tool_cache.py, kept in sync by tools/sync_helpers.py
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Argument names that carry filesystem paths
+PATH_ARGUMENTS = {"path", "paths", "file_path", "dir_path", "directory", "source", "destination"}
+
+
+def _normalize_path(path: str) -> str:
+    return os.path.normpath(os.path.abspath(path))
+
+
+def _paths_overlap(a: str, b: str) -> bool:
+    """True if a and b are the same path or one contains the other."""
+    return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+
+def extract_paths(arguments: Dict[str, Any]) -> List[str]:
+    """Collect normalized paths from a tool call's arguments."""
+    paths = []
+    for key, value in (arguments or {}).items():
+        if key not in PATH_ARGUMENTS and not key.endswith("_path"):
+            continue
+        values = value if isinstance(value, list) else [value]
+        paths.extend(_normalize_path(v) for v in values if isinstance(v, str))
+    return paths
+
+
+class ToolResultCache:
+    """
+    Client-side cache of MCP tool results for read-only tools.
+
+    A tool is cacheable if its server marks it with the readOnlyHint annotation
+    or it is listed in the config allowlist. Entries expire after ttl seconds,
+    the least recently used entry is evicted beyond max_entries, and calls to
+    any other (mutating) tool invalidate cached results they may affect: those
+    with overlapping paths, or, when either side has no path arguments,
+    everything from the same server. A result whose call was still running
+    when an invalidation happened is not stored, since it may predate the
+    change.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 128,
+                 cacheable_tools: Optional[Iterable[str]] = None, call_tool=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cacheable_tools = set(cacheable_tools or [])
+        # Coroutine (session, tool_name, arguments) performing the actual call
+        self._call_tool = call_tool or self._session_call_tool
+        # Maps tool name -> server name, used for path-less invalidation
+        self.tool_servers: Dict[str, str] = {}
+        # key -> (expires_at, tool_name, paths, result)
+        self.entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        # Bumped by every invalidation, so results of calls that overlapped one are not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def register_tool(self, tool_name: str, server_name: str, annotations=None) -> None:
+        """Record a tool's server and whether it declares itself read-only."""
+        self.tool_servers[tool_name] = server_name
+        if annotations is not None and getattr(annotations, "readOnlyHint", False):
+            self.cacheable_tools.add(tool_name)
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.cacheable_tools
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+        return tool_name, json.dumps(arguments or {}, sort_keys=True, default=str)
+
+    def peek(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Any]:
+        """The cached result, if fresh, without counting a hit or miss or touching the LRU order."""
+        entry = self.entries.get(self.make_key(tool_name, arguments))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[3]
+
+    def get(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Any]:
+        key = self.make_key(tool_name, arguments)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[3]
+
+    def put(self, tool_name: str, arguments: Dict[str, Any], result: Any,
+            generation: Optional[int] = None) -> None:
+        """Store a result; with the generation read before the call, only if nothing was invalidated since."""
+        if generation is not None and generation != self.generation:
+            return
+        key = self.make_key(tool_name, arguments)
+        self.entries[key] = (time.monotonic() + self.ttl, tool_name, extract_paths(arguments), result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate_for(self, tool_name: str, arguments: Dict[str, Any]) -> int:
+        """Drop entries a call to the (mutating) tool may have made stale."""
+        changed_paths = extract_paths(arguments)
+        server = self.tool_servers.get(tool_name)
+        self.generation += 1
+
+        stale = []
+        for key, (_, cached_tool, cached_paths, _) in self.entries.items():
+            if changed_paths and cached_paths:
+                if any(_paths_overlap(a, b) for a in changed_paths for b in cached_paths):
+                    stale.append(key)
+            elif server is None or self.tool_servers.get(cached_tool) == server:
+                stale.append(key)
+
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    @staticmethod
+    async def _session_call_tool(session, tool_name: str, arguments: Dict[str, Any]):
+        return await session.call_tool(tool_name, arguments=arguments)
+
+    async def call_tool(self, session, tool_name: str, arguments: Dict[str, Any]):
+        """Call a tool through session, serving read-only tools from the cache."""
+        if not self.is_cacheable(tool_name):
+            result = await self._call_tool(session, tool_name, arguments)
+            self.invalidate_for(tool_name, arguments)
+            return result
+
+        result = self.get(tool_name, arguments)
+        if result is None:
+            generation = self.generation
+            result = await self._call_tool(session, tool_name, arguments)
+            if not getattr(result, "isError", False):
+                self.put(tool_name, arguments, result, generation)
+        return result
+
+    async def prefetch(self, session, tool_name: str, arguments: Dict[str, Any]) -> bool:
+        """
+        Speculatively cache a read-only tool's result. Unlike call_tool, it
+        leaves the hit and miss counts alone, so they only reflect calls the
+        model made. Returns whether a result was fetched.
+        """
+        if not self.is_cacheable(tool_name) or self.peek(tool_name, arguments) is not None:
+            return False
+        generation = self.generation
+        result = await self._call_tool(session, tool_name, arguments)
+        if not getattr(result, "isError", False):
+            self.put(tool_name, arguments, result, generation)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.entries),
+        }
@@ -0,0 +1,42 @@
+# Shared helper: canonical copy in mcp-course/L7/mcp_project/serve.py, kept in sync by tools/sync_helpers.py
+import argparse
+import os
+
+
+def serve(mcp, module_name: str, argv=None) -> None:
+    """
+    Run a FastMCP server over stdio (default) or as a long-lived HTTP service
+    that many chatbots share, so its caches and indexes stay warm.
+
+    With --workers > 1 the streamable-http app is served by several uvicorn
+    processes using stateless sessions; module_name must expose http_app().
+    Each worker then has its own caches and indexes, warmed separately, and a
+    request reaches whichever worker the OS hands it to, so one worker is the
+    way to share warm caches; more only pay off for CPU-bound load.
+    """
+    parser = argparse.ArgumentParser(description=f"Run the {mcp.name} MCP server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http", "sse"],
+                        default=os.getenv("MCP_TRANSPORT", "stdio"))
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for streamable-http (implies stateless sessions; "
+                             "each worker keeps its own caches)")
+    args = parser.parse_args(argv)
+
+    if args.transport == "stdio":
+        mcp.run(transport="stdio")
+        return
+
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    print(f"Serving {mcp.name} over {args.transport} at http://{args.host}:{args.port}")
+
+    if args.transport == "streamable-http" and args.workers > 1:
+        import uvicorn
+        print(f"{args.workers} stateless workers: caches are per worker, and subscriptions are unavailable")
+        uvicorn.run(f"{module_name}:http_app", factory=True, host=args.host,
+                    port=args.port, workers=args.workers)
+        return
+
+    mcp.run(transport=args.transport)
@@ -1,13 +1,25 @@
 
 import asyncio
 import json
-from mcp import ClientSession, StdioServerParameters
+import os
+import tempfile
+import time
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from contextlib import AsyncExitStack
+from pydantic import AnyUrl
+
+# Longest allowed delay between an outside edit and the resource-updated notification
+NOTIFY_SECONDS = 2.0
 
 async def test_mcp_server():
     """Test the MCP filesystem server"""
     print("🧪 Testing MCP Filesystem Server...")
+    updated = asyncio.Event()
+    
+    async def on_message(message):
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ResourceUpdatedNotification):
+            updated.set()
     
     async with AsyncExitStack() as stack:
         # Load server configuration
@@ -24,7 +36,7 @@ async def test_mcp_server():
         read, write = stdio_transport
         
         session = await stack.enter_async_context(
-            ClientSession(read, write)
+            ClientSession(read, write, message_handler=on_message)
         )
         
         # Initialize the session
@@ -71,6 +83,40 @@ async def test_mcp_server():
         except Exception as e:
             print(f"❌ get_file_info failed: {e}")
         
+        # Test that an edit made outside the server reaches a subscriber
+        try:
+            uri = AnyUrl("file:///test_file.txt")
+            await session.read_resource(uri)
+            await session.subscribe_resource(uri)
+            updated.clear()
+            start = time.perf_counter()
+            with open("test_file.txt", "w") as f:
+                f.write("Edited outside the server")
+            await asyncio.wait_for(updated.wait(), NOTIFY_SECONDS)
+            elapsed = time.perf_counter() - start
+            result = await session.read_resource(uri)
+            assert result.contents[0].text == "Edited outside the server", "stale cached content"
+            print(f"✅ resource subscription: notified {elapsed * 1000:.0f} ms after the edit")
+        except Exception as e:
+            print(f"❌ resource subscription failed: {e!r}")
+        
+        # Test that subscribing is enough, without reading the file first
+        try:
+            # A directory nothing has read from, so it is not watched yet
+            with tempfile.TemporaryDirectory() as directory:
+                note = os.path.join(directory, "note.txt")
+                with open(note, "w") as f:
+                    f.write("Not read yet")
+                await session.subscribe_resource(AnyUrl("file:///" + note.replace("/", "%2F")))
+                updated.clear()
+                start = time.perf_counter()
+                with open(note, "w") as f:
+                    f.write("Edited outside the server")
+                await asyncio.wait_for(updated.wait(), NOTIFY_SECONDS)
+            print(f"✅ subscription without a read: notified {(time.perf_counter() - start) * 1000:.0f} ms after the edit")
+        except Exception as e:
+            print(f"❌ subscription without a read failed: {e!r}")
+        
         # Clean up test file
         try:
             result = await session.call_tool("delete_file", {"file_path": "test_file.txt"})
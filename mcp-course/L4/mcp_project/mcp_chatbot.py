@@ -3,6 +3,7 @@ from anthropic import Anthropic
 from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from typing import List
+from async_input import ainput
 import asyncio
 import nest_asyncio
 
@@ -73,7 +74,7 @@ class MCP_ChatBot:
         
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                query = (await ainput("\nQuery: ")).strip()
         
                 if query.lower() == 'quit':
                     break
@@ -81,6 +82,8 @@ class MCP_ChatBot:
                 await self.process_query(query)
                 print("\n")
                     
+            except EOFError:
+                break
             except Exception as e:
                 print(f"\nError: {str(e)}")
     
@@ -1,15 +1,13 @@
 from dotenv import load_dotenv
-import cohere
 from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from typing import List
+from response_cache import load_response_cache
+from async_input import ainput
 import asyncio
-import nest_asyncio
 import os
 import json
 
-nest_asyncio.apply()
-
 load_dotenv()
 
 class MCP_ChatBot:
@@ -17,14 +15,31 @@ class MCP_ChatBot:
     def __init__(self):
         # Initialize session and client objects
         self.session: ClientSession = None
-        self.cohere_client = cohere.Client(os.getenv('COHERE_TRIAL_KEY'))
+        # Created on first use, so importing the SDK does not delay startup
+        self.cohere_client = None
         self.available_tools: List[dict] = []
         self.conversation_history = []
+        # Optional LLM response cache (see response_cache.load_response_cache)
+        self.response_cache = load_response_cache()
+
+    async def cohere_chat(self, **params):
+        """Call cohere_client.chat, going through the response cache if enabled."""
+        if self.cohere_client is None:
+            import cohere
+            self.cohere_client = cohere.AsyncClient(os.getenv('COHERE_TRIAL_KEY'))
+        if self.response_cache is None:
+            return await self.cohere_client.chat(**params)
+        return await self.response_cache.cached_acall(
+            params, lambda: self.cohere_client.chat(**params)
+        )
+
+    async def call_tool(self, tool_call):
+        """Run one Cohere tool call via the MCP session and wrap it as a tool result"""
+        print(f"Calling tool {tool_call.name} with args {tool_call.parameters}")
+        result = await self.session.call_tool(tool_call.name, arguments=tool_call.parameters)
+        return {"call": tool_call, "outputs": [{"result": str(result.content)}]}
 
     async def process_query(self, query):
-        # Add the user query to conversation history
-        self.conversation_history.append({"role": "User", "message": query})
-        
         # Prepare tools in the format expected by Cohere
         cohere_tools = []
         for tool in self.available_tools:
@@ -35,7 +50,7 @@ class MCP_ChatBot:
             })
         
         # Initial call to Cohere
-        response = self.cohere_client.chat(
+        response = await self.cohere_chat(
             model="command-light",  # or another appropriate Cohere model
             message=query,
             temperature=0.3,
@@ -44,38 +59,27 @@ class MCP_ChatBot:
             prompt_truncation='AUTO'
         )
         
-        process_query = True
-        while process_query:
-            # Check if the response has tool calls
-            if response.tool_calls and len(response.tool_calls) > 0:
-                # Process each tool call
-                for tool_call in response.tool_calls:
-                    tool_name = tool_call["name"]
-                    tool_args = tool_call["parameters"]
-                    
-                    print(f"Calling tool {tool_name} with args {tool_args}")
-                    
-                    # Call the tool via MCP session
-                    result = await self.session.call_tool(tool_name, arguments=tool_args)
-                    
-                    # Add the tool result to a new message
-                    tool_result_message = f"Tool {tool_name} result: {result.content}"
-                    self.conversation_history.append({"role": "System", "message": tool_result_message})
-                    
-                    # Call Cohere again with the tool result
-                    response = self.cohere_client.chat(
-                        model="command-light",
-                        message=f"Here's the result from the {tool_name} tool: {result.content}. Please continue with your response.",
-                        temperature=0.3,
-                        chat_history=self.conversation_history,
-                        tools=cohere_tools if cohere_tools else None,
-                        prompt_truncation='AUTO'
-                    )
-            else:
-                # No more tool calls, print the response and exit the loop
-                print(response.text)
-                self.conversation_history.append({"role": "Chatbot", "message": response.text})
-                process_query = False
+        # Keep going while the model asks for tools
+        while response.tool_calls:
+            # Run every tool call from this response concurrently and send
+            # all of the results back in a single follow-up request
+            tool_results = await asyncio.gather(
+                *(self.call_tool(tool_call) for tool_call in response.tool_calls)
+            )
+            response = await self.cohere_chat(
+                model="command-light",
+                message="",
+                temperature=0.3,
+                chat_history=response.chat_history,
+                tools=cohere_tools if cohere_tools else None,
+                tool_results=list(tool_results),
+                prompt_truncation='AUTO'
+            )
+        
+        # No more tool calls, print the response
+        print(response.text)
+        self.conversation_history.append({"role": "User", "message": query})
+        self.conversation_history.append({"role": "Chatbot", "message": response.text})
     
     async def chat_loop(self):
         """Run an interactive chat loop"""
@@ -84,7 +88,7 @@ class MCP_ChatBot:
         
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                query = (await ainput("\nQuery: ")).strip()
         
                 if query.lower() == 'quit':
                     break
@@ -92,6 +96,8 @@ class MCP_ChatBot:
                 await self.process_query(query)
                 print("\n")
                     
+            except EOFError:
+                break
             except Exception as e:
                 print(f"\nError: {str(e)}")
     
@@ -122,6 +128,10 @@ class MCP_ChatBot:
     
                 await self.chat_loop()
 
+        if self.response_cache is not None:
+            print(f"Response cache: {self.response_cache.stats()}")
+            self.response_cache.close()
+
 
 async def main():
     chatbot = MCP_ChatBot()
@@ -1,45 +1,95 @@
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_cohere import ChatCohere
-from langchain_core.tools import Tool, tool
-from langchain.agents import initialize_agent, AgentType
+from langchain_core.caches import BaseCache
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from response_cache import ResponseCache, load_response_cache
+from async_input import ainput
 import asyncio
-import json
+import importlib
 import os
-import nest_asyncio
 import traceback
 
-nest_asyncio.apply()
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
+
 load_dotenv()
 
+# Modules of the agent stack, warmed up by import_agent_stack
+AGENT_STACK_MODULES = ["langchain_cohere", "langchain.agents", "langchain_core.prompts", "langchain_core.tools"]
+
+
+def import_agent_stack():
+    """
+    Import the LangChain agent and Cohere model modules, which take most of
+    the startup time. Run in a worker thread while the MCP server starts;
+    nothing may import LangChain on the event loop until it has finished.
+    """
+    for module in AGENT_STACK_MODULES:
+        importlib.import_module(module)
+
+
+class LangChainResponseCache(BaseCache):
+    """Adapter exposing a ResponseCache through LangChain's LLM cache interface"""
+
+    def __init__(self, response_cache: ResponseCache, temperature: Optional[float] = None):
+        self.response_cache = response_cache
+        self.temperature = temperature
+
+    def _params(self, prompt: str, llm_string: str) -> Dict[str, Any]:
+        return {"llm": llm_string, "prompt": prompt, "temperature": self.temperature}
+
+    def lookup(self, prompt: str, llm_string: str):
+        return self.response_cache.lookup(self._params(prompt, llm_string))
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        self.response_cache.store(self._params(prompt, llm_string), return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.response_cache.clear()
+
 class MCP_ChatBot:
     def __init__(self):
         # Initialize session and MCP client objects
         self.session: ClientSession = None
         self.mcp_tools: List[Dict[str, Any]] = []
-        self.langchain_tools: List[Tool] = []
+        self.langchain_tools: List["BaseTool"] = []
         self.chat_history = []
         
         # Check for API key
         if not os.getenv("COHERE_TRIAL_KEY"):
             raise ValueError("Please set COHERE_TRIAL_KEY environment variable")
         
-        # Initialize Cohere model
-        self.llm = ChatCohere(
-            model="command-r-plus",  # or another Cohere model
-            temperature=0
-        )
+        # Optional LLM response cache (see response_cache.load_response_cache)
+        self.response_cache = load_response_cache()
+        
+        # Cohere model, created in setup_agent
+        self.llm = None
 
     def setup_agent(self):
         """Set up the LangChain agent with the current tools"""
-        # Create a CONVERSATIONAL_REACT_DESCRIPTION agent - simpler than structured tool chat
-        self.agent = initialize_agent(
-            self.langchain_tools,
-            self.llm,
-            agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
+        from langchain_cohere import ChatCohere
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+
+        if self.llm is None:
+            self.llm = ChatCohere(
+                model="command-r-plus",  # or another Cohere model
+                temperature=0,
+                cache=LangChainResponseCache(self.response_cache, temperature=0) if self.response_cache else None
+            )
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are a helpful research assistant. Use the available tools when needed."),
+            MessagesPlaceholder("chat_history"),
+            ("human", "{input}"),
+            MessagesPlaceholder("agent_scratchpad"),
+        ])
+        # A tool-calling agent can request several tools in one step; under
+        # ainvoke the executor runs them concurrently on the event loop
+        agent = create_tool_calling_agent(self.llm, self.langchain_tools, prompt)
+        self.agent = AgentExecutor(
+            agent=agent,
+            tools=self.langchain_tools,
             verbose=True,
             handle_parsing_errors=True,
             max_iterations=3
@@ -47,21 +97,17 @@ class MCP_ChatBot:
 
     async def process_query(self, query):
         """Process a user query through the LangChain agent"""
+        from langchain_core.messages import HumanMessage, AIMessage
         try:
-            # Add input to chat history
-            self.chat_history.append(HumanMessage(content=query))
-            
-            # Invoke the agent
-            result = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.agent.invoke({
-                    "input": query, 
-                    "chat_history": [(m.content if isinstance(m, (HumanMessage, AIMessage)) else str(m)) 
-                                    for m in self.chat_history[:-1]]  # Convert to simple format
-                })
-            )
+            # Invoke the agent on the current event loop, sharing it with the MCP session
+            result = await self.agent.ainvoke({
+                "input": query,
+                "chat_history": self.chat_history
+            })
             
-            # Add response to chat history
+            # Add the exchange to chat history
             response = result["output"]
+            self.chat_history.append(HumanMessage(content=query))
             self.chat_history.append(AIMessage(content=response))
             
             print(response)
@@ -77,7 +123,7 @@ class MCP_ChatBot:
 
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                query = (await ainput("\nQuery: ")).strip()
 
                 if query.lower() == 'quit':
                     break
@@ -85,28 +131,31 @@ class MCP_ChatBot:
                 await self.process_query(query)
                 print("\n")
 
+            except EOFError:
+                break
             except Exception as e:
                 print(f"\nError: {str(e)}")
 
     def create_mcp_tool(self, mcp_tool):
-        """Create a LangChain tool from an MCP tool definition"""
+        """Create an async LangChain tool from an MCP tool definition"""
+        from langchain_core.tools import StructuredTool
         tool_name = mcp_tool["name"]
-        tool_desc = mcp_tool["description"]
         
-        @tool(name=tool_name, description=tool_desc)
-        def mcp_tool_function(*args, **kwargs):
+        async def call_mcp_tool(**kwargs):
             """Wrapper for MCP tool calls"""
             try:
-                # Run the async call in the event loop
-                loop = asyncio.get_event_loop()
-                result = loop.run_until_complete(
-                    self.session.call_tool(tool_name, arguments=kwargs)
-                )
+                result = await self.session.call_tool(tool_name, arguments=kwargs)
                 return result.content
             except Exception as e:
                 return f"Error calling {tool_name}: {str(e)}"
         
-        return mcp_tool_function
+        # Coroutine-only tool: the agent awaits it directly via ainvoke
+        return StructuredTool.from_function(
+            coroutine=call_mcp_tool,
+            name=tool_name,
+            description=mcp_tool["description"],
+            args_schema=mcp_tool["inputSchema"]
+        )
 
     async def connect_to_server_and_run(self):
         # Create server parameters for stdio connection
@@ -116,6 +165,9 @@ class MCP_ChatBot:
             env=None,  # Environment variables
         )
         
+        # Import the agent stack while the server process starts
+        agent_stack = asyncio.create_task(asyncio.to_thread(import_agent_stack))
+
         async with stdio_client(server_params) as (read, write):
             async with ClientSession(read, write) as session:
                 self.session = session
@@ -134,6 +186,10 @@ class MCP_ChatBot:
                     "inputSchema": tool.inputSchema
                 } for tool in response.tools]
                 
+                # Wait for the background imports first: importing the same LangChain
+                # modules on two threads at once can see them half initialized
+                await agent_stack
+
                 # Convert MCP tools to LangChain tools
                 self.langchain_tools = []
                 for mcp_tool in self.mcp_tools:
@@ -146,6 +202,10 @@ class MCP_ChatBot:
                 # Start chat loop
                 await self.chat_loop()
 
+        if self.response_cache is not None:
+            print(f"Response cache: {self.response_cache.stats()}")
+            self.response_cache.close()
+
 async def main():
     chatbot = MCP_ChatBot()
     await chatbot.connect_to_server_and_run()
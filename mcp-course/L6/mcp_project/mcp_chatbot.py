@@ -5,6 +5,7 @@ from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from typing import List, Dict, TypedDict
 from contextlib import AsyncExitStack
+from async_input import ainput
 import json
 import asyncio
 
@@ -124,7 +125,7 @@ class MCP_ChatBot:
         
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                query = (await ainput("\nQuery: ")).strip()
         
                 if query.lower() == 'quit':
                     break
@@ -132,6 +133,8 @@ class MCP_ChatBot:
                 await self.process_query(query)
                 print("\n")
                     
+            except EOFError:
+                break
             except Exception as e:
                 print(f"\nError: {str(e)}")
     
@@ -0,0 +1,328 @@
+"""
+Multi-session chat service.
+
+Many conversations share one MCP_ChatBot, i.e. one set of MCP server
+connections and one Anthropic client, while each ConversationSession keeps
+its own history. Turns are run by a fixed number of workers that take
+sessions round-robin, one turn at a time, so a busy session cannot starve the
+others; turns of one session always run in order. When the queues are full,
+new messages are rejected with ServiceBusy (HTTP 429) instead of piling up.
+Messages still queued when their session is closed fail with SessionClosed
+(HTTP 410).
+
+HTTP/WebSocket API (see build_app):
+    POST   /sessions                      -> {"session_id": ...}
+    POST   /sessions/{id}/messages        {"message": ...} -> {"reply": ...}
+    GET    /sessions/{id}                 -> session info and history
+    DELETE /sessions/{id}
+    WS     /sessions/{id}/ws              send text, receive {"reply": ...}
+    GET    /stats
+
+Usage:
+    uv run chat_service.py --port 8080
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from instrumentation import Histogram, LATENCY_BUCKETS_MS
+from mcp_chatbot import MCP_ChatBot
+
+
+class ServiceBusy(Exception):
+    """Raised when a message cannot be queued; the client should retry later."""
+
+
+class SessionClosed(Exception):
+    """Raised for a queued message whose session was closed before its turn ran."""
+
+
+@dataclass
+class ConversationSession:
+    session_id: str
+    # Completed turns as user/assistant text messages (tool calls are not kept)
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    # Queued (text, future, enqueue time) waiting for a worker
+    pending: Deque[Tuple[str, asyncio.Future, float]] = field(default_factory=deque)
+    running: bool = False
+    turns: int = 0
+    created: float = field(default_factory=time.time)
+    last_active: float = field(default_factory=time.time)
+
+
+class ChatService:
+    def __init__(self, chatbot: MCP_ChatBot, max_concurrent_turns: int = 16,
+                 max_pending: int = 256, max_pending_per_session: int = 4,
+                 max_history_turns: int = 20, session_ttl: float = 3600.0):
+        self.chatbot = chatbot
+        self.max_concurrent_turns = max_concurrent_turns
+        self.max_pending = max_pending
+        self.max_pending_per_session = max_pending_per_session
+        self.max_history_turns = max_history_turns
+        self.session_ttl = session_ttl
+        self.sessions: Dict[str, ConversationSession] = {}
+        # Ids of sessions with queued turns and no turn running, in arrival order
+        self.ready: asyncio.Queue = asyncio.Queue()
+        self.workers: List[asyncio.Task] = []
+        self.pending_count = 0
+        self.active_count = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.turn_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    async def start(self) -> None:
+        for _ in range(self.max_concurrent_turns):
+            self.workers.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers.clear()
+        for session in self.sessions.values():
+            while session.pending:
+                _, future, _ = session.pending.popleft()
+                if not future.done():
+                    future.set_exception(ServiceBusy("Service is shutting down"))
+        self.pending_count = 0
+
+    def create_session(self) -> ConversationSession:
+        self.expire_idle_sessions()
+        session = ConversationSession(uuid.uuid4().hex)
+        self.sessions[session.session_id] = session
+        return session
+
+    def get_session(self, session_id: str) -> ConversationSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def close_session(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id, None)
+        while session is not None and session.pending:
+            _, future, _ = session.pending.popleft()
+            self.pending_count -= 1
+            if not future.done():
+                future.set_exception(SessionClosed(f"Session {session_id} was closed"))
+
+    def expire_idle_sessions(self) -> None:
+        cutoff = time.time() - self.session_ttl
+        for session_id, session in list(self.sessions.items()):
+            if session.last_active < cutoff and not session.running and not session.pending:
+                del self.sessions[session_id]
+
+    async def submit(self, session_id: str, text: str) -> str:
+        """Queue a user message and wait for the reply."""
+        session = self.get_session(session_id)
+        if self.pending_count >= self.max_pending:
+            self.rejected += 1
+            raise ServiceBusy("Too many queued messages")
+        if len(session.pending) >= self.max_pending_per_session:
+            self.rejected += 1
+            raise ServiceBusy(f"Too many queued messages for session {session_id}")
+
+        future = asyncio.get_running_loop().create_future()
+        session.pending.append((text, future, time.perf_counter()))
+        session.last_active = time.time()
+        self.pending_count += 1
+        if not session.running and len(session.pending) == 1:
+            self.ready.put_nowait(session.session_id)
+        return await future
+
+    async def _worker(self) -> None:
+        while True:
+            session_id = await self.ready.get()
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+            # Drop messages whose sender stopped waiting, e.g. a disconnected client
+            while session.pending and session.pending[0][1].cancelled():
+                session.pending.popleft()
+                self.pending_count -= 1
+            if not session.pending:
+                continue
+
+            text, future, queued_at = session.pending.popleft()
+            self.pending_count -= 1
+            session.running = True
+            self.active_count += 1
+            started = time.perf_counter()
+            self.queue_wait_ms.observe((started - queued_at) * 1000)
+            try:
+                reply = await self._run_turn(session, text)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.completed += 1
+                if not future.done():
+                    future.set_result(reply)
+            finally:
+                self.turn_ms.observe((time.perf_counter() - started) * 1000)
+                self.active_count -= 1
+                session.running = False
+                session.last_active = time.time()
+                # Back of the line, so other sessions get a turn first
+                if session.pending and session_id in self.sessions:
+                    self.ready.put_nowait(session_id)
+
+    async def _run_turn(self, session: ConversationSession, text: str) -> str:
+        user_message = {"role": "user", "content": text}
+        messages = session.history + [user_message]
+        reply = await self.chatbot.run_turn(messages, on_text=None)
+        session.history += [user_message, {"role": "assistant", "content": reply or "(no answer)"}]
+        del session.history[:-2 * self.max_history_turns]
+        session.turns += 1
+        return reply
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "pending": self.pending_count,
+            "active": self.active_count,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_wait_ms": self.queue_wait_ms.summary(),
+            "turn_ms": self.turn_ms.summary(),
+        }
+
+
+def build_app(service: ChatService, lifespan=None):
+    """Starlette app exposing the service over HTTP and WebSocket."""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route, WebSocketRoute
+    from starlette.websockets import WebSocketDisconnect
+
+    def busy(e: ServiceBusy):
+        return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "1"})
+
+    def not_found(session_id: str):
+        return JSONResponse({"error": f"Unknown session {session_id}"}, status_code=404)
+
+    def gone(e: SessionClosed):
+        return JSONResponse({"error": str(e)}, status_code=410)
+
+    async def create_session(request):
+        session = service.create_session()
+        return JSONResponse({"session_id": session.session_id}, status_code=201)
+
+    async def session_info(request):
+        session_id = request.path_params["session_id"]
+        try:
+            session = service.get_session(session_id)
+        except KeyError:
+            return not_found(session_id)
+        return JSONResponse({
+            "session_id": session.session_id,
+            "turns": session.turns,
+            "pending": len(session.pending),
+            "history": session.history,
+        })
+
+    async def delete_session(request):
+        service.close_session(request.path_params["session_id"])
+        return Response(status_code=204)
+
+    async def post_message(request):
+        session_id = request.path_params["session_id"]
+        body = await request.json()
+        try:
+            reply = await service.submit(session_id, body["message"])
+        except KeyError:
+            return not_found(session_id)
+        except ServiceBusy as e:
+            return busy(e)
+        except SessionClosed as e:
+            return gone(e)
+        return JSONResponse({"reply": reply})
+
+    async def session_socket(websocket):
+        session_id = websocket.path_params["session_id"]
+        if session_id not in service.sessions:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        try:
+            while True:
+                text = await websocket.receive_text()
+                try:
+                    await websocket.send_json({"reply": await service.submit(session_id, text)})
+                except ServiceBusy as e:
+                    await websocket.send_json({"error": str(e), "retry": True})
+                except (KeyError, SessionClosed):
+                    await websocket.close(code=4404)
+                    return
+        except WebSocketDisconnect:
+            pass
+
+    async def stats(request):
+        return JSONResponse(service.stats())
+
+    return Starlette(
+        routes=[
+            Route("/sessions", create_session, methods=["POST"]),
+            Route("/sessions/{session_id}", session_info, methods=["GET"]),
+            Route("/sessions/{session_id}", delete_session, methods=["DELETE"]),
+            Route("/sessions/{session_id}/messages", post_message, methods=["POST"]),
+            WebSocketRoute("/sessions/{session_id}/ws", session_socket),
+            Route("/stats", stats, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def create_app(**service_options):
+    """App that connects to the configured MCP servers on startup."""
+    chatbot = MCP_ChatBot()
+    service = ChatService(chatbot, **service_options)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await chatbot.connect_to_servers()
+        await service.start()
+        try:
+            yield
+        finally:
+            await service.stop()
+            await chatbot.cleanup()
+
+    return build_app(service, lifespan=lifespan)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Multi-session MCP chat service")
+    parser.add_argument("--host", default=os.getenv("CHAT_SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("CHAT_SERVICE_PORT", "8080")))
+    parser.add_argument("--max-concurrent-turns", type=int, default=16)
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--max-pending-per-session", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    app = create_app(
+        max_concurrent_turns=args.max_concurrent_turns,
+        max_pending=args.max_pending,
+        max_pending_per_session=args.max_pending_per_session,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
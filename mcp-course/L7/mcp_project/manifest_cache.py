@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from mcp import types
+from mcp.shared.exceptions import McpError
+
+# Config keys that decide which server process (and so which catalog) we get
+MANIFEST_KEY_FIELDS = ("command", "args", "env", "cwd", "url", "transport")
+
+
+@dataclass
+class Manifest:
+    """A server's tool, prompt, resource and resource template catalog."""
+    tools: List[types.Tool] = field(default_factory=list)
+    prompts: List[types.Prompt] = field(default_factory=list)
+    resources: List[types.Resource] = field(default_factory=list)
+    resource_templates: List[types.ResourceTemplate] = field(default_factory=list)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in self.tools],
+            "prompts": [prompt.model_dump(mode="json", exclude_none=True) for prompt in self.prompts],
+            "resources": [resource.model_dump(mode="json", exclude_none=True) for resource in self.resources],
+            "resource_templates": [
+                template.model_dump(mode="json", exclude_none=True) for template in self.resource_templates
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Manifest":
+        return cls(
+            tools=[types.Tool.model_validate(tool) for tool in data.get("tools", [])],
+            prompts=[types.Prompt.model_validate(prompt) for prompt in data.get("prompts", [])],
+            resources=[types.Resource.model_validate(resource) for resource in data.get("resources", [])],
+            resource_templates=[
+                types.ResourceTemplate.model_validate(template) for template in data.get("resource_templates", [])
+            ],
+        )
+
+
+async def fetch_manifest(session) -> Manifest:
+    """List the catalog of a connected session (or ServerPool)."""
+    manifest = Manifest()
+    manifest.tools = list((await session.list_tools()).tools)
+    prompts_response = await session.list_prompts()
+    if prompts_response and prompts_response.prompts:
+        manifest.prompts = list(prompts_response.prompts)
+    resources_response = await session.list_resources()
+    if resources_response and resources_response.resources:
+        manifest.resources = list(resources_response.resources)
+    try:
+        templates_response = await session.list_resource_templates()
+    except McpError:
+        # Servers without resource templates may not implement the method
+        templates_response = None
+    if templates_response and templates_response.resourceTemplates:
+        manifest.resource_templates = list(templates_response.resourceTemplates)
+    return manifest
+
+
+class ManifestCache:
+    """
+    Server catalogs persisted in a JSON file, keyed by server name and a hash
+    of the config entry that launches it, so editing a server's command or
+    args invalidates its entry. Each entry also records the server name and
+    version reported at initialization, so an upgraded server can be detected
+    once it is running (see is_current).
+    """
+
+    def __init__(self, path: str = ".mcp_manifest.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest cache {path}: {e}", file=sys.stderr)
+
+    @staticmethod
+    def config_hash(server_config: Dict[str, Any]) -> str:
+        relevant = {k: server_config.get(k) for k in MANIFEST_KEY_FIELDS}
+        canonical = json.dumps(relevant, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, server_name: str, server_config: Dict[str, Any]) -> Optional[Manifest]:
+        entry = self.entries.get(server_name)
+        if entry is None or entry.get("config_hash") != self.config_hash(server_config):
+            return None
+        try:
+            return Manifest.from_json(entry["manifest"])
+        except Exception as e:
+            print(f"Ignoring stale manifest for {server_name}: {e}", file=sys.stderr)
+            return None
+
+    def is_current(self, server_name: str, server_config: Dict[str, Any],
+                   server_version: Optional[str], manifest: Manifest) -> bool:
+        """True if the cached entry matches the running server's version and catalog."""
+        entry = self.entries.get(server_name)
+        return (
+            entry is not None
+            and entry.get("config_hash") == self.config_hash(server_config)
+            and entry.get("server_version") == server_version
+            and entry.get("manifest") == manifest.to_json()
+        )
+
+    def put(self, server_name: str, server_config: Dict[str, Any], manifest: Manifest,
+            server_version: Optional[str] = None) -> None:
+        with self.lock:
+            self.entries[server_name] = {
+                "config_hash": self.config_hash(server_config),
+                "server_version": server_version,
+                "manifest": manifest.to_json(),
+            }
+            # Write to a temporary file first so a crash never leaves a truncated cache
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
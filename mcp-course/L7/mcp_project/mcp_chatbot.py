@@ -1,146 +1,307 @@
 from dotenv import load_dotenv
-from anthropic import Anthropic
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters, types
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client, get_default_environment
+from mcp.client.streamable_http import streamablehttp_client
 from contextlib import AsyncExitStack
+from response_cache import load_response_cache
+from tool_cache import ToolResultCache
+from session_pool import ServerPool
+from manifest_cache import ManifestCache, fetch_manifest
+from prefetch import Prefetcher
+from resource_cache import SubscribedResourceCache
+from resource_router import ResourceRouter
+import tracing
+from async_input import ainput
 import json
+import os
 import asyncio
-import nest_asyncio
-
-nest_asyncio.apply()
+from urllib.parse import quote
 
 load_dotenv()
 
+# Spans are exported to $TRACE_FILE (JSONL) when it is set
+tracer = tracing.get_tracer("chatbot")
+
+MODEL = 'claude-3-7-sonnet-20250219'
+
 class MCP_ChatBot:
     def __init__(self):
         self.exit_stack = AsyncExitStack()
-        self.anthropic = Anthropic()
+        # Async client, so concurrent conversations can share it (see chat_service.py);
+        # created on first use, so importing the SDK does not delay startup
+        self.anthropic = None
         # Tools list required for Anthropic API
         self.available_tools = []
         # Prompts list for quick display 
         self.available_prompts = []
-        # Sessions dict maps tool/prompt names or resource URIs to MCP client sessions
+        # Sessions dict maps tool/prompt names to MCP client sessions
         self.sessions = {}
+        # Resource URIs and URI templates (papers://{topic}) -> session
+        self.resources = ResourceRouter()
+        # Copies of resources read so far, dropped when the server reports an update
+        self.resource_cache = SubscribedResourceCache()
+        # One ServerPool per connected server (see session_pool.py)
+        self.pools = []
+        # Catalog registered for each server, so a refresh can replace it
+        self.catalogs = {}
+        # Server names in config order
+        self.server_order = []
+        # Persisted server catalogs, used to start servers lazily
+        self.manifest_cache = ManifestCache(os.getenv("MCP_MANIFEST_CACHE", ".mcp_manifest.json"))
+        self.lazy_start = os.getenv("MCP_LAZY_START") == "1"
+        # Servers being started in the background
+        self.background_tasks = []
+        # Optional LLM response cache (see response_cache.load_response_cache)
+        self.response_cache = load_response_cache()
+        # Cache of results from read-only tools, filled in by call_tool
+        self.tool_cache = ToolResultCache(call_tool=tracing.call_tool)
+        # Optional speculative lookups of papers and files mentioned in answers
+        self.prefetcher = Prefetcher(self) if os.getenv("MCP_PREFETCH") == "1" else None
+
+    async def create_message(self, **params):
+        """Send a Messages API request, going through the response cache if enabled."""
+        with tracer.span("llm.request", model=params.get("model")) as span:
+            send = lambda: self.send_message(span, **params)
+            if self.response_cache is None:
+                return await send()
+            hits = self.response_cache.hits
+            response = await self.response_cache.cached_acall(params, send)
+            span.set_attribute("cache_hit", self.response_cache.hits > hits)
+            return response
+
+    async def send_message(self, span, **params):
+        """Call the Messages API; when tracing, stream it to record time-to-first-token."""
+        if self.anthropic is None:
+            from anthropic import AsyncAnthropic
+            self.anthropic = AsyncAnthropic()
+        if not tracer.enabled:
+            return await self.anthropic.messages.create(**params)
+        async with self.anthropic.messages.stream(**params) as stream:
+            async for event in stream:
+                if event.type == "content_block_start":
+                    span.add_event("first_token")
+                    break
+            return await stream.get_final_message()
+
+    async def handle_sampling(self, context, params: types.CreateMessageRequestParams):
+        """Answer a server's sampling/createMessage request (e.g. summarize_topic) with our LLM."""
+        messages = [
+            {'role': message.role, 'content': message.content.text if message.content.type == 'text' else ''}
+            for message in params.messages
+        ]
+        request = {'model': MODEL, 'max_tokens': params.maxTokens, 'messages': messages}
+        if params.systemPrompt:
+            request['system'] = params.systemPrompt
+        if params.temperature is not None:
+            request['temperature'] = params.temperature
+        if params.stopSequences:
+            request['stop_sequences'] = params.stopSequences
+        try:
+            response = await self.create_message(**request)
+        except Exception as e:
+            return types.ErrorData(code=types.INTERNAL_ERROR, message=f"Sampling failed: {e}")
+        return types.CreateMessageResult(
+            role='assistant',
+            content=types.TextContent(
+                type='text', text="".join(block.text for block in response.content if block.type == 'text')
+            ),
+            model=response.model,
+            stopReason='maxTokens' if response.stop_reason == 'max_tokens' else 'endTurn',
+        )
+
+    def open_transport(self, server_config):
+        """Transport context for a config entry: a shared HTTP server if it has a url, else stdio."""
+        if "url" in server_config:
+            if server_config.get("transport") == "sse":
+                return sse_client(server_config["url"], headers=server_config.get("headers"))
+            return streamablehttp_client(server_config["url"], headers=server_config.get("headers"))
+
+        if tracer.enabled:
+            # Let the server export its spans to the same trace file
+            server_config = {**server_config, "env": {
+                **get_default_environment(), **(server_config.get("env") or {}), **tracer.child_env()
+            }}
+        return stdio_client(StdioServerParameters(**server_config))
 
     async def connect_to_server(self, server_name, server_config):
         try:
-            server_params = StdioServerParameters(**server_config)
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
+            # The pool reconnects crashed or hung servers and balances calls across replicas
+            pool = ServerPool(
+                server_name, server_config, self.open_transport, sampling_callback=self.handle_sampling,
+                message_handler=self.resource_cache.handle_message,
             )
-            read, write = stdio_transport
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            await session.initialize()
-            
-            
-            try:
-                # List available tools
-                response = await session.list_tools()
-                for tool in response.tools:
-                    self.sessions[tool.name] = session
-                    self.available_tools.append({
-                        "name": tool.name,
-                        "description": tool.description,
-                        "input_schema": tool.inputSchema
-                    })
-            
-                # List available prompts
-                prompts_response = await session.list_prompts()
-                if prompts_response and prompts_response.prompts:
-                    for prompt in prompts_response.prompts:
-                        self.sessions[prompt.name] = session
-                        self.available_prompts.append({
-                            "name": prompt.name,
-                            "description": prompt.description,
-                            "arguments": prompt.arguments
-                        })
-                # List available resources
-                resources_response = await session.list_resources()
-                if resources_response and resources_response.resources:
-                    for resource in resources_response.resources:
-                        resource_uri = str(resource.uri)
-                        self.sessions[resource_uri] = session
-            
-            except Exception as e:
-                print(f"Error {e}")
+            manifest = self.manifest_cache.get(server_name, server_config)
+            if manifest is not None:
+                # Use the cached catalog right away and check it once the server is up;
+                # calls made before then wait for the server to start
+                self.register_manifest(server_name, pool, manifest)
+                pool.on_start = lambda pool: self.validate_manifest(server_name, server_config, pool)
+                self.pools.append(pool)
+                if not self.lazy_start:
+                    self.background_tasks.append(asyncio.create_task(self.start_pool(server_name, pool)))
+                return
+
+            await self.start_pool(server_name, pool)
+            self.pools.append(pool)
+            manifest = await fetch_manifest(pool)
+            self.register_manifest(server_name, pool, manifest)
+            self.manifest_cache.put(server_name, server_config, manifest, pool.server_version)
                 
         except Exception as e:
             print(f"Error connecting to {server_name}: {e}")
 
+    async def start_pool(self, server_name, pool):
+        with tracer.span("mcp.server_spawn", server=server_name):
+            try:
+                await pool.ensure_started()
+            except Exception as e:
+                print(f"Error connecting to {server_name}: {e}")
+                raise
+
+    async def validate_manifest(self, server_name, server_config, session):
+        """Compare a cached catalog with the running server's, replacing it if it changed."""
+        try:
+            with tracer.span("mcp.validate_manifest", server=server_name):
+                manifest = await fetch_manifest(session)
+            version = session.server_version
+            if self.manifest_cache.is_current(server_name, server_config, version, manifest):
+                return
+            self.register_manifest(server_name, session, manifest)
+            self.manifest_cache.put(server_name, server_config, manifest, version)
+        except Exception as e:
+            print(f"Error refreshing catalog of {server_name}: {e}")
+
+    async def add_session(self, server_name, session):
+        """Register the tools, prompts and resources of an initialized session."""
+        try:
+            self.register_manifest(server_name, session, await fetch_manifest(session))
+        except Exception as e:
+            print(f"Error {e}")
+
+    def register_manifest(self, server_name, session, manifest):
+        """Route a server's tools, prompts and resources to session, replacing any earlier catalog."""
+        previous = self.catalogs.get(server_name)
+        if previous is not None:
+            for name in [tool.name for tool in previous.tools] + [prompt.name for prompt in previous.prompts]:
+                self.sessions.pop(name, None)
+            self.resources.remove_owner(server_name)
+        self.catalogs[server_name] = manifest
+
+        for tool in manifest.tools:
+            self.sessions[tool.name] = session
+            self.tool_cache.register_tool(tool.name, server_name, tool.annotations)
+        for prompt in manifest.prompts:
+            self.sessions[prompt.name] = session
+        for resource in manifest.resources:
+            self.resources.add(str(resource.uri), session, server_name)
+        for template in manifest.resource_templates:
+            self.resources.add_template(template.uriTemplate, session, server_name)
+
+        # Rebuild in config order, whatever order the servers came up in, so
+        # requests (and their response cache keys) stay the same across runs
+        order = sorted(self.catalogs, key=lambda name: (
+            self.server_order.index(name) if name in self.server_order else len(self.server_order)
+        ))
+        self.available_tools = [{
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.inputSchema
+        } for name in order for tool in self.catalogs[name].tools]
+        self.available_prompts = [{
+            "name": prompt.name,
+            "description": prompt.description,
+            "arguments": prompt.arguments
+        } for name in order for prompt in self.catalogs[name].prompts]
+
     async def connect_to_servers(self):
         try:
-            with open("server_config.json", "r") as file:
+            config_file = os.getenv("MCP_SERVER_CONFIG", "server_config.json")
+            with open(config_file, "r") as file:
                 data = json.load(file)
             servers = data.get("mcpServers", {})
-            for server_name, server_config in servers.items():
-                await self.connect_to_server(server_name, server_config)
+            self.server_order = list(servers)
+            # Extra tools to treat as read-only, for servers without annotations
+            self.tool_cache.cacheable_tools.update(data.get("cacheableTools", []))
+            self.lazy_start = self.lazy_start or data.get("lazyStart", False)
+            await asyncio.gather(*(
+                self.connect_to_server(server_name, server_config)
+                for server_name, server_config in servers.items()
+            ))
         except Exception as e:
             print(f"Error loading server config: {e}")
             raise
     
     async def process_query(self, query):
-        messages = [{'role':'user', 'content':query}]
-        
-        while True:
-            response = self.anthropic.messages.create(
-                max_tokens = 2024,
-                model = 'claude-3-7-sonnet-20250219', 
-                tools = self.available_tools,
-                messages = messages
-            )
-            
-            assistant_content = []
-            has_tool_use = False
-            
-            for content in response.content:
-                if content.type == 'text':
-                    print(content.text)
-                    assistant_content.append(content)
-                elif content.type == 'tool_use':
-                    has_tool_use = True
-                    assistant_content.append(content)
-                    messages.append({'role':'assistant', 'content':assistant_content})
-                    
-                    # Get session and call tool
-                    session = self.sessions.get(content.name)
-                    if not session:
-                        print(f"Tool '{content.name}' not found.")
-                        break
-                        
-                    result = await session.call_tool(content.name, arguments=content.input)
-                    messages.append({
-                        "role": "user", 
-                        "content": [
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": content.id,
-                                "content": result.content
-                            }
-                        ]
-                    })
-            
-            # Exit loop if no tool was used
-            if not has_tool_use:
-                break
+        await self.run_turn([{'role':'user', 'content':query}])
 
-    async def get_resource(self, resource_uri):
-        session = self.sessions.get(resource_uri)
-        
-        # Fallback for papers URIs - try any papers resource session
-        if not session and resource_uri.startswith("papers://"):
-            for uri, sess in self.sessions.items():
-                if uri.startswith("papers://"):
-                    session = sess
-                    break
-            
+    async def run_turn(self, messages, on_text=print):
+        """
+        Answer the last user message in messages, calling tools as needed.
+        messages is extended in place; on_text is called with each text block.
+        Returns the text of the final answer.
+        """
+        with tracer.span("chat.turn"):
+            while True:
+                response = await self.create_message(
+                    max_tokens = 2024,
+                    model = MODEL,
+                    tools = self.available_tools,
+                    messages = messages
+                )
+                messages.append({'role':'assistant', 'content':response.content})
+
+                texts = [content.text for content in response.content if content.type == 'text']
+                if on_text is not None:
+                    for text in texts:
+                        on_text(text)
+
+                tool_uses = [content for content in response.content if content.type == 'tool_use']
+                # Exit loop if no tool was used
+                if not tool_uses:
+                    answer = "\n".join(texts)
+                    if self.prefetcher is not None:
+                        # Warm the tool cache while the user reads and types
+                        self.prefetcher.schedule(answer)
+                    return answer
+
+                # Run the requested tools concurrently and answer them in one message
+                results = await asyncio.gather(*(self.call_tool(content) for content in tool_uses))
+                messages.append({'role':'user', 'content':list(results)})
+
+    async def call_tool(self, content):
+        """Run one tool_use block and return the matching tool_result block."""
+        session = self.sessions.get(content.name)
         if not session:
+            print(f"Tool '{content.name}' not found.")
+            return {
+                "type": "tool_result",
+                "tool_use_id": content.id,
+                "content": f"Tool '{content.name}' not found.",
+                "is_error": True
+            }
+
+        if self.prefetcher is not None:
+            await self.prefetcher.settle(content.name, content.input)
+        with tracer.span("mcp.call_tool", tool=content.name):
+            result = await self.tool_cache.call_tool(session, content.name, content.input)
+        return {
+            "type": "tool_result",
+            "tool_use_id": content.id,
+            "content": result.content
+        }
+
+    async def get_resource(self, resource_uri):
+        # Concrete URIs first, then templates such as papers://{topic}
+        route = self.resources.route(resource_uri)
+        if route is None:
             print(f"Resource '{resource_uri}' not found.")
             return
+        session, _ = route
         
         try:
-            result = await session.read_resource(uri=resource_uri)
+            with tracer.span("mcp.read_resource", uri=resource_uri):
+                result = await self.resource_cache.read(session, resource_uri)
             if result and result.contents:
                 print(f"\nResource: {resource_uri}")
                 print("Content:")
@@ -197,12 +358,13 @@ class MCP_ChatBot:
         print("Type your queries or 'quit' to exit.")
         print("Use @folders to see available topics")
         print("Use @<topic> to search papers in that topic")
+        print("Use @<uri> to read any resource, e.g. @metrics://summary")
         print("Use /prompts to list available prompts")
         print("Use /prompt <name> <arg1=value1> to execute a prompt")
         
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                query = (await ainput("\nQuery: ")).strip()
                 if not query:
                     continue
         
@@ -215,8 +377,12 @@ class MCP_ChatBot:
                     topic = query[1:]
                     if topic == "folders":
                         resource_uri = "papers://folders"
+                    elif "://" in topic:
+                        # Full resource URI, e.g. @metrics://summary
+                        resource_uri = topic
                     else:
-                        resource_uri = f"papers://{topic}"
+                        # The server resolves names like "Machine Learning" or "ml" to a stored topic
+                        resource_uri = f"papers://{quote(topic, safe='')}"
                     await self.get_resource(resource_uri)
                     continue
                 
@@ -248,10 +414,25 @@ class MCP_ChatBot:
                 
                 await self.process_query(query)
                     
+            except EOFError:
+                break
             except Exception as e:
                 print(f"\nError: {str(e)}")
     
     async def cleanup(self):
+        if self.response_cache is not None:
+            print(f"Response cache: {self.response_cache.stats()}")
+            self.response_cache.close()
+        print(f"Tool cache: {self.tool_cache.stats()}")
+        print(f"Resource cache: {self.resource_cache.stats()}")
+        if self.prefetcher is not None:
+            print(f"Prefetch: {self.prefetcher.stats()}")
+            await self.prefetcher.cancel()
+        for task in self.background_tasks:
+            task.cancel()
+        await asyncio.gather(*self.background_tasks, return_exceptions=True)
+        for pool in self.pools:
+            await pool.close()
         await self.exit_stack.aclose()
 
 
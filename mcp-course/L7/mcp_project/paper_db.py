@@ -0,0 +1,232 @@
+"""
+SQLite paper store: one row per paper, tagged with any number of topics.
+
+An alternative to the papers/<topic>/papers_info.json layout, used by
+research_server when PAPER_DB is set. A paper found under several topics is
+stored once, listing topics reads a small table kept up to date by triggers,
+and lookups by id or topic use indexes instead of reading every file.
+
+Migrate an existing papers directory once with:
+    python paper_db.py migrate papers papers.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    pdf_url TEXT,
+    published TEXT
+);
+CREATE TABLE IF NOT EXISTS paper_topics (
+    topic TEXT NOT NULL,
+    paper_id TEXT NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    PRIMARY KEY (topic, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS paper_topics_by_paper ON paper_topics(paper_id);
+CREATE TABLE IF NOT EXISTS topics (
+    name TEXT PRIMARY KEY,
+    paper_count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS topic_tag_added AFTER INSERT ON paper_topics BEGIN
+    INSERT INTO topics (name, paper_count) VALUES (new.topic, 1)
+    ON CONFLICT (name) DO UPDATE SET paper_count = paper_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS topic_tag_removed AFTER DELETE ON paper_topics BEGIN
+    UPDATE topics SET paper_count = paper_count - 1 WHERE name = old.topic;
+    DELETE FROM topics WHERE name = old.topic AND paper_count <= 0;
+END;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+"""
+
+UPSERT_PAPER = """
+INSERT INTO papers (id, title, authors, summary, pdf_url, published) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title, authors = excluded.authors, summary = excluded.summary,
+    pdf_url = excluded.pdf_url, published = excluded.published
+WHERE (title, authors, summary, pdf_url, published)
+    IS NOT (excluded.title, excluded.authors, excluded.summary, excluded.pdf_url, excluded.published)
+"""
+
+PAPER_COLUMNS = "p.id, p.title, p.authors, p.summary, p.pdf_url, p.published"
+
+
+def paper_row(paper_id: str, info: Dict[str, Any]) -> Tuple:
+    return (
+        paper_id, info.get("title", ""), json.dumps(info.get("authors", [])),
+        info.get("summary", ""), info.get("pdf_url"), info.get("published"),
+    )
+
+
+def paper_info(row: Tuple) -> Dict[str, Any]:
+    """The papers_info.json entry for a papers row (without its id)."""
+    _, title, authors, summary, pdf_url, published = row
+    return {
+        "title": title,
+        "authors": json.loads(authors),
+        "summary": summary,
+        "pdf_url": pdf_url,
+        "published": published,
+    }
+
+
+class PaperDatabase:
+    """
+    Papers and their topic tags in one SQLite file, in WAL mode so lookups
+    are not blocked while a search is being saved.
+
+    Every thread gets its own connection. Writes happen in one transaction
+    each and, if they changed any row, bump a generation counter, which
+    indexes built over the store compare to tell whether they are stale.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        with self.connection() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            self.local.db = db
+        return db
+
+    def close(self) -> None:
+        db = getattr(self.local, "db", None)
+        if db is not None:
+            db.close()
+            self.local.db = None
+
+    def _bump_generation(self, db: sqlite3.Connection, changes_before: int) -> None:
+        # A write that changed nothing (e.g. a search saved again) leaves every index valid
+        if db.total_changes != changes_before:
+            db.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+
+    def generation(self) -> int:
+        """Changes whenever papers or tags are written, by this or any other process."""
+        return self.connection().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def save(self, results: Dict[str, Dict[str, Dict[str, Any]]]) -> int:
+        """Store papers and tag them with their topic; results maps topic -> {paper_id: info}."""
+        rows, tags = [], []
+        for topic, papers_info in results.items():
+            for paper_id, info in papers_info.items():
+                rows.append(paper_row(paper_id, info))
+                tags.append((topic, paper_id))
+        if not rows:
+            return 0
+        with self.connection() as db:
+            changes_before = db.total_changes
+            db.executemany(UPSERT_PAPER, rows)
+            db.executemany("INSERT OR IGNORE INTO paper_topics (topic, paper_id) VALUES (?, ?)", tags)
+            self._bump_generation(db, changes_before)
+        return len(rows)
+
+    def get(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        row = self.connection().execute(
+            f"SELECT {PAPER_COLUMNS} FROM papers p WHERE p.id = ?", (paper_id,)
+        ).fetchone()
+        return paper_info(row) if row else None
+
+    def topics(self) -> List[Tuple[str, int]]:
+        """(topic, number of papers) for every topic, by name."""
+        return self.connection().execute("SELECT name, paper_count FROM topics ORDER BY name").fetchall()
+
+    def topic_papers(self, topic: str) -> Dict[str, Dict[str, Any]]:
+        """The papers tagged with a topic, in the order they were first stored."""
+        rows = self.connection().execute(
+            f"SELECT {PAPER_COLUMNS} FROM paper_topics t JOIN papers p ON p.id = t.paper_id "
+            "WHERE t.topic = ? ORDER BY p.rowid",
+            (topic,),
+        )
+        return {row[0]: paper_info(row) for row in rows}
+
+    def papers(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """(topic, paper_id, info) for every paper, under the first of its topics."""
+        rows = self.connection().execute(
+            f"SELECT MIN(t.topic), {PAPER_COLUMNS} FROM papers p "
+            "JOIN paper_topics t ON t.paper_id = p.id GROUP BY p.id ORDER BY p.rowid"
+        )
+        for row in rows:
+            yield row[0], row[1], paper_info(row[1:])
+
+    def untag(self, removals: Dict[str, List[str]]) -> None:
+        """Remove topic tags (topic -> paper IDs); papers left without a topic are deleted."""
+        tags = [(topic, paper_id) for topic, paper_ids in removals.items() for paper_id in paper_ids]
+        with self.connection() as db:
+            changes_before = db.total_changes
+            db.executemany("DELETE FROM paper_topics WHERE topic = ? AND paper_id = ?", tags)
+            db.executemany(
+                "DELETE FROM papers WHERE id = ? AND NOT EXISTS "
+                "(SELECT 1 FROM paper_topics WHERE paper_id = ?)",
+                [(paper_id, paper_id) for _, paper_id in tags],
+            )
+            self._bump_generation(db, changes_before)
+
+    def merge(self, keep: str, duplicates: Iterable[str]) -> None:
+        """Fold duplicate papers into `keep`: their topics move over and the duplicates are deleted."""
+        duplicates = [(paper_id,) for paper_id in duplicates if paper_id != keep]
+        with self.connection() as db:
+            changes_before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO paper_topics (topic, paper_id) "
+                "SELECT topic, ? FROM paper_topics WHERE paper_id = ?",
+                [(keep, paper_id) for (paper_id,) in duplicates],
+            )
+            db.executemany("DELETE FROM paper_topics WHERE paper_id = ?", duplicates)
+            db.executemany("DELETE FROM papers WHERE id = ?", duplicates)
+            self._bump_generation(db, changes_before)
+
+    def migrate_json(self, paper_dir: str) -> Tuple[int, int]:
+        """Import every papers/<topic>/papers_info.json; returns (files, papers) imported."""
+        files = papers = 0
+        for topic in sorted(os.listdir(paper_dir)):
+            file_path = os.path.join(paper_dir, topic, "papers_info.json")
+            if not os.path.isfile(file_path):
+                continue
+            try:
+                with open(file_path, "r") as f:
+                    papers_info = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Skipping {file_path}: {e}", file=sys.stderr)
+                continue
+            papers += self.save({topic: papers_info})
+            files += 1
+        return files, papers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQLite paper store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="import a papers/<topic>/papers_info.json directory")
+    migrate.add_argument("paper_dir")
+    migrate.add_argument("database")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        store = PaperDatabase(args.database)
+        files, papers = store.migrate_json(args.paper_dir)
+        topics = store.topics()
+        print(f"Imported {papers} papers from {files} topic files into {args.database} "
+              f"({len(topics)} topics, {sum(count for _, count in topics)} tags)")
+
+
+if __name__ == "__main__":
+    main()
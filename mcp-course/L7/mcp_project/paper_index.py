@@ -0,0 +1,198 @@
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was we were with"
+    " which our using via into".split()
+)
+# Title words count this many times, so matches in titles rank higher
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def paper_terms(info: Dict[str, Any]) -> Counter:
+    terms = Counter()
+    for token in tokenize(info.get("title", "")):
+        terms[token] += TITLE_WEIGHT
+    terms.update(tokenize(info.get("summary", "")))
+    terms.update(tokenize(" ".join(info.get("authors", []))))
+    return terms
+
+
+def fingerprint(info: Dict[str, Any]) -> str:
+    text = json.dumps([info.get("title"), info.get("summary"), info.get("authors")], sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class PaperIndex:
+    """
+    In-memory inverted index over stored papers, ranked with BM25 over title,
+    summary and authors.
+
+    The index follows the papers_info.json files under a papers directory: refresh()
+    re-reads only files whose modification time changed, and within a file
+    only papers whose content changed are re-tokenized. Writers that already
+    hold the new contents can call index_file() directly.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.RLock()
+        # term -> {paper_id: term frequency}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        # paper_id -> (terms, document length, fingerprint, topic, info)
+        self.docs: Dict[str, Tuple[Counter, int, str, str, Dict[str, Any]]] = {}
+        self.total_length = 0
+        # file path -> (mtime, paper ids read from it)
+        self.files: Dict[str, Tuple[float, set]] = {}
+        # paper_id -> {file path: topic} for every file holding the paper, since the
+        # same paper may be stored under several topics
+        self.holders: Dict[str, Dict[str, str]] = defaultdict(dict)
+        # Version of the store last passed to sync()
+        self.store_version = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, paper_id: str, info: Dict[str, Any], topic: str) -> None:
+        with self.lock:
+            digest = fingerprint(info)
+            current = self.docs.get(paper_id)
+            if current is not None and current[2] == digest:
+                self.docs[paper_id] = current[:3] + (topic, info)
+                return
+            self.remove(paper_id)
+            terms = paper_terms(info)
+            length = sum(terms.values())
+            for term, count in terms.items():
+                self.postings[term][paper_id] = count
+            self.docs[paper_id] = (terms, length, digest, topic, info)
+            self.total_length += length
+
+    def remove(self, paper_id: str) -> None:
+        with self.lock:
+            doc = self.docs.pop(paper_id, None)
+            if doc is None:
+                return
+            terms, length = doc[0], doc[1]
+            for term in terms:
+                postings = self.postings[term]
+                postings.pop(paper_id, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= length
+
+    def _release(self, file_path: str, paper_id: str) -> None:
+        """Forget that file_path holds paper_id; the paper stays indexed while another file holds it."""
+        holders = self.holders.get(paper_id, {})
+        holders.pop(file_path, None)
+        if not holders:
+            self.holders.pop(paper_id, None)
+            self.remove(paper_id)
+        elif paper_id in self.docs and self.docs[paper_id][3] not in holders.values():
+            # Report the paper under a topic that still has it
+            self.docs[paper_id] = self.docs[paper_id][:3] + (next(iter(holders.values())), self.docs[paper_id][4])
+
+    def index_file(self, file_path: str, papers_info: Dict[str, Dict[str, Any]],
+                   mtime: Optional[float] = None) -> None:
+        """Bring the index in line with the contents of one papers_info.json file."""
+        topic = os.path.basename(os.path.dirname(file_path))
+        with self.lock:
+            _, previous = self.files.get(file_path, (None, set()))
+            for paper_id in previous - set(papers_info):
+                self._release(file_path, paper_id)
+            for paper_id, info in papers_info.items():
+                self.add(paper_id, info, topic)
+                self.holders[paper_id][file_path] = topic
+            if mtime is None:
+                mtime = os.path.getmtime(file_path)
+            self.files[file_path] = (mtime, set(papers_info))
+
+    def refresh(self, paper_dir: str) -> None:
+        """Re-index papers_info.json files under paper_dir that were added, changed or removed."""
+        seen = set()
+        if os.path.isdir(paper_dir):
+            for item in os.listdir(paper_dir):
+                file_path = os.path.join(paper_dir, item, "papers_info.json")
+                try:
+                    mtime = os.path.getmtime(file_path)
+                except OSError:
+                    continue
+                seen.add(file_path)
+                if self.files.get(file_path, (None,))[0] == mtime:
+                    continue
+                try:
+                    with open(file_path, "r") as f:
+                        papers_info = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Error indexing {file_path}: {e}", file=sys.stderr)
+                    continue
+                self.index_file(file_path, papers_info, mtime)
+
+        with self.lock:
+            for file_path in set(self.files) - seen:
+                for paper_id in self.files.pop(file_path)[1]:
+                    self._release(file_path, paper_id)
+
+    def sync(self, version: Any, papers: Callable[[], Iterable[Tuple[str, str, Dict[str, Any]]]]) -> None:
+        """
+        Bring the index in line with a whole store, such as the SQLite one,
+        when its version changed. papers() yields (topic, paper_id, info).
+        """
+        with self.lock:
+            if version == self.store_version:
+                return
+            seen = set()
+            for topic, paper_id, info in papers():
+                self.add(paper_id, info, topic)
+                seen.add(paper_id)
+            for paper_id in set(self.docs) - seen:
+                self.remove(paper_id)
+            self.files.clear()
+            self.holders.clear()
+            self.store_version = version
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """The k best matching papers by BM25 score, best first."""
+        with self.lock:
+            n = len(self.docs)
+            if n == 0:
+                return []
+            average_length = self.total_length / n
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for paper_id, tf in postings.items():
+                    length = self.docs[paper_id][1]
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[paper_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            results = []
+            for paper_id, score in best:
+                _, _, _, topic, info = self.docs[paper_id]
+                results.append({
+                    "paper_id": paper_id,
+                    "score": round(score, 4),
+                    "topic": topic,
+                    "title": info.get("title"),
+                    "authors": info.get("authors", []),
+                    "published": info.get("published"),
+                })
+            return results
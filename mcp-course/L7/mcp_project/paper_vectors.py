@@ -0,0 +1,269 @@
+import json
+import math
+import os
+import re
+import sys
+import threading
+import zlib
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from paper_index import tokenize
+
+# arXiv ids without their version suffix: 2401.12345v2 -> 2401.12345
+VERSION_SUFFIX = re.compile(r"v\d+$")
+
+
+def base_id(paper_id: str) -> str:
+    return VERSION_SUFFIX.sub("", paper_id)
+
+
+def paper_text(info: Dict[str, Any]) -> str:
+    # The title is repeated so it weighs more than any single summary sentence
+    title = info.get("title", "")
+    return f"{title} {title} {info.get('summary', '')}"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class HashedTfidfEmbedder:
+    """
+    Offline embedder: TF-IDF over tokens hashed into `dim` signed buckets.
+
+    Needs no vocabulary or model download. fit() learns document frequencies
+    from the stored corpus and embed() reuses them for queries. Any object
+    with the same dim / fit / embed interface (for example a wrapper around a
+    local sentence-embedding model) can be passed to PaperVectors instead.
+    Rows are L2-normalized, so a dot product is the cosine similarity.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+        # token -> (bucket, sign); crc32 keeps buckets stable across runs
+        self.buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        bucket = self.buckets.get(token)
+        if bucket is None:
+            h = zlib.crc32(token.encode("utf-8"))
+            bucket = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+            self.buckets[token] = bucket
+        return bucket
+
+    def term_frequencies(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            if not counts:
+                continue
+            columns, values = [], []
+            for token, count in counts.items():
+                column, sign = self._bucket(token)
+                columns.append(column)
+                values.append(sign * (1 + math.log(count)))
+            np.add.at(matrix[row], columns, values)
+        return matrix
+
+    def fit(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = self.term_frequencies(texts)
+        df = np.count_nonzero(matrix, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return normalize_rows(matrix * self.idf)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return normalize_rows(self.term_frequencies(texts) * self.idf)
+
+
+class PaperVectors:
+    """
+    Embedding matrix over stored papers, one row per (topic, paper) entry,
+    for batched top-k similarity queries and duplicate detection.
+
+    Queries are answered with blocked matrix products, so memory stays at
+    block_size x papers floats however many queries are asked at once.
+    refresh() rebuilds the matrix when a papers_info.json file was added,
+    changed or removed; the IDF weights depend on the whole corpus, so a
+    rebuild is all or nothing.
+    """
+
+    def __init__(self, embedder=None, block_size: int = 1024):
+        self.embedder = embedder or HashedTfidfEmbedder()
+        self.block_size = block_size
+        self.lock = threading.RLock()
+        self.entries: List[Tuple[str, str]] = []
+        self.infos: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        # (file path, mtime) pairs or store version the matrix was built from
+        self.signature: Any = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def build(self, papers: Iterable[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Index (topic, paper_id, info) triples, replacing what was indexed before."""
+        entries, infos = [], []
+        for topic, paper_id, info in papers:
+            entries.append((topic, paper_id))
+            infos.append(info)
+        matrix = self.embedder.fit([paper_text(info) for info in infos])
+        with self.lock:
+            self.entries, self.infos, self.matrix = entries, infos, matrix
+
+    def refresh(self, paper_dir: str) -> bool:
+        """Rebuild from paper_dir if its papers_info.json files changed; returns whether it did."""
+        files = []
+        if os.path.isdir(paper_dir):
+            for item in sorted(os.listdir(paper_dir)):
+                file_path = os.path.join(paper_dir, item, "papers_info.json")
+                try:
+                    files.append((file_path, os.path.getmtime(file_path)))
+                except OSError:
+                    continue
+        signature = tuple(files)
+
+        with self.lock:
+            if signature == self.signature:
+                return False
+            papers = []
+            for file_path, _ in files:
+                topic = os.path.basename(os.path.dirname(file_path))
+                try:
+                    with open(file_path, "r") as f:
+                        papers_info = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Error reading {file_path}: {e}", file=sys.stderr)
+                    continue
+                papers.extend((topic, paper_id, info) for paper_id, info in papers_info.items())
+            self.build(papers)
+            self.signature = signature
+            return True
+
+    def sync(self, version: Any, papers: Callable[[], Iterable[Tuple[str, str, Dict[str, Any]]]]) -> bool:
+        """Rebuild from a whole store, such as the SQLite one, if its version changed."""
+        with self.lock:
+            if version == self.signature:
+                return False
+            self.build(papers())
+            self.signature = version
+            return True
+
+    def _describe(self, row: int, score: Optional[float] = None) -> Dict[str, Any]:
+        topic, paper_id = self.entries[row]
+        result = {"paper_id": paper_id, "topic": topic, "title": self.infos[row].get("title")}
+        if score is not None:
+            result["score"] = round(float(score), 4)
+        return result
+
+    def top_k(self, vectors: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """The k most similar rows for each query vector, as (row, score), best first."""
+        n = len(self.entries)
+        k = min(k, n)
+        results = []
+        if k == 0:
+            return [[] for _ in range(len(vectors))]
+        for start in range(0, len(vectors), self.block_size):
+            scores = vectors[start:start + self.block_size] @ self.matrix.T
+            if k < n:
+                candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                candidates = np.tile(np.arange(n), (len(scores), 1))
+            candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1)
+            rows = np.take_along_axis(candidates, order, axis=1)
+            row_scores = np.take_along_axis(candidate_scores, order, axis=1)
+            results.extend(
+                list(zip(row.tolist(), score.tolist())) for row, score in zip(rows, row_scores)
+            )
+        return results
+
+    def similar(self, queries: Sequence[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Top-k stored papers for each query. A query naming a stored paper id
+        is answered with that paper's neighbours (the paper itself and its
+        copies in other topics excluded); anything else is embedded as text.
+        """
+        with self.lock:
+            rows_by_id: Dict[str, List[int]] = {}
+            for row, (_, paper_id) in enumerate(self.entries):
+                rows_by_id.setdefault(base_id(paper_id), []).append(row)
+
+            vectors, excluded = [], []
+            texts = [query for query in queries if base_id(query) not in rows_by_id]
+            embedded = iter(self.embedder.embed(texts)) if texts else iter(())
+            for query in queries:
+                rows = rows_by_id.get(base_id(query))
+                if rows:
+                    vectors.append(self.matrix[rows[0]])
+                    excluded.append(set(rows))
+                else:
+                    vectors.append(next(embedded))
+                    excluded.append(set())
+            if not vectors:
+                return []
+
+            extra = max(len(rows) for rows in excluded)
+            results = []
+            for neighbours, skip in zip(self.top_k(np.stack(vectors), k + extra), excluded):
+                kept = [self._describe(row, score) for row, score in neighbours if row not in skip]
+                results.append(kept[:k])
+            return results
+
+    def duplicate_groups(self, threshold: float = 0.9, tables: int = 16, bits: int = 10,
+                         max_bucket: int = 4096) -> List[List[Dict[str, Any]]]:
+        """
+        Groups of entries that are the same paper: the same arXiv id (any
+        version) or summaries with cosine similarity of at least threshold.
+
+        Candidate pairs come from random-hyperplane LSH (`tables` hashes of
+        `bits` bits each) and are then checked exactly, so the cost grows with
+        the number of near neighbours rather than with papers squared.
+        """
+        with self.lock:
+            n = len(self.entries)
+            parent = list(range(n))
+
+            def find(row: int) -> int:
+                while parent[row] != row:
+                    parent[row] = parent[parent[row]]
+                    row = parent[row]
+                return row
+
+            def union(a: int, b: int) -> None:
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+            first_row: Dict[str, int] = {}
+            for row, (_, paper_id) in enumerate(self.entries):
+                union(first_row.setdefault(base_id(paper_id), row), row)
+
+            if n > 1:
+                rng = np.random.default_rng(0)
+                weights = 1 << np.arange(bits, dtype=np.int64)
+                for _ in range(tables):
+                    planes = rng.standard_normal((self.matrix.shape[1], bits)).astype(np.float32)
+                    codes = ((self.matrix @ planes) > 0).astype(np.int64) @ weights
+                    order = np.argsort(codes, kind="stable")
+                    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+                    for bucket in np.split(order, boundaries):
+                        if len(bucket) < 2 or len(bucket) > max_bucket:
+                            continue
+                        block = self.matrix[bucket]
+                        left, right = np.nonzero(np.triu(block @ block.T, k=1) >= threshold)
+                        for a, b in zip(bucket[left].tolist(), bucket[right].tolist()):
+                            union(a, b)
+
+            groups: Dict[int, List[int]] = {}
+            for row in range(n):
+                groups.setdefault(find(row), []).append(row)
+            return [
+                [self._describe(row) for row in rows]
+                for rows in groups.values() if len(rows) > 1
+            ]
@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Numbered headings ("3 Method", "4.2. Ablations") or well-known unnumbered ones
+NUMBERED_HEADING = re.compile(r"^\s*(\d{1,2}(?:\.\d{1,2})*)\.?\s+([A-Z][^\n.]{1,80})\s*$", re.MULTILINE)
+NAMED_HEADING = re.compile(
+    r"^\s*(Abstract|References|Bibliography|Acknowledge?ments?|Appendix(?: [A-Z])?)\s*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+
+def extract_pages(data: bytes) -> List[str]:
+    """Text of every page of a PDF. Runs in a worker process."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def find_sections(pages: List[str]) -> List[Dict[str, Any]]:
+    """
+    Headings found in the text, in order, as {number, title, level, page, start}.
+    start is an offset into "\\n\\n".join(pages); page is 1-based. The
+    detection is a heuristic: numbered headings of at most ten words, plus
+    Abstract, References, Acknowledgements and Appendix.
+    """
+    sections = []
+    offset = 0
+    for page_number, text in enumerate(pages, start=1):
+        for match in NUMBERED_HEADING.finditer(text):
+            number, title = match.group(1), match.group(2).strip()
+            if len(title.split()) > 10:
+                continue
+            sections.append({
+                "number": number, "title": title, "level": number.count(".") + 1,
+                "page": page_number, "start": offset + match.start(),
+            })
+        for match in NAMED_HEADING.finditer(text):
+            sections.append({
+                "number": "", "title": match.group(1).strip(), "level": 1,
+                "page": page_number, "start": offset + match.start(),
+            })
+        offset += len(text) + 2
+    sections.sort(key=lambda section: section["start"])
+    return sections
+
+
+def parse_page_range(pages: str, page_count: int) -> Tuple[int, int]:
+    """1-based inclusive range from "3", "2-4", "5-" or "-2"."""
+    first, _, last = pages.partition("-")
+    start = int(first) if first.strip() else 1
+    if "-" not in pages:
+        end = start
+    else:
+        end = int(last) if last.strip() else page_count
+    if not 1 <= start <= end:
+        raise ValueError(f"Invalid page range: {pages}")
+    return start, min(end, page_count)
+
+
+def excerpt(pages: List[str], page_range: str = "", section: str = "", max_chars: int = 8000) -> str:
+    """The requested pages or section of a paper, at most max_chars long."""
+    text = "\n\n".join(pages)
+    if section:
+        sections = find_sections(pages)
+        wanted = section.strip().lower()
+        matches = [
+            i for i, s in enumerate(sections)
+            if s["number"] == wanted.rstrip(".") or wanted in s["title"].lower()
+        ]
+        if not matches:
+            titles = ", ".join(f"{s['number']} {s['title']}".strip() for s in sections) or "none found"
+            return f"No section matching '{section}'. Sections: {titles}"
+        found = sections[matches[0]]
+        # A section runs until the next heading at the same or a higher level
+        end = next(
+            (s["start"] for s in sections[matches[0] + 1:] if s["level"] <= found["level"]),
+            len(text),
+        )
+        body = text[found["start"]:end]
+    elif page_range:
+        start, end = parse_page_range(page_range, len(pages))
+        body = "\n\n".join(f"[Page {n}]\n{pages[n - 1]}" for n in range(start, end + 1))
+    else:
+        body = text
+
+    if len(body) > max_chars:
+        body = body[:max_chars] + f"\n\n[... truncated, {len(body) - max_chars} more characters]"
+    return body
+
+
+class HttpFetcher:
+    """
+    Downloads PDFs over one pooled httpx client: connections are reused, at
+    most max_connections downloads run at once, and a response larger than
+    max_bytes is abandoned.
+    """
+
+    def __init__(self, max_connections: int = 4, timeout: float = 60.0, max_bytes: int = 50 * 2**20):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.client = None
+
+    def _client(self):
+        if self.client is None:
+            # Imported here so the server starts quickly
+            import httpx
+            self.client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self.client
+
+    async def fetch(self, url: str) -> bytes:
+        async with self.semaphore:
+            async with self._client().stream("GET", url) as response:
+                response.raise_for_status()
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ValueError(f"{url} is larger than {self.max_bytes} bytes")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class LocalFetcher:
+    """
+    Stand-in for HttpFetcher that serves PDFs from a directory: a URL maps to
+    the file named after its last path segment, with ".pdf" added if needed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    async def fetch(self, url: str) -> bytes:
+        name = os.path.basename(urlparse(url).path)
+        if not name.endswith(".pdf"):
+            name += ".pdf"
+        path = os.path.join(self.directory, name)
+        return await asyncio.to_thread(lambda: open(path, "rb").read())
+
+    async def aclose(self) -> None:
+        pass
+
+
+class PdfPipeline:
+    """
+    Turns PDF URLs into page texts: download with the fetcher, extract text
+    in a process pool, and cache the result on disk.
+
+    Extracted text is stored under the SHA-256 of the PDF bytes, so the same
+    PDF reached through different URLs is extracted once; a small URL ->
+    digest map lets a repeated URL skip the download too. Concurrent
+    requests for the same URL share one download.
+    """
+
+    def __init__(self, fetcher, cache_dir: str, process_workers: int = 2,
+                 io_executor: Optional[Executor] = None):
+        self.fetcher = fetcher
+        self.cache_dir = cache_dir
+        self.process_workers = process_workers
+        self.io_executor = io_executor
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.downloads = 0
+        self.extractions = 0
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, key[:2], f"{key}.json")
+
+    def _read(self, kind: str, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(kind, key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, kind: str, key: str, value: Any) -> None:
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    async def _io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, fn, *args)
+
+    async def _extract(self, data: bytes) -> List[str]:
+        if self.process_pool is None:
+            # spawn, not fork: the server process has threads running
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+        self.extractions += 1
+        return await asyncio.get_running_loop().run_in_executor(self.process_pool, extract_pages, data)
+
+    async def _load(self, url: str) -> List[str]:
+        url_key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        known = await self._io(self._read, "urls", url_key)
+        if known is not None:
+            cached = await self._io(self._read, "text", known["digest"])
+            if cached is not None:
+                return cached["pages"]
+
+        data = await self.fetcher.fetch(url)
+        self.downloads += 1
+        digest = hashlib.sha256(data).hexdigest()
+        cached = await self._io(self._read, "text", digest)
+        if cached is None:
+            cached = {"pages": await self._extract(data)}
+            await self._io(self._write, "text", digest, cached)
+        await self._io(self._write, "urls", url_key, {"url": url, "digest": digest})
+        return cached["pages"]
+
+    async def pages(self, url: str) -> List[str]:
+        """Text of every page of the PDF at url."""
+        future = self.inflight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._load(url))
+            self.inflight[url] = future
+            future.add_done_callback(lambda _: self.inflight.pop(url, None))
+        return await asyncio.shield(future)
+
+    async def aclose(self) -> None:
+        await self.fetcher.aclose()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"downloads": self.downloads, "extractions": self.extractions, "inflight": len(self.inflight)}
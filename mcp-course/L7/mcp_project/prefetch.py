@@ -0,0 +1,113 @@
+import asyncio
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import tracing
+
+# arXiv ids as stored by the research server, e.g. 2401.12345v2
+PAPER_ID_PATTERN = re.compile(r"(?<![\w.])(\d{4}\.\d{4,5}(?:v\d+)?)(?![\w.])")
+# Relative or absolute paths of text files, e.g. notes.md or papers/ai/papers_info.json
+FILE_PATH_PATTERN = re.compile(
+    r"(?<![\w/.])((?:\.{1,2}/|/)?(?:[\w-]+/)*[\w.-]+\.(?:txt|md|json|csv|py|yaml|yml|toml|log|html|xml))\b"
+)
+
+# (entity pattern, candidate tools, candidate argument names)
+PREFETCH_RULES = [
+    (PAPER_ID_PATTERN, ["extract_info"], ["paper_id"]),
+    (FILE_PATH_PATTERN, ["read_file", "read_text_file"], ["file_path", "path"]),
+]
+
+tracer = tracing.get_tracer("chatbot")
+
+
+class Prefetcher:
+    """
+    Speculatively warms the tool-result cache between turns.
+
+    After an answer, paper ids and file paths it mentions are looked up with
+    read-only tools (extract_info, read_file) in the background, so a
+    follow-up question about them is answered from the cache. At most
+    max_concurrency calls run at once and at most max_per_answer are
+    scheduled per answer. Only tools the cache treats as read-only are used,
+    prefetches do not count towards the cache's hit rate, and cancel() stops
+    whatever is still outstanding.
+    """
+
+    def __init__(self, chatbot, max_concurrency: int = 4, max_per_answer: int = 8):
+        self.chatbot = chatbot
+        self.max_per_answer = max_per_answer
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # cache key -> task, for calls scheduled but not finished
+        self.inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.completed = 0
+        self.failed = 0
+
+    def _tool_for(self, tools: List[str], arg_names: List[str]) -> Optional[Tuple[str, str]]:
+        """The first available read-only tool and its argument name."""
+        for tool in self.chatbot.available_tools:
+            if tool["name"] not in tools or not self.chatbot.tool_cache.is_cacheable(tool["name"]):
+                continue
+            properties = (tool.get("input_schema") or {}).get("properties", {})
+            for arg_name in arg_names:
+                if arg_name in properties:
+                    return tool["name"], arg_name
+        return None
+
+    def candidates(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Read-only tool calls for the entities mentioned in text."""
+        calls = []
+        for pattern, tools, arg_names in PREFETCH_RULES:
+            target = self._tool_for(tools, arg_names)
+            if target is None:
+                continue
+            tool_name, arg_name = target
+            for entity in dict.fromkeys(pattern.findall(text)):
+                calls.append((tool_name, {arg_name: entity}))
+        return calls[:self.max_per_answer]
+
+    def schedule(self, text: str) -> int:
+        """Start background calls for the entities in text; returns how many were started."""
+        started = 0
+        cache = self.chatbot.tool_cache
+        for tool_name, arguments in self.candidates(text):
+            key = cache.make_key(tool_name, arguments)
+            if key in self.inflight or key in cache.entries:
+                continue
+            task = asyncio.create_task(self._prefetch(key, tool_name, arguments))
+            self.inflight[key] = task
+            started += 1
+        return started
+
+    async def _prefetch(self, key, tool_name: str, arguments: Dict[str, Any]) -> None:
+        try:
+            async with self.semaphore:
+                session = self.chatbot.sessions.get(tool_name)
+                if session is None:
+                    return
+                with tracer.span("mcp.prefetch", tool=tool_name):
+                    await self.chatbot.tool_cache.prefetch(session, tool_name, arguments)
+                self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"Prefetch of {tool_name}({json.dumps(arguments)}) failed: {e}", file=sys.stderr)
+        finally:
+            self.inflight.pop(key, None)
+
+    async def settle(self, tool_name: str, arguments: Dict[str, Any]) -> None:
+        """Wait for a prefetch of this call that is already running, so it is not made twice."""
+        task = self.inflight.get(self.chatbot.tool_cache.make_key(tool_name, arguments))
+        if task is not None:
+            await asyncio.gather(asyncio.shield(task), return_exceptions=True)
+
+    async def cancel(self) -> None:
+        tasks = list(self.inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"completed": self.completed, "failed": self.failed, "inflight": len(self.inflight)}
@@ -1,28 +1,84 @@
-import arxiv
+import asyncio
 import json
 import os
-from typing import List
-from mcp.server.fastmcp import FastMCP
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import unquote
+from mcp.types import ToolAnnotations
+from file_watcher import ResourceSubscriptions, watcher_from_env
+from instrumentation import InstrumentedFastMCP, profiled
+from paper_db import PaperDatabase
+from paper_index import PaperIndex
+from pdf_pipeline import HttpFetcher, LocalFetcher, PdfPipeline, excerpt, find_sections
+from rate_limit import TokenBucket
+from serve import serve
+from topic_index import TopicIndex
+from topic_summary import BatchBackend, SamplingBackend, SummaryCache, TopicSummarizer
+from tracing import get_tracer
 
 PAPER_DIR = "papers"
+# Set PAPER_DB to keep papers in one SQLite file instead of papers/<topic>/papers_info.json
+PAPER_DB = os.getenv("PAPER_DB")
+paper_db = PaperDatabase(PAPER_DB) if PAPER_DB else None
 
-# Initialize FastMCP server
-mcp = FastMCP("research")
+# arXiv asks clients for at most one request every three seconds
+arxiv_rate_limit = TokenBucket(
+    rate=float(os.getenv("ARXIV_RATE", str(1 / 3))),
+    capacity=float(os.getenv("ARXIV_BURST", "1")),
+)
+# Threads running arXiv queries, which may wait on the rate limit
+arxiv_pool = ThreadPoolExecutor(max_workers=int(os.getenv("ARXIV_WORKERS", "4")), thread_name_prefix="arxiv")
+# Threads for file I/O, kept apart so lookups are not stuck behind arXiv queries
+io_pool = ThreadPoolExecutor(max_workers=int(os.getenv("MCP_IO_WORKERS", "8")), thread_name_prefix="io")
+# Serializes read-modify-write updates of papers_info.json files
+store_lock = threading.Lock()
+# BM25 index over stored papers, kept up to date by save_papers and refreshed before searches
+paper_index = PaperIndex()
+# Resolves topic names as typed (@Machine Learning, @ml) to stored topics; TOPIC_ALIASES maps extra aliases
+topic_index = TopicIndex(os.getenv("TOPIC_ALIASES", "topic_aliases.json"))
+# Watches the paper store for changes made outside this server; started by start_watching()
+file_watcher = None
+# Markdown of papers:// resources, only kept while file_watcher drops stale entries
+resource_cache: Dict[str, str] = {}
+# Bumped on every invalidation, so a read that raced with one is not cached
+cache_generation = 0
+resource_cache_lock = threading.Lock()
+# Token budgets of summarize_topic: papers per chunk summary, and summaries per merge
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+SUMMARY_REDUCE_TOKENS = int(os.getenv("SUMMARY_REDUCE_TOKENS", "8000"))
+# Downloads and extracts paper PDFs for read_paper; created on first use
+pdf_pipeline = None
+# Embedding matrix over stored papers, built on first use of a similarity tool
+paper_vectors = None
+vectors_lock = threading.Lock()
 
-@mcp.tool()
-def search_papers(topic: str, max_results: int = 5) -> List[str]:
-    """
-    Search for papers on arXiv based on a topic and store their information.
-    
-    Args:
-        topic: The topic to search for
-        max_results: Maximum number of results to retrieve (default: 5)
-        
-    Returns:
-        List of paper IDs found in the search
-    """
-    
-    # Use arxiv to find the papers 
+async def run_blocking(pool: ThreadPoolExecutor, fn, *args):
+    """Run blocking work on a pool so the event loop keeps serving other requests (and profiling sees it)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, profiled(fn, *args))
+
+# Spans are exported to $TRACE_FILE (JSONL) when it is set
+tracer = get_tracer("research")
+
+# Initialize FastMCP server; handler metrics are served at metrics://summary
+mcp = InstrumentedFastMCP("research", tracer=tracer)
+# Clients subscribed to papers:// resources are notified when their papers change
+subscriptions = ResourceSubscriptions()
+# Only while something reports every change: the watcher for outside edits, the writers below for the server's own
+subscriptions.install(mcp._mcp_server, lambda: file_watcher is not None and not mcp.settings.stateless_http)
+
+def topic_key(topic: str) -> str:
+    return topic.lower().replace(" ", "_")
+
+def topic_dir(topic: str) -> str:
+    return os.path.join(PAPER_DIR, topic_key(topic))
+
+def fetch_papers(topic: str, max_results: int) -> Dict[str, dict]:
+    """Query arXiv for a topic; returns paper information keyed by paper ID."""
+    # Imported here so the server starts quickly
+    import arxiv
     client = arxiv.Client()
 
     # Search for the most relevant articles matching the queried topic
@@ -32,54 +88,118 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
         sort_by = arxiv.SortCriterion.Relevance
     )
 
-    papers = client.results(search)
-    
-    # Create directory for this topic
-    path = os.path.join(PAPER_DIR, topic.lower().replace(" ", "_"))
+    # Wait for our share of arXiv's request budget, shared by all searches
+    arxiv_rate_limit.acquire()
+    papers_info = {}
+    for paper in client.results(search):
+        papers_info[paper.get_short_id()] = {
+            'title': paper.title,
+            'authors': [author.name for author in paper.authors],
+            'summary': paper.summary,
+            'pdf_url': paper.pdf_url,
+            'published': str(paper.published.date())
+        }
+    return papers_info
+
+def _write_papers_file(file_path: str, papers_info: Dict[str, dict]) -> None:
+    # Write to a temporary file first so readers never see a partial file
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as json_file:
+        json.dump(papers_info, json_file, indent=2)
+    os.replace(tmp_path, file_path)
+    paper_index.index_file(file_path, papers_info)
+
+def _merge_papers_file(path: str, papers_info: Dict[str, dict]) -> None:
     os.makedirs(path, exist_ok=True)
-    
     file_path = os.path.join(path, "papers_info.json")
 
     # Try to load existing papers info
     try:
         with open(file_path, "r") as json_file:
-            papers_info = json.load(json_file)
+            stored = json.load(json_file)
     except (FileNotFoundError, json.JSONDecodeError):
-        papers_info = {}
+        stored = {}
+    stored.update(papers_info)
+    _write_papers_file(file_path, stored)
+    print(f"Results are saved in: {file_path}", file=sys.stderr)
 
-    # Process each paper and add to papers_info  
-    paper_ids = []
-    for paper in papers:
-        paper_ids.append(paper.get_short_id())
-        paper_info = {
-            'title': paper.title,
-            'authors': [author.name for author in paper.authors],
-            'summary': paper.summary,
-            'pdf_url': paper.pdf_url,
-            'published': str(paper.published.date())
-        }
-        papers_info[paper.get_short_id()] = paper_info
-    
-    # Save updated papers_info to json file
-    with open(file_path, "w") as json_file:
-        json.dump(papers_info, json_file, indent=2)
-    
-    print(f"Results are saved in: {file_path}")
+def save_papers(results: Dict[str, Dict[str, dict]]) -> None:
+    """Merge fetched papers into each topic's papers_info.json, writing every file once."""
+    if paper_db is not None:
+        by_topic: Dict[str, Dict[str, dict]] = {}
+        for topic, papers_info in results.items():
+            by_topic.setdefault(topic_key(topic), {}).update(papers_info)
+        with store_lock:
+            paper_db.save(by_topic)
+        for topic in by_topic:
+            topic_index.add(topic)
+        notify_topics(set(by_topic))
+        return
+
+    by_dir: Dict[str, Dict[str, dict]] = {}
+    for topic, papers_info in results.items():
+        by_dir.setdefault(topic_dir(topic), {}).update(papers_info)
+
+    with store_lock:
+        for path, papers_info in by_dir.items():
+            _merge_papers_file(path, papers_info)
+            topic_index.add(os.path.basename(path))
+    invalidate_topics({os.path.basename(path) for path in by_dir})
+    notify_topics({os.path.basename(path) for path in by_dir})
+
+@mcp.tool()
+async def search_papers(topic: str, max_results: int = 5) -> List[str]:
+    """
+    Search for papers on arXiv based on a topic and store their information.
     
-    return paper_ids
+    Args:
+        topic: The topic to search for
+        max_results: Maximum number of results to retrieve (default: 5)
+        
+    Returns:
+        List of paper IDs found in the search
+    """
+    papers_info = await run_blocking(arxiv_pool, fetch_papers, topic, max_results)
+    await run_blocking(io_pool, save_papers, {topic: papers_info})
+    return list(papers_info)
 
 @mcp.tool()
-def extract_info(paper_id: str) -> str:
+async def search_papers_many(topics: List[str], max_results: int = 5) -> Dict[str, Any]:
     """
-    Search for information about a specific paper across all topic directories.
+    Search arXiv for several topics at once and store the papers found.
+    Prefer this over repeated search_papers calls when there are several topics.
     
     Args:
-        paper_id: The ID of the paper to look for
+        topics: The topics to search for
+        max_results: Maximum number of results to retrieve per topic (default: 5)
         
     Returns:
-        JSON string with paper information if found, error message if not found
+        {"results": {topic: [paper IDs]}, "errors": {topic: message}}
     """
- 
+    topics = list(dict.fromkeys(topics))
+    outcomes = await asyncio.gather(
+        *(run_blocking(arxiv_pool, fetch_papers, topic, max_results) for topic in topics),
+        return_exceptions=True,
+    )
+
+    fetched, errors = {}, {}
+    for topic, outcome in zip(topics, outcomes):
+        if isinstance(outcome, Exception):
+            errors[topic] = f"{type(outcome).__name__}: {outcome}"
+        else:
+            fetched[topic] = outcome
+
+    # One storage update for all topics
+    await run_blocking(io_pool, save_papers, fetched)
+    return {
+        "results": {topic: list(papers_info) for topic, papers_info in fetched.items()},
+        "errors": errors,
+    }
+
+def get_paper_info(paper_id: str) -> Optional[dict]:
+    if paper_db is not None:
+        return paper_db.get(paper_id)
+
     for item in os.listdir(PAPER_DIR):
         item_path = os.path.join(PAPER_DIR, item)
         if os.path.isdir(item_path):
@@ -89,25 +209,250 @@ def extract_info(paper_id: str) -> str:
                     with open(file_path, "r") as json_file:
                         papers_info = json.load(json_file)
                         if paper_id in papers_info:
-                            return json.dumps(papers_info[paper_id], indent=2)
+                            return papers_info[paper_id]
                 except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading {file_path}: {str(e)}")
+                    print(f"Error reading {file_path}: {str(e)}", file=sys.stderr)
                     continue
     
+    return None
+
+def find_paper(paper_id: str) -> str:
+    paper_info = get_paper_info(paper_id)
+    if paper_info is not None:
+        return json.dumps(paper_info, indent=2)
     return f"There's no saved information related to paper {paper_id}."
 
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
+async def extract_info(paper_id: str) -> str:
+    """
+    Search for information about a specific paper across all topic directories.
+    
+    Args:
+        paper_id: The ID of the paper to look for
+        
+    Returns:
+        JSON string with paper information if found, error message if not found
+    """
+    return await run_blocking(io_pool, find_paper, paper_id)
 
+def get_pdf_pipeline() -> PdfPipeline:
+    global pdf_pipeline
+    if pdf_pipeline is None:
+        # PDF_SOURCE_DIR serves PDFs from a local directory instead of downloading them
+        source_dir = os.getenv("PDF_SOURCE_DIR")
+        fetcher = LocalFetcher(source_dir) if source_dir else HttpFetcher(int(os.getenv("PDF_DOWNLOADS", "4")))
+        pdf_pipeline = PdfPipeline(
+            fetcher,
+            os.getenv("PDF_CACHE_DIR", "pdf_cache"),
+            process_workers=int(os.getenv("PDF_WORKERS", "2")),
+            io_executor=io_pool,
+        )
+    return pdf_pipeline
 
-@mcp.resource("papers://folders")
-def get_available_folders() -> str:
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
+async def read_paper(paper_id: str, pages: str = "", section: str = "", max_chars: int = 8000) -> str:
     """
-    List all available topic folders in the papers directory.
+    Read the full text of a stored paper from its PDF. Use this instead of
+    fetching the PDF URL when a question needs more than the summary.
+    Without pages or section, returns the section outline and the start of the paper.
     
-    This resource provides a simple list of all available topic folders.
+    Args:
+        paper_id: The ID of a paper saved by search_papers
+        pages: Page range to read, e.g. "3", "2-4" or "5-" (optional)
+        section: Section number or title to read, e.g. "3" or "Experiments" (optional)
+        max_chars: Maximum number of characters to return (default: 8000)
+        
+    Returns:
+        The requested text, prefixed with the page count and section outline
     """
-    folders = []
+    paper_info = await run_blocking(io_pool, get_paper_info, paper_id)
+    if paper_info is None or not paper_info.get("pdf_url"):
+        return f"There's no saved PDF URL for paper {paper_id}. Search for it with search_papers first."
+
+    try:
+        paper_pages = await get_pdf_pipeline().pages(paper_info["pdf_url"])
+        body = excerpt(paper_pages, pages, section, max_chars)
+    except Exception as e:
+        return f"Error reading paper {paper_id}: {type(e).__name__}: {e}"
+
+    outline = "\n".join(
+        f"- {' '.join(filter(None, [s['number'], s['title']]))} (page {s['page']})"
+        for s in find_sections(paper_pages)
+    )
+    header = f"# {paper_info['title']}\n\nPages: {len(paper_pages)}\n"
+    if outline:
+        header += f"\nSections:\n{outline}\n"
+    return f"{header}\n---\n\n{body}"
+
+def search_index(query: str, k: int) -> List[Dict[str, Any]]:
+    # Picks up papers written by other processes since the last search
+    if paper_db is not None:
+        paper_index.sync(paper_db.generation(), paper_db.papers)
+    else:
+        paper_index.refresh(PAPER_DIR)
+    return paper_index.search(query, k)
+
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
+async def search_local_papers(query: str, k: int = 5) -> str:
+    """
+    Full-text search over the papers already stored locally (no arXiv request).
+    Ranks papers by BM25 relevance of their title, summary and authors.
     
-    # Get all topic directories
+    Args:
+        query: Words to search for
+        k: Maximum number of papers to return (default: 5)
+        
+    Returns:
+        JSON list of matching papers (paper_id, score, topic, title, authors, published), best first
+    """
+    results = await run_blocking(io_pool, search_index, query, k)
+    return json.dumps(results, indent=2)
+
+def get_paper_vectors():
+    global paper_vectors
+    with vectors_lock:
+        if paper_vectors is None:
+            # Imported here so NumPy is only loaded once a similarity tool is used
+            from paper_vectors import HashedTfidfEmbedder, PaperVectors
+            paper_vectors = PaperVectors(HashedTfidfEmbedder(int(os.getenv("PAPER_VECTOR_DIM", "512"))))
+    if paper_db is not None:
+        paper_vectors.sync(paper_db.generation(), paper_db.papers)
+    else:
+        paper_vectors.refresh(PAPER_DIR)
+    return paper_vectors
+
+def similar_papers(queries: List[str], k: int) -> Dict[str, List[Dict[str, Any]]]:
+    return dict(zip(queries, get_paper_vectors().similar(queries, k)))
+
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
+async def find_similar_papers(queries: List[str], k: int = 5) -> str:
+    """
+    Find stored papers similar to each query, in one batch.
+    A query that is a stored paper ID returns that paper's nearest neighbours;
+    any other query is matched as free text against titles and summaries.
+    
+    Args:
+        queries: Paper IDs or descriptions to find similar papers for
+        k: Number of papers to return per query (default: 5)
+        
+    Returns:
+        JSON object mapping each query to its papers (paper_id, topic, title, score), most similar first
+    """
+    results = await run_blocking(io_pool, similar_papers, list(dict.fromkeys(queries)), k)
+    return json.dumps(results, indent=2)
+
+def remove_papers(removals: Dict[str, List[str]]) -> None:
+    """Delete papers from topic files; removals maps topic directory name -> paper IDs."""
+    with store_lock:
+        for topic, paper_ids in removals.items():
+            file_path = os.path.join(PAPER_DIR, topic, "papers_info.json")
+            try:
+                with open(file_path, "r") as json_file:
+                    stored = json.load(json_file)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                print(f"Error reading {file_path}: {str(e)}", file=sys.stderr)
+                continue
+            for paper_id in paper_ids:
+                stored.pop(paper_id, None)
+            _write_papers_file(file_path, stored)
+    invalidate_topics(set(removals))
+    notify_topics(set(removals))
+
+def find_duplicates(threshold: float, apply: bool) -> Dict[str, Any]:
+    vectors = get_paper_vectors()
+    groups = vectors.duplicate_groups(threshold)
+    if paper_db is not None:
+        topic_sizes = dict(paper_db.topics())
+    else:
+        topic_sizes = {}
+        for topic, _ in vectors.entries:
+            topic_sizes[topic] = topic_sizes.get(topic, 0) + 1
+
+    removals: Dict[str, List[str]] = {}
+    merges = []
+    for group in groups:
+        # Keep the copy in the largest topic, and the latest version of the paper
+        keep = max(group, key=lambda paper: (topic_sizes[paper["topic"]], paper["paper_id"]))
+        merges.append((keep["paper_id"], [paper["paper_id"] for paper in group if paper is not keep]))
+        for paper in group:
+            paper["kept"] = paper is keep
+            if paper is not keep:
+                removals.setdefault(paper["topic"], []).append(paper["paper_id"])
+
+    if apply and removals:
+        if paper_db is not None:
+            # The database stores each paper once, so duplicates are merged: the kept paper takes their topics
+            with store_lock:
+                for keep_id, duplicate_ids in merges:
+                    paper_db.merge(keep_id, duplicate_ids)
+            notify_topics({paper["topic"] for group in groups for paper in group})
+        else:
+            remove_papers(removals)
+    return {
+        "groups": groups,
+        "duplicates": sum(len(paper_ids) for paper_ids in removals.values()),
+        "removed": apply,
+    }
+
+@mcp.tool()
+async def dedupe_papers(threshold: float = 0.9, apply: bool = False) -> str:
+    """
+    Find papers stored more than once: the same arXiv paper (any version) or
+    near-identical summaries, within or across topic folders.
+    By default only reports them; with apply=True every copy but one is deleted.
+    
+    Args:
+        threshold: Cosine similarity of summaries above which two papers count as duplicates (default: 0.9)
+        apply: Delete the duplicates, keeping the copy in the largest topic (default: False)
+        
+    Returns:
+        JSON with the duplicate groups (the copy kept is marked "kept") and the number of duplicates
+    """
+    result = await run_blocking(io_pool, find_duplicates, threshold, apply)
+    return json.dumps(result, indent=2)
+
+def summary_backend():
+    # SUMMARY_BACKEND=batches uses the Message Batches API (needs ANTHROPIC_API_KEY here);
+    # by default chunks are summarized by the client's LLM through MCP sampling
+    max_tokens = int(os.getenv("SUMMARY_MAX_TOKENS", "1024"))
+    if os.getenv("SUMMARY_BACKEND") == "batches":
+        return BatchBackend(os.getenv("SUMMARY_MODEL", "claude-3-7-sonnet-20250219"), max_tokens)
+    return SamplingBackend(mcp.get_context().session, max_tokens)
+
+@mcp.tool()
+async def summarize_topic(topic: str, focus: str = "") -> str:
+    """
+    Synthesize all stored papers on a topic, however many there are.
+    Papers are summarized in chunks, the chunk summaries are merged, and a
+    final synthesis is written. Summaries are cached, so calling this again
+    after new papers were saved only summarizes the new ones.
+    
+    Args:
+        topic: The topic whose stored papers to summarize
+        focus: Optional aspect to focus on, e.g. "evaluation methods"
+        
+    Returns:
+        JSON with the synthesis and how many papers, chunks and LLM calls it took
+    """
+    stored_topic = await run_blocking(io_pool, resolve_topic, topic)
+    papers = await run_blocking(io_pool, load_topic_papers, stored_topic) if stored_topic else {}
+    if not papers:
+        return f"No papers stored for topic: {topic}. {did_you_mean(topic)}Search for papers on this topic first."
+
+    summarizer = TopicSummarizer(
+        summary_backend(),
+        SummaryCache(os.getenv("SUMMARY_CACHE_DIR", "summary_cache")),
+        chunk_tokens=SUMMARY_CHUNK_TOKENS,
+        reduce_tokens=SUMMARY_REDUCE_TOKENS,
+    )
+    result = await summarizer.summarize(stored_topic, papers, focus)
+    return json.dumps(result, indent=2)
+
+def stored_topics() -> List[str]:
+    """Names of all topics with stored papers."""
+    if paper_db is not None:
+        return [topic for topic, _ in paper_db.topics()]
+    folders = []
     if os.path.exists(PAPER_DIR):
         for topic_dir in os.listdir(PAPER_DIR):
             topic_path = os.path.join(PAPER_DIR, topic_dir)
@@ -115,6 +460,120 @@ def get_available_folders() -> str:
                 papers_file = os.path.join(topic_path, "papers_info.json")
                 if os.path.exists(papers_file):
                     folders.append(topic_dir)
+    return folders
+
+def resolve_topic(topic: str) -> Optional[str]:
+    """The stored topic a typed name or alias refers to, or None."""
+    if paper_db is not None:
+        version = paper_db.generation()
+    else:
+        # Creating or removing a topic directory changes the mtime of PAPER_DIR
+        try:
+            version = (PAPER_DIR, os.stat(PAPER_DIR).st_mtime_ns)
+        except FileNotFoundError:
+            version = (PAPER_DIR, 0)
+    topic_index.sync(version, stored_topics)
+    return topic_index.resolve(topic)
+
+def cached_markdown(key: str, build) -> str:
+    """build() for a papers:// resource, cached while the file watcher keeps the cache fresh."""
+    if file_watcher is None or paper_db is not None:
+        return build()
+    with resource_cache_lock:
+        content = resource_cache.get(key)
+        generation = cache_generation
+    if content is None:
+        content = build()
+        with resource_cache_lock:
+            if generation == cache_generation:
+                resource_cache[key] = content
+    return content
+
+def invalidate_topics(topics: Optional[Set[str]]) -> None:
+    """Drop cached markdown of the given stored topics, or of every topic if None."""
+    global cache_generation
+    with resource_cache_lock:
+        cache_generation += 1
+        if topics is None:
+            resource_cache.clear()
+        else:
+            for topic in topics:
+                resource_cache.pop(f"topic:{topic}", None)
+            resource_cache.pop("folders", None)
+
+def changed_topics(paths: Set[str]) -> Optional[Set[str]]:
+    """Stored topics the changed paths belong to; None if any topic may have changed."""
+    if paper_db is not None:
+        database = os.path.abspath(PAPER_DB)
+        return None if paths & {database, f"{database}-wal"} else set()
+    root = os.path.abspath(PAPER_DIR)
+    topics = set()
+    for path in paths:
+        relative = os.path.relpath(path, root)
+        if relative == os.curdir:
+            return None
+        if not relative.startswith(os.pardir):
+            topics.add(relative.split(os.sep)[0])
+    return topics
+
+def on_files_changed(paths: Set[str]) -> None:
+    """File watcher callback: refresh indexes, drop cached resources and notify subscribed clients."""
+    topics = changed_topics(paths)
+    if topics is not None and not topics:
+        return
+    invalidate_topics(topics)
+    topic_index.invalidate()
+    if paper_db is None:
+        # Re-index now rather than on the next search
+        paper_index.refresh(PAPER_DIR)
+    notify_topics(topics)
+
+def notify_topics(topics: Optional[Set[str]]) -> None:
+    """Tell subscribed clients that papers:// resources showing the given stored topics (all if None) changed."""
+    updated = []
+    for uri in subscriptions.uris():
+        if not uri.startswith("papers://"):
+            continue
+        name = unquote(uri[len("papers://"):])
+        if topics is None or name == "folders" or name.startswith("search/"):
+            updated.append(uri)
+        elif resolve_topic(name) in topics or topic_key(name) in topics:
+            updated.append(uri)
+    subscriptions.notify(updated)
+
+def start_watching() -> None:
+    """Watch the paper store for changes made outside this server (FILE_WATCHER=off disables it)."""
+    global file_watcher
+    watcher = watcher_from_env()
+    if watcher is None:
+        return
+    if paper_db is not None:
+        watcher.watch(os.path.dirname(os.path.abspath(PAPER_DB)))
+    else:
+        os.makedirs(PAPER_DIR, exist_ok=True)
+        watcher.watch(PAPER_DIR, recursive=True)
+    watcher.subscribe(on_files_changed)
+    watcher.start()
+    invalidate_topics(None)
+    file_watcher = watcher
+    print(f"Watching paper files with {watcher.backend.name}", file=sys.stderr)
+
+def stop_watching() -> None:
+    global file_watcher
+    if file_watcher is not None:
+        file_watcher.stop()
+        file_watcher = None
+        invalidate_topics(None)
+
+def did_you_mean(topic: str) -> str:
+    suggestions = topic_index.suggest(topic)
+    if not suggestions:
+        return ""
+    return f"Did you mean: {', '.join('@' + suggestion for suggestion in suggestions)}? "
+
+def folders_markdown() -> str:
+    # Get all topic directories
+    folders = stored_topics()
     
     # Create a simple markdown list
     content = "# Available Topics\n\n"
@@ -127,40 +586,89 @@ def get_available_folders() -> str:
     
     return content
 
+def papers_markdown(topic: str, papers_data: Dict[str, dict]) -> str:
+    # Create markdown content with paper details
+    content = f"# Papers on {topic.replace('_', ' ').title()}\n\n"
+    content += f"Total papers: {len(papers_data)}\n\n"
+    
+    for paper_id, paper_info in papers_data.items():
+        content += f"## {paper_info['title']}\n"
+        content += f"- **Paper ID**: {paper_id}\n"
+        content += f"- **Authors**: {', '.join(paper_info['authors'])}\n"
+        content += f"- **Published**: {paper_info['published']}\n"
+        content += f"- **PDF URL**: [{paper_info['pdf_url']}]({paper_info['pdf_url']})\n\n"
+        content += f"### Summary\n{paper_info['summary'][:500]}...\n\n"
+        content += "---\n\n"
+    
+    return content
+
+def load_topic_papers(topic: str) -> Dict[str, dict]:
+    """A topic's papers in the order they were stored; empty if there are none."""
+    if paper_db is not None:
+        return paper_db.topic_papers(topic_key(topic))
+
+    papers_file = os.path.join(topic_dir(topic), "papers_info.json")
+    if not os.path.exists(papers_file):
+        return {}
+    with open(papers_file, 'r') as f:
+        return json.load(f)
+
+def topic_papers_markdown(topic: str) -> str:
+    stored_topic = resolve_topic(topic)
+    if stored_topic:
+        return cached_markdown(f"topic:{stored_topic}", lambda: stored_topic_markdown(stored_topic))
+    return f"# No papers found for topic: {topic}\n\n{did_you_mean(topic)}Try searching for papers on this topic first."
+
+def stored_topic_markdown(topic: str) -> str:
+    try:
+        papers_data = load_topic_papers(topic)
+    except json.JSONDecodeError:
+        return f"# Error reading papers data for {topic}\n\nThe papers data file is corrupted."
+    
+    if not papers_data:
+        return f"# No papers found for topic: {topic}\n\nTry searching for papers on this topic first."
+    return papers_markdown(topic, papers_data)
+
+@mcp.resource("papers://folders")
+async def get_available_folders() -> str:
+    """
+    List all available topic folders in the papers directory.
+    
+    This resource provides a simple list of all available topic folders.
+    """
+    return await run_blocking(io_pool, cached_markdown, "folders", folders_markdown)
+
+@mcp.resource("papers://search/{query}")
+async def search_papers_resource(query: str) -> str:
+    """
+    Stored papers best matching a full-text query, as markdown.
+    
+    Args:
+        query: Words to search for (URL-encoded)
+    """
+    query = unquote(query)
+    results = await run_blocking(io_pool, search_index, query, 10)
+    if not results:
+        return f"# No stored papers match: {query}\n"
+    content = f"# Stored papers matching: {query}\n\n"
+    for result in results:
+        content += f"## {result['title']}\n"
+        content += f"- **Paper ID**: {result['paper_id']}\n"
+        content += f"- **Topic**: {result['topic']}\n"
+        content += f"- **Authors**: {', '.join(result['authors'])}\n"
+        content += f"- **Published**: {result['published']}\n"
+        content += f"- **Score**: {result['score']}\n\n"
+    return content
+
 @mcp.resource("papers://{topic}")
-def get_topic_papers(topic: str) -> str:
+async def get_topic_papers(topic: str) -> str:
     """
     Get detailed information about papers on a specific topic.
     
     Args:
         topic: The research topic to retrieve papers for
     """
-    topic_dir = topic.lower().replace(" ", "_")
-    papers_file = os.path.join(PAPER_DIR, topic_dir, "papers_info.json")
-    
-    if not os.path.exists(papers_file):
-        return f"# No papers found for topic: {topic}\n\nTry searching for papers on this topic first."
-    
-    try:
-        with open(papers_file, 'r') as f:
-            papers_data = json.load(f)
-        
-        # Create markdown content with paper details
-        content = f"# Papers on {topic.replace('_', ' ').title()}\n\n"
-        content += f"Total papers: {len(papers_data)}\n\n"
-        
-        for paper_id, paper_info in papers_data.items():
-            content += f"## {paper_info['title']}\n"
-            content += f"- **Paper ID**: {paper_id}\n"
-            content += f"- **Authors**: {', '.join(paper_info['authors'])}\n"
-            content += f"- **Published**: {paper_info['published']}\n"
-            content += f"- **PDF URL**: [{paper_info['pdf_url']}]({paper_info['pdf_url']})\n\n"
-            content += f"### Summary\n{paper_info['summary'][:500]}...\n\n"
-            content += "---\n\n"
-        
-        return content
-    except json.JSONDecodeError:
-        return f"# Error reading papers data for {topic}\n\nThe papers data file is corrupted."
+    return await run_blocking(io_pool, topic_papers_markdown, unquote(topic))
 
 @mcp.prompt()
 def generate_search_prompt(topic: str, num_papers: int = 5) -> str:
@@ -188,6 +696,33 @@ Follow these instructions:
 
 Please present both detailed information about each paper and a high-level synthesis of the research landscape in {topic}."""
 
+@mcp.prompt()
+def generate_summary_prompt(topic: str, focus: str = "") -> str:
+    """Generate a prompt for Claude to synthesize all stored papers on a topic, chunk by chunk."""
+    focus_line = f" with a focus on {focus}" if focus else ""
+    return f"""Give an overview of the research on '{topic}'{focus_line}, based on the papers stored for it.
+
+Follow these instructions:
+1. Call summarize_topic(topic='{topic}', focus='{focus}'). It summarizes the stored papers in
+   chunks and merges the summaries, so do not read the papers one by one.
+2. If no papers are stored yet, first call search_papers(topic='{topic}'), then summarize_topic.
+3. Present the synthesis with clear headings:
+   - Main themes and research directions
+   - Methods and how they compare
+   - Key findings, citing paper IDs
+   - Open problems and gaps
+4. For a detail the synthesis does not cover, use extract_info or read_paper on the cited paper IDs.
+
+Mention how many papers the synthesis is based on."""
+
+def http_app():
+    """ASGI app factory used when serving several stateless HTTP workers."""
+    mcp.settings.stateless_http = True
+    # Stateless workers cannot keep subscriptions; each caches resources for itself only
+    start_watching()
+    return mcp.streamable_http_app()
+
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport='stdio')
\ No newline at end of file
+    start_watching()
+    # Initialize and run the server (stdio by default, see serve.py for HTTP)
+    serve(mcp, "research_server")
\ No newline at end of file
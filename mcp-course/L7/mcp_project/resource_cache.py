@@ -0,0 +1,91 @@
+from typing import Any, Dict, Set, Tuple
+
+from mcp import types
+from mcp.shared.exceptions import McpError
+from pydantic import AnyUrl
+
+
+class SubscribedResourceCache:
+    """
+    Local copies of the resources the chatbot has read, kept fresh through
+    resource subscriptions instead of re-reading them.
+
+    The first read of a URI subscribes to it (resources/subscribe) and then
+    reads it; later reads are answered from the copy until the server sends
+    notifications/resources/updated for the URI. MCP resources have no
+    ETag, so the pool's epoch stands in for one: when a replica reconnects,
+    its subscriptions and any updates sent meanwhile are lost, so copies
+    read before are dropped and the URI is subscribed again. Servers that
+    do not support subscriptions are read every time.
+    """
+
+    def __init__(self):
+        # uri -> (read_resource result, pool, pool epoch when it was read)
+        self.entries: Dict[str, Tuple[Any, Any, int]] = {}
+        # (pool, uri) -> pool epoch when subscribed
+        self.subscriptions: Dict[Tuple[Any, str], int] = {}
+        # Bumped per URI on every update, so a read that raced with one is not kept
+        self.versions: Dict[str, int] = {}
+        # Pools whose server rejected resources/subscribe
+        self.unsupported: Set[Any] = set()
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    @staticmethod
+    def key(uri: str) -> str:
+        # Normalized the way the server sees the URI, so notifications match
+        return str(AnyUrl(uri))
+
+    async def _subscribe(self, session, uri: str) -> bool:
+        if session in self.unsupported:
+            return False
+        epoch = getattr(session, "epoch", 0)
+        if self.subscriptions.get((session, uri)) == epoch:
+            return True
+        try:
+            await session.subscribe_resource(AnyUrl(uri))
+        except McpError as e:
+            if e.error.code == types.METHOD_NOT_FOUND:
+                self.unsupported.add(session)
+            return False
+        self.subscriptions[(session, uri)] = epoch
+        return True
+
+    async def read(self, session, uri: str):
+        """read_resource through the local copy."""
+        uri = self.key(uri)
+        entry = self.entries.get(uri)
+        if entry is not None and entry[1] is session and entry[2] == getattr(session, "epoch", 0):
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+
+        version = self.versions.get(uri, 0)
+        # Subscribe first, so an update made while reading is not missed
+        subscribed = await self._subscribe(session, uri)
+        epoch = getattr(session, "epoch", 0)
+        result = await session.read_resource(uri=AnyUrl(uri))
+        if subscribed and self.versions.get(uri, 0) == version and getattr(session, "epoch", 0) == epoch:
+            self.entries[uri] = (result, session, epoch)
+        return result
+
+    def invalidate(self, uri: str) -> None:
+        uri = self.key(uri)
+        self.versions[uri] = self.versions.get(uri, 0) + 1
+        if self.entries.pop(uri, None) is not None:
+            self.updates += 1
+
+    async def handle_message(self, message) -> None:
+        """ClientSession message_handler: drops the copy of a resource the server reports as updated."""
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ResourceUpdatedNotification):
+            self.invalidate(str(message.root.params.uri))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "subscriptions": len(self.subscriptions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "updates": self.updates,
+        }
@@ -0,0 +1,72 @@
+import re
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+# {name} matches one path segment; {+name} (RFC 6570 reserved expansion) may span several
+TEMPLATE_VARIABLE = re.compile(r"\{(\+?)([^{}]+)\}")
+
+
+def compile_template(template: str) -> Tuple[Pattern, int]:
+    """Regex for a URI template, and the number of literal characters it has."""
+    pattern, literal, position = [], 0, 0
+    for match in TEMPLATE_VARIABLE.finditer(template):
+        text = template[position:match.start()]
+        pattern.append(re.escape(text))
+        literal += len(text)
+        name = re.sub(r"\W", "_", match.group(2))
+        pattern.append(f"(?P<{name}>.+)" if match.group(1) else f"(?P<{name}>[^/]+)")
+        position = match.end()
+    pattern.append(re.escape(template[position:]))
+    literal += len(template) - position
+    return re.compile("".join(pattern)), literal
+
+
+def scheme_of(uri: str) -> str:
+    return uri.split("://", 1)[0] if "://" in uri else ""
+
+
+class ResourceRouter:
+    """
+    Maps resource URIs to the session serving them.
+
+    Concrete URIs (resources/list) are looked up in a dict. Templates
+    (resources/templates/list, e.g. papers://{topic}) are grouped by URI
+    scheme and tried most specific first, so papers://search/{query} wins
+    over papers://{topic}, and a URI is only matched against templates of
+    its own scheme. Entries are registered per owner (server name) so a
+    server's catalog can be replaced as a whole.
+    """
+
+    def __init__(self):
+        self.exact: Dict[str, Tuple[Any, str]] = {}
+        # scheme -> [(literal length, template, regex, target, owner)], most specific first
+        self.templates: Dict[str, List[Tuple[int, str, Pattern, Any, str]]] = {}
+
+    def add(self, uri: str, target: Any, owner: str) -> None:
+        self.exact[uri] = (target, owner)
+
+    def add_template(self, template: str, target: Any, owner: str) -> None:
+        regex, literal = compile_template(template)
+        entries = [entry for entry in self.templates.get(scheme_of(template), []) if entry[1] != template]
+        entries.append((literal, template, regex, target, owner))
+        entries.sort(key=lambda entry: -entry[0])
+        self.templates[scheme_of(template)] = entries
+
+    def remove_owner(self, owner: str) -> None:
+        self.exact = {uri: entry for uri, entry in self.exact.items() if entry[1] != owner}
+        for scheme, entries in list(self.templates.items()):
+            kept = [entry for entry in entries if entry[4] != owner]
+            if kept:
+                self.templates[scheme] = kept
+            else:
+                del self.templates[scheme]
+
+    def route(self, uri: str) -> Optional[Tuple[Any, Dict[str, str]]]:
+        """(target, template parameters) for a URI, or None if nothing serves it."""
+        entry = self.exact.get(uri)
+        if entry is not None:
+            return entry[0], {}
+        for _, _, regex, target, _ in self.templates.get(scheme_of(uri), ()):
+            match = regex.fullmatch(uri)
+            if match:
+                return target, match.groupdict()
+        return None
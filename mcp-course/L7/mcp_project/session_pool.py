@@ -0,0 +1,325 @@
+import asyncio
+import itertools
+import os
+import sys
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Set
+
+import anyio
+from mcp import ClientSession, types
+from mcp.shared.exceptions import McpError
+
+# Pool settings, in seconds: server config key -> (environment variable, default)
+POOL_SETTINGS = {
+    "callTimeout": ("MCP_CALL_TIMEOUT", 60.0),
+    "pingInterval": ("MCP_PING_INTERVAL", 30.0),
+    "pingTimeout": ("MCP_PING_TIMEOUT", 5.0),
+    "maxBackoff": ("MCP_MAX_BACKOFF", 60.0),
+}
+# Keys of a server config entry read by the pool rather than the transport
+POOL_CONFIG_KEYS = {"replicas", *POOL_SETTINGS}
+
+# Errors meaning the connection itself is gone, not that one request failed
+CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+CONNECTION_CLOSED = getattr(types, "CONNECTION_CLOSED", -32000)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+def pool_setting(config: Dict[str, Any], key: str, override: Optional[float] = None) -> float:
+    """A pool setting: the explicit override, else the server's config entry, else its environment variable."""
+    if override is not None:
+        return override
+    if config.get(key) is not None:
+        return float(config[key])
+    variable, default = POOL_SETTINGS[key]
+    return float(os.getenv(variable, default))
+
+
+class ServerConnection:
+    """
+    One connection (and, for stdio servers, one subprocess) to an MCP server.
+
+    The transport and ClientSession are entered and exited inside a dedicated
+    task, since anyio requires their contexts to be closed by the task that
+    opened them; stop() signals that task and waits for it.
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any], open_transport: Callable,
+                 sampling_callback: Optional[Callable] = None, message_handler: Optional[Callable] = None):
+        self.name = name
+        self.config = config
+        self.open_transport = open_transport
+        # Answers the server's sampling/createMessage requests
+        self.sampling_callback = sampling_callback
+        # Receives the server's notifications, e.g. notifications/resources/updated
+        self.message_handler = message_handler
+        self.session: Optional[ClientSession] = None
+        # Name and version the server reported when initializing
+        self.server_info: Optional[types.Implementation] = None
+        self.error: Optional[BaseException] = None
+        self.inflight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.restarts = 0
+        # Successful connects; subscriptions do not survive a reconnect
+        self.sessions_started = 0
+        self.restarting = False
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.session is not None and not self.restarting and self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        self.error = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self.session is None:
+            raise ConnectionError(f"Could not connect to {self.name}: {self.error}")
+
+    async def _run(self) -> None:
+        try:
+            async with self.open_transport(self.config) as transport:
+                # streamable HTTP also yields a session id getter
+                async with ClientSession(
+                    transport[0], transport[1], sampling_callback=self.sampling_callback,
+                    message_handler=self.message_handler,
+                ) as session:
+                    result = await session.initialize()
+                    self.server_info = result.serverInfo
+                    self.session = session
+                    self.sessions_started += 1
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        if self._task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class ServerPool:
+    """
+    Pool of connections to one MCP server, usable in place of a ClientSession.
+
+    Runs `replicas` connections (separate server processes for stdio servers)
+    and sends each call to the healthy replica with the fewest calls in flight.
+    Calls time out after call_timeout seconds. Replicas are pinged every
+    ping_interval seconds, and after a connection error or a failed ping they
+    are restarted with exponential backoff, up to max_backoff seconds. Unless
+    passed in, each setting comes from the server's config entry or its
+    environment variable (see POOL_SETTINGS).
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any], open_transport: Callable,
+                 replicas: Optional[int] = None, call_timeout: Optional[float] = None,
+                 ping_interval: Optional[float] = None, ping_timeout: Optional[float] = None,
+                 max_backoff: Optional[float] = None, sampling_callback: Optional[Callable] = None,
+                 message_handler: Optional[Callable] = None):
+        self.name = name
+        self.replicas = replicas or config.get("replicas", 1)
+        self.call_timeout = pool_setting(config, "callTimeout", call_timeout)
+        self.ping_interval = pool_setting(config, "pingInterval", ping_interval)
+        self.ping_timeout = pool_setting(config, "pingTimeout", ping_timeout)
+        self.max_backoff = pool_setting(config, "maxBackoff", max_backoff)
+        transport_config = {k: v for k, v in config.items() if k not in POOL_CONFIG_KEYS}
+        self.connections = [
+            ServerConnection(name, transport_config, open_transport, sampling_callback, message_handler)
+            for _ in range(self.replicas)
+        ]
+        self._round_robin = itertools.count()
+        self._available = asyncio.Condition()
+        # Background health checks, restarts and on_start; each removes itself when done
+        self._tasks: Set[asyncio.Task] = set()
+        self.started = False
+        self._start_lock = asyncio.Lock()
+        # Run in the background once the pool has started, e.g. to refresh a cached catalog
+        self.on_start: Optional[Callable[["ServerPool"], Awaitable[None]]] = None
+
+    @property
+    def server_version(self) -> Optional[str]:
+        for connection in self.connections:
+            if connection.server_info is not None:
+                return f"{connection.server_info.name} {connection.server_info.version}"
+        return None
+
+    @property
+    def epoch(self) -> int:
+        """Changes whenever a replica (re)connects, dropping its resource subscriptions."""
+        return sum(connection.sessions_started for connection in self.connections)
+
+    async def ensure_started(self) -> None:
+        """Start the pool on first use (lazy servers are not spawned until needed)."""
+        if self.started:
+            return
+        async with self._start_lock:
+            if not self.started:
+                await self.start()
+
+    async def start(self) -> None:
+        """Connect all replicas; fails only if none of them comes up."""
+        results = await asyncio.gather(*(c.start() for c in self.connections), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if len(errors) == len(self.connections):
+            raise errors[0]
+        for connection, result in zip(self.connections, results):
+            if isinstance(result, BaseException):
+                self.schedule_restart(connection)
+        self._spawn(self._health_loop())
+        self.started = True
+        if self.on_start is not None:
+            self._spawn(self.on_start(self))
+
+    def _spawn(self, coroutine: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def close(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        await asyncio.gather(*(c.stop() for c in self.connections), return_exceptions=True)
+
+    async def acquire(self) -> ServerConnection:
+        """The least busy healthy replica, waiting up to call_timeout for one."""
+        await self.ensure_started()
+        async with self._available:
+            try:
+                await asyncio.wait_for(
+                    self._available.wait_for(lambda: any(c.healthy for c in self.connections)),
+                    self.call_timeout,
+                )
+            except asyncio.TimeoutError:
+                raise ConnectionError(f"No healthy connection to server {self.name}") from None
+        # Rotate the start point so ties are spread round-robin
+        offset = next(self._round_robin) % len(self.connections)
+        rotated = self.connections[offset:] + self.connections[:offset]
+        return min((c for c in rotated if c.healthy), key=lambda c: c.inflight)
+
+    async def _call(self, method: str, *args, **kwargs):
+        connection = await self.acquire()
+        connection.inflight += 1
+        connection.calls += 1
+        try:
+            return await asyncio.wait_for(getattr(connection.session, method)(*args, **kwargs), self.call_timeout)
+        except asyncio.TimeoutError:
+            connection.timeouts += 1
+            # A slow call alone is not fatal; restart only if the server stopped answering pings
+            self._spawn(self.check(connection))
+            raise TimeoutError(f"{method} on {self.name} timed out after {self.call_timeout}s") from None
+        except Exception as e:
+            if is_connection_error(e):
+                self.schedule_restart(connection)
+            raise
+        finally:
+            connection.inflight -= 1
+
+    # ClientSession methods used by the chatbot
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        return await self._call("call_tool", name, arguments=arguments)
+
+    async def send_request(self, request, result_type):
+        return await self._call("send_request", request, result_type)
+
+    async def read_resource(self, uri):
+        return await self._call("read_resource", uri=uri)
+
+    async def get_prompt(self, name: str, arguments: Optional[Dict[str, str]] = None):
+        return await self._call("get_prompt", name, arguments=arguments)
+
+    async def list_tools(self):
+        return await self._call("list_tools")
+
+    async def list_prompts(self):
+        return await self._call("list_prompts")
+
+    async def list_resources(self):
+        return await self._call("list_resources")
+
+    async def list_resource_templates(self):
+        return await self._call("list_resource_templates")
+
+    async def subscribe_resource(self, uri):
+        """Subscribe on every healthy replica, so an update is reported whichever replica notices it."""
+        await self.acquire()
+        await asyncio.gather(*(
+            asyncio.wait_for(connection.session.subscribe_resource(uri), self.call_timeout)
+            for connection in self.connections if connection.healthy
+        ))
+
+    # Health checks and restarts
+
+    async def check(self, connection: ServerConnection) -> bool:
+        """Ping a replica, scheduling a restart if it does not answer."""
+        if not connection.healthy:
+            if not connection.restarting:
+                self.schedule_restart(connection)
+            return False
+        try:
+            await asyncio.wait_for(connection.session.send_ping(), self.ping_timeout)
+            return True
+        except Exception as e:
+            print(f"Server {self.name} failed health check: {e!r}", file=sys.stderr)
+            self.schedule_restart(connection)
+            return False
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await asyncio.gather(*(self.check(c) for c in self.connections if not c.restarting))
+
+    def schedule_restart(self, connection: ServerConnection) -> None:
+        if connection.restarting:
+            return
+        connection.restarting = True
+        self._spawn(self._restart(connection))
+
+    async def _restart(self, connection: ServerConnection) -> None:
+        backoff = 1.0
+        try:
+            await connection.stop()
+            while True:
+                try:
+                    await connection.start()
+                    break
+                except Exception as e:
+                    print(f"Restarting {self.name} failed, retrying in {backoff:.0f}s: {e}", file=sys.stderr)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+            connection.restarts += 1
+        finally:
+            connection.restarting = False
+        async with self._available:
+            self._available.notify_all()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [{
+            "healthy": c.healthy,
+            "inflight": c.inflight,
+            "calls": c.calls,
+            "timeouts": c.timeouts,
+            "restarts": c.restarts,
+        } for c in self.connections]
@@ -0,0 +1,486 @@
+"""
+Checks that research_server serves overlapping requests in parallel, that
+read_paper extracts, caches and excerpts PDFs, that summarize_topic only
+summarizes new chunks when it is run again, that topic names and
+aliases resolve to stored topics, that a papers file edited outside
+the server invalidates the cached resource and notifies subscribers, and
+that the client's resource cache only re-reads a resource after such a
+notification (and, with the watcher off, is refused the subscription and
+reads every time), that a paper stored under two topics stays
+searchable when one of them is removed, and that a malformed traceparent
+from the client does not fail a traced call.
+
+arXiv is replaced by a fake fetch that sleeps, PDFs are served from a
+temporary directory, the LLM by a fake sampling callback, and the server is
+connected over memory streams, so no network access is needed.
+
+Usage:
+    python test_research_server.py      # or: pytest test_research_server.py
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from mcp import types
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import AnyUrl
+
+import research_server
+import tracing
+from pdf_pipeline import LocalFetcher, PdfPipeline
+from resource_cache import SubscribedResourceCache
+
+FETCH_SECONDS = 0.5
+# Longest allowed delay between an outside edit and the cache entry being dropped
+INVALIDATION_SECONDS = 1.0
+
+
+def fake_fetch_papers(topic, max_results):
+    time.sleep(FETCH_SECONDS)
+    slug = topic.replace(" ", "_")
+    return {
+        f"{slug}.{i}": {
+            "title": f"{topic} paper {i}",
+            "authors": ["A. Author"],
+            "summary": f"About {topic}.",
+            "pdf_url": f"https://arxiv.org/pdf/{slug}.{i}",
+            "published": "2024-01-01",
+        }
+        for i in range(max_results)
+    }
+
+
+def make_pdf(pages):
+    """A minimal PDF with one line of text per entry in pages."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = " T* ".join(f"({line}) Tj" for line in text.split("\n"))
+        stream = f"BT /F1 12 Tf 14 TL 72 720 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = "%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start
+
+
+async def check_overlapping_calls():
+    async with create_connected_server_and_client_session(research_server.mcp._mcp_server) as session:
+        # Two searches at once take about as long as one
+        _, elapsed = await timed(asyncio.gather(
+            session.call_tool("search_papers", {"topic": "transformers", "max_results": 2}),
+            session.call_tool("search_papers", {"topic": "diffusion", "max_results": 2}),
+        ))
+        print(f"{'✅' if elapsed < 1.8 * FETCH_SECONDS else '❌'} two searches: {elapsed:.2f}s")
+        assert elapsed < 1.8 * FETCH_SECONDS, "searches ran one after the other"
+
+        # A lookup is answered while a search is still running
+        search = asyncio.create_task(timed(
+            session.call_tool("search_papers", {"topic": "robotics", "max_results": 2})
+        ))
+        await asyncio.sleep(0.05)
+        result, lookup_elapsed = await timed(session.call_tool("extract_info", {"paper_id": "transformers.0"}))
+        _, search_elapsed = await search
+        overlapped = lookup_elapsed < FETCH_SECONDS / 2
+        print(f"{'✅' if overlapped else '❌'} extract_info during search: {lookup_elapsed:.2f}s "
+              f"(search {search_elapsed:.2f}s)")
+        assert "transformers paper 0" in result.content[0].text
+        assert lookup_elapsed < FETCH_SECONDS / 2, "extract_info waited for the search"
+
+        # search_papers_many fetches topics concurrently
+        topics = ["graphs", "compilers", "databases"]
+        result, elapsed = await timed(
+            session.call_tool("search_papers_many", {"topics": topics, "max_results": 1})
+        )
+        print(f"{'✅' if elapsed < 1.8 * FETCH_SECONDS else '❌'} search_papers_many, 3 topics: {elapsed:.2f}s")
+        assert not result.isError
+        assert elapsed < 1.8 * FETCH_SECONDS, "topics were fetched one after the other"
+
+        # Stored papers are searchable without another fetch
+        result = await session.call_tool("search_local_papers", {"query": "robotics paper", "k": 3})
+        matches = json.loads(result.content[0].text)
+        found = bool(matches) and matches[0]["topic"] == "robotics"
+        print(f"{'✅' if found else '❌'} search_local_papers: {[m['paper_id'] for m in matches]}")
+        assert found, "stored robotics papers were not ranked first"
+
+
+async def check_read_paper(pipeline):
+    async with create_connected_server_and_client_session(research_server.mcp._mcp_server) as session:
+        await session.call_tool("search_papers", {"topic": "transformers", "max_results": 1})
+
+        result = await session.call_tool("read_paper", {"paper_id": "transformers.0", "section": "Method"})
+        text = result.content[0].text
+        print(f"{'✅' if 'attention everywhere' in text else '❌'} read_paper section: {len(text)} chars")
+        assert "Sections:" in text and "2 Method" in text
+        assert "attention everywhere" in text and "Results" not in text.split("---", 1)[1]
+
+        # Page ranges and repeated reads come from the cache: one download, one extraction
+        results = await asyncio.gather(*(
+            session.call_tool("read_paper", {"paper_id": "transformers.0", "pages": "3"}) for _ in range(3)
+        ))
+        assert all("[Page 3]" in r.content[0].text and "[Page 2]" not in r.content[0].text for r in results)
+        stats = pipeline.stats()
+        print(f"{'✅' if stats['downloads'] == 1 else '❌'} cached reads: {stats}")
+        assert stats["downloads"] == 1 and stats["extractions"] == 1
+
+
+def test_read_paper():
+    original_fetch, original_dir = research_server.fetch_papers, research_server.PAPER_DIR
+    original_pipeline = research_server.pdf_pipeline
+    with tempfile.TemporaryDirectory() as workdir:
+        pdf_dir = os.path.join(workdir, "pdfs")
+        os.makedirs(pdf_dir)
+        with open(os.path.join(pdf_dir, "transformers.0.pdf"), "wb") as f:
+            f.write(make_pdf([
+                "1 Introduction\nTransformers are everywhere.",
+                "2 Method\nWe use attention everywhere.",
+                "3 Results\nIt works.",
+            ]))
+        pipeline = PdfPipeline(LocalFetcher(pdf_dir), os.path.join(workdir, "cache"), process_workers=1)
+        research_server.fetch_papers = lambda topic, max_results: {
+            name: dict(info, pdf_url=f"https://arxiv.org/pdf/{name}")
+            for name, info in fake_fetch_papers(topic, max_results).items()
+        }
+        research_server.PAPER_DIR = os.path.join(workdir, "papers")
+        research_server.pdf_pipeline = pipeline
+        try:
+            asyncio.run(check_read_paper(pipeline))
+        finally:
+            research_server.fetch_papers, research_server.PAPER_DIR = original_fetch, original_dir
+            research_server.pdf_pipeline = original_pipeline
+            if pipeline.process_pool is not None:
+                pipeline.process_pool.shutdown()
+
+
+async def check_summarize_topic():
+    prompts = []
+
+    async def fake_sampling(context, params):
+        prompt = params.messages[0].content.text
+        prompts.append(prompt)
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+        return types.CreateMessageResult(
+            role="assistant", content=types.TextContent(type="text", text=f"Summary {digest}"), model="fake",
+        )
+
+    async def summarize():
+        result = await session.call_tool("summarize_topic", {"topic": "robotics"})
+        return json.loads(result.content[0].text)
+
+    async with create_connected_server_and_client_session(
+        research_server.mcp._mcp_server, sampling_callback=fake_sampling
+    ) as session:
+        await session.call_tool("search_papers", {"topic": "robotics", "max_results": 6})
+        first = await summarize()
+        print(f"{'✅' if first['chunks'] == 3 else '❌'} summarize_topic: {first['papers']} papers, "
+              f"{first['chunks']} chunks, {first['llm_calls']} LLM calls")
+        assert first["chunks"] == 3 and first["llm_calls"] == 4
+        assert first["synthesis"].startswith("Summary")
+
+        again = await summarize()
+        print(f"{'✅' if again['llm_calls'] == 0 else '❌'} unchanged topic: {again['llm_calls']} LLM calls")
+        assert again["llm_calls"] == 0 and again["synthesis"] == first["synthesis"]
+
+        # Two more papers: one new chunk and the final synthesis
+        await session.call_tool("search_papers", {"topic": "robotics", "max_results": 8})
+        grown = await summarize()
+        print(f"{'✅' if grown['llm_calls'] == 2 else '❌'} after adding papers: {grown['chunks']} chunks, "
+              f"{grown['llm_calls']} LLM calls")
+        assert grown["chunks"] == 4 and grown["llm_calls"] == 2
+
+
+def test_summarize_topic():
+    original_fetch, original_dir = research_server.fetch_papers, research_server.PAPER_DIR
+    original_budget = research_server.SUMMARY_CHUNK_TOKENS
+    original_cache = os.environ.get("SUMMARY_CACHE_DIR")
+    with tempfile.TemporaryDirectory() as workdir:
+        research_server.fetch_papers = fake_fetch_papers
+        research_server.PAPER_DIR = os.path.join(workdir, "papers")
+        # About two fake papers per chunk
+        research_server.SUMMARY_CHUNK_TOKENS = 45
+        os.environ["SUMMARY_CACHE_DIR"] = os.path.join(workdir, "summaries")
+        try:
+            asyncio.run(check_summarize_topic())
+        finally:
+            research_server.fetch_papers, research_server.PAPER_DIR = original_fetch, original_dir
+            research_server.SUMMARY_CHUNK_TOKENS = original_budget
+            if original_cache is None:
+                os.environ.pop("SUMMARY_CACHE_DIR", None)
+            else:
+                os.environ["SUMMARY_CACHE_DIR"] = original_cache
+
+
+async def check_topic_resolution():
+    async def read(uri):
+        result = await session.read_resource(uri)
+        return result.contents[0].text
+
+    async with create_connected_server_and_client_session(research_server.mcp._mcp_server) as session:
+        await session.call_tool("search_papers", {"topic": "machine learning", "max_results": 2})
+        for uri in ["papers://machine_learning", "papers://Machine-Learning", "papers://ml"]:
+            content = await read(uri)
+            print(f"{'✅' if content.startswith('# Papers on Machine Learning') else '❌'} {uri} resolved")
+            assert content.startswith("# Papers on Machine Learning")
+
+        content = await read("papers://machin_lerning")
+        print(f"{'✅' if '@machine_learning' in content else '❌'} misspelled topic suggests @machine_learning")
+        assert content.startswith("# No papers found") and "Did you mean: @machine_learning?" in content
+
+
+def test_topic_resolution():
+    original_fetch, original_dir = research_server.fetch_papers, research_server.PAPER_DIR
+    with tempfile.TemporaryDirectory() as paper_dir:
+        research_server.fetch_papers = fake_fetch_papers
+        research_server.PAPER_DIR = paper_dir
+        try:
+            asyncio.run(check_topic_resolution())
+        finally:
+            research_server.fetch_papers, research_server.PAPER_DIR = original_fetch, original_dir
+
+
+async def check_file_watcher(backend):
+    updated = asyncio.Event()
+
+    async def on_message(message):
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ResourceUpdatedNotification):
+            if str(message.root.params.uri) == "papers://robotics":
+                updated.set()
+
+    async def read(uri):
+        result = await session.read_resource(uri)
+        return result.contents[0].text
+
+    async with create_connected_server_and_client_session(
+        research_server.mcp._mcp_server, message_handler=on_message
+    ) as session:
+        await session.call_tool("search_papers", {"topic": "robotics", "max_results": 2})
+        # Let the watcher report the server's own write before caching the resource
+        await asyncio.sleep(0.3)
+        await read("papers://robotics")
+        assert "topic:robotics" in research_server.resource_cache, "resource was not cached"
+        await session.subscribe_resource(AnyUrl("papers://robotics"))
+
+        # Edit the file the way another process would, bypassing the server
+        file_path = os.path.join(research_server.PAPER_DIR, "robotics", "papers_info.json")
+        with open(file_path, "r") as f:
+            papers = json.load(f)
+        papers["robotics.0"]["title"] = "Edited outside the server"
+        start = time.perf_counter()
+        with open(file_path, "w") as f:
+            json.dump(papers, f)
+
+        while "topic:robotics" in research_server.resource_cache:
+            assert time.perf_counter() - start < INVALIDATION_SECONDS, "cache entry was not invalidated"
+            await asyncio.sleep(0.005)
+        invalidated = time.perf_counter() - start
+        await asyncio.wait_for(updated.wait(), INVALIDATION_SECONDS)
+        notified = time.perf_counter() - start
+        print(f"✅ {backend}: cache invalidated after {invalidated * 1000:.0f} ms, "
+              f"client notified after {notified * 1000:.0f} ms")
+
+        content = await read("papers://robotics")
+        print(f"{'✅' if 'Edited outside the server' in content else '❌'} {backend}: re-read shows the edit")
+        assert "Edited outside the server" in content
+
+
+def test_file_watcher():
+    original_fetch, original_dir = research_server.fetch_papers, research_server.PAPER_DIR
+    original_env = {name: os.environ.get(name) for name in ("FILE_WATCHER", "FILE_POLL_SECONDS")}
+    backends = ["polling"] + (["inotify"] if sys.platform.startswith("linux") else [])
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as paper_dir:
+            research_server.fetch_papers = fake_fetch_papers
+            research_server.PAPER_DIR = paper_dir
+            os.environ["FILE_WATCHER"] = backend
+            os.environ["FILE_POLL_SECONDS"] = "0.1"
+            research_server.start_watching()
+            try:
+                asyncio.run(check_file_watcher(backend))
+            finally:
+                research_server.stop_watching()
+                research_server.fetch_papers, research_server.PAPER_DIR = original_fetch, original_dir
+                for name, value in original_env.items():
+                    if value is None:
+                        os.environ.pop(name, None)
+                    else:
+                        os.environ[name] = value
+
+
+async def check_resource_cache():
+    cache = SubscribedResourceCache()
+
+    async with create_connected_server_and_client_session(
+        research_server.mcp._mcp_server, message_handler=cache.handle_message
+    ) as session:
+        await session.call_tool("search_papers", {"topic": "robotics", "max_results": 2})
+        # Let the watcher report the server's own write first
+        await asyncio.sleep(0.3)
+        first = await cache.read(session, "papers://robotics")
+        again = await cache.read(session, "papers://robotics")
+        print(f"{'✅' if cache.hits == 1 else '❌'} repeated read answered locally: {cache.stats()}")
+        assert cache.hits == 1 and cache.misses == 1 and again is first
+
+        file_path = os.path.join(research_server.PAPER_DIR, "robotics", "papers_info.json")
+        with open(file_path, "r") as f:
+            papers = json.load(f)
+        papers["robotics.1"]["title"] = "Renamed outside the server"
+        start = time.perf_counter()
+        with open(file_path, "w") as f:
+            json.dump(papers, f)
+        while cache.updates == 0:
+            assert time.perf_counter() - start < INVALIDATION_SECONDS, "local copy was not dropped"
+            await asyncio.sleep(0.005)
+
+        fresh = await cache.read(session, "papers://robotics")
+        updated = "Renamed outside the server" in fresh.contents[0].text
+        print(f"{'✅' if updated else '❌'} re-read after the update notification "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms): {cache.stats()}")
+        assert updated and cache.misses == 2
+
+
+def test_resource_cache():
+    original_fetch, original_dir = research_server.fetch_papers, research_server.PAPER_DIR
+    with tempfile.TemporaryDirectory() as paper_dir:
+        research_server.fetch_papers = fake_fetch_papers
+        research_server.PAPER_DIR = paper_dir
+        research_server.start_watching()
+        try:
+            asyncio.run(check_resource_cache())
+        finally:
+            research_server.stop_watching()
+            research_server.fetch_papers, research_server.PAPER_DIR = original_fetch, original_dir
+
+
+async def check_watcher_off():
+    cache = SubscribedResourceCache()
+
+    async with create_connected_server_and_client_session(
+        research_server.mcp._mcp_server, message_handler=cache.handle_message
+    ) as session:
+        await session.call_tool("search_papers", {"topic": "robotics", "max_results": 2})
+        await cache.read(session, "papers://robotics")
+        refused = session in cache.unsupported and not cache.entries
+        print(f"{'✅' if refused else '❌'} subscription refused without a file watcher: {cache.stats()}")
+        assert refused, "subscription accepted although nothing would send updates"
+
+        await session.call_tool("search_papers", {"topic": "robotics", "max_results": 3})
+        fresh = await cache.read(session, "papers://robotics")
+        assert "robotics.2" in fresh.contents[0].text, "chatbot kept a stale copy"
+        assert cache.hits == 0 and cache.misses == 2
+
+
+def test_watcher_off():
+    original_fetch, original_dir = research_server.fetch_papers, research_server.PAPER_DIR
+    with tempfile.TemporaryDirectory() as paper_dir:
+        research_server.fetch_papers = fake_fetch_papers
+        research_server.PAPER_DIR = paper_dir
+        try:
+            asyncio.run(check_watcher_off())
+        finally:
+            research_server.fetch_papers, research_server.PAPER_DIR = original_fetch, original_dir
+
+
+async def check_traceparent(trace_file):
+    valid = "00-" + "ab" * 16 + "-" + "cd" * 8 + "-01"
+    malformed = ["garbage", "00-abc-def-01", "00-" + "g" * 32 + "-" + "cd" * 8 + "-01", valid + "-extra"]
+
+    async with create_connected_server_and_client_session(research_server.mcp._mcp_server) as session:
+        for traceparent in [valid] + malformed:
+            result = await session.send_request(types.ClientRequest(types.CallToolRequest(
+                method="tools/call",
+                params=types.CallToolRequestParams(
+                    name="extract_info", arguments={"paper_id": "2401.1"},
+                    _meta=types.RequestParams.Meta(traceparent=traceparent),
+                ),
+            )), types.CallToolResult)
+            print(f"{'❌' if result.isError else '✅'} traceparent {traceparent!r}: call succeeded")
+            assert not result.isError, f"traced call failed for traceparent {traceparent!r}"
+
+    with open(trace_file, "r") as f:
+        spans = [json.loads(line) for line in f if '"tool.extract_info"' in line]
+    assert len(spans) == 1 + len(malformed)
+    assert (spans[0]["trace_id"], spans[0]["parent_id"]) == ("ab" * 16, "cd" * 8)
+    # Malformed values start new root traces
+    assert all(span["parent_id"] is None and span["trace_id"] != "ab" * 16 for span in spans[1:])
+
+
+def test_malformed_traceparent():
+    original_exporter, original_dir = research_server.tracer.exporter, research_server.PAPER_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        trace_file = os.path.join(directory, "traces.jsonl")
+        research_server.tracer.exporter = tracing.JsonlExporter(trace_file)
+        research_server.PAPER_DIR = directory
+        try:
+            asyncio.run(check_traceparent(trace_file))
+        finally:
+            research_server.tracer.exporter, research_server.PAPER_DIR = original_exporter, original_dir
+
+
+def test_paper_in_two_topics():
+    original_dir = research_server.PAPER_DIR
+    with tempfile.TemporaryDirectory() as paper_dir:
+        research_server.PAPER_DIR = paper_dir
+        try:
+            paper = {"2401.1": {
+                "title": "Graph neural networks", "authors": ["A. Author"],
+                "summary": "About graphs.", "pdf_url": "https://arxiv.org/pdf/2401.1", "published": "2024-01-01",
+            }}
+            research_server.save_papers({"ml": paper, "machine learning": paper})
+            shutil.rmtree(os.path.join(paper_dir, "ml"))
+            results = research_server.search_index("graph", 5)
+            kept = [(r["paper_id"], r["topic"]) for r in results] == [("2401.1", "machine_learning")]
+            print(f"{'✅' if kept else '❌'} paper still found after one of its topics was removed: {results}")
+            assert kept, "removing one topic dropped a paper another topic still holds"
+
+            research_server.remove_papers({"machine_learning": ["2401.1"]})
+            assert research_server.search_index("graph", 5) == []
+        finally:
+            research_server.PAPER_DIR = original_dir
+
+
+def test_overlapping_calls():
+    original_fetch, original_dir = research_server.fetch_papers, research_server.PAPER_DIR
+    with tempfile.TemporaryDirectory() as paper_dir:
+        research_server.fetch_papers = fake_fetch_papers
+        research_server.PAPER_DIR = paper_dir
+        try:
+            asyncio.run(check_overlapping_calls())
+        finally:
+            research_server.fetch_papers, research_server.PAPER_DIR = original_fetch, original_dir
+
+
+if __name__ == "__main__":
+    print("🧪 Testing concurrent requests to the research server...\n")
+    test_overlapping_calls()
+    test_read_paper()
+    test_summarize_topic()
+    test_topic_resolution()
+    test_file_watcher()
+    test_resource_cache()
+    test_watcher_off()
+    test_paper_in_two_topics()
+    test_malformed_traceparent()
+    print("\n🎉 Research server test completed!")
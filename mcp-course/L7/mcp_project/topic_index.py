@@ -0,0 +1,161 @@
+import difflib
+import json
+import re
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+SEPARATORS = re.compile(r"[\s_\-/]+")
+
+
+def normalize_topic(name: str) -> str:
+    """Lookup key of a topic name: " Machine-Learning" and "machine learning" -> "machine_learning"."""
+    words = SEPARATORS.split(name.strip().strip("@\"'.,;:!?").lower())
+    return "_".join(word for word in words if word)
+
+
+def automatic_aliases(key: str) -> Set[str]:
+    """Other keys for a topic: its singular form and, for several words, its acronym."""
+    aliases = set()
+    words = key.split("_")
+    last = words[-1]
+    if len(last) > 3 and last.endswith("s") and not last.endswith("ss"):
+        aliases.add("_".join(words[:-1] + [last[:-1]]))
+    if len(words) > 1:
+        aliases.add("".join(word[0] for word in words))
+    aliases.discard(key)
+    return aliases
+
+
+class TrieNode:
+    __slots__ = ("children", "topic", "aliased")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        # The stored topic whose own name has this key, if any
+        self.topic: Optional[str] = None
+        # Stored topics this key is an alias of
+        self.aliased: Set[str] = set()
+
+
+class TopicIndex:
+    """
+    Resolves topic names as users type them (@Machine Learning, @ml,
+    @transformer) to the names topics are stored under.
+
+    Every stored topic is kept in a prefix trie under its normalized name
+    and its aliases, so resolving a name takes O(len(name)) steps however
+    many topics there are. Aliases come from automatic_aliases() and from
+    an optional JSON file mapping alias -> topic. A topic's own name always
+    wins over an alias; an alias of several topics resolves to none of
+    them. On a miss, suggest() offers topics starting with the name, then
+    close spellings.
+    """
+
+    def __init__(self, aliases_file: Optional[str] = None):
+        self.aliases_file = aliases_file
+        self.lock = threading.Lock()
+        self.root = TrieNode()
+        self.topics: Set[str] = set()
+        # Every key in the trie, for close-spelling suggestions
+        self.keys: Set[str] = set()
+        self.version: Any = None
+
+    def _load_aliases(self) -> Dict[str, str]:
+        if not self.aliases_file:
+            return {}
+        try:
+            with open(self.aliases_file, "r") as f:
+                return {normalize_topic(alias): normalize_topic(topic) for alias, topic in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, AttributeError) as e:
+            print(f"Ignoring topic aliases in {self.aliases_file}: {str(e)}", file=sys.stderr)
+            return {}
+
+    def _node(self, key: str, create: bool = False) -> Optional[TrieNode]:
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = TrieNode()
+            node = child
+        return node
+
+    def _add(self, topic: str, aliases: Iterable[str] = ()) -> None:
+        key = normalize_topic(topic)
+        self._node(key, create=True).topic = topic
+        self.keys.add(key)
+        for alias in automatic_aliases(key) | set(aliases):
+            self._node(alias, create=True).aliased.add(topic)
+            self.keys.add(alias)
+        self.topics.add(topic)
+
+    def sync(self, version: Any, topics: Callable[[], Iterable[str]]) -> None:
+        """Rebuild the index from every stored topic when the store's version changed."""
+        with self.lock:
+            if version == self.version:
+                return
+            self.root, self.topics, self.keys = TrieNode(), set(), set()
+            stored = list(topics())
+            by_key = {normalize_topic(topic): topic for topic in stored}
+            extra: Dict[str, List[str]] = {}
+            for alias, key in self._load_aliases().items():
+                if key in by_key:
+                    extra.setdefault(by_key[key], []).append(alias)
+            for topic in stored:
+                self._add(topic, extra.get(topic, ()))
+            self.version = version
+
+    def invalidate(self) -> None:
+        """Rebuild on the next sync, e.g. after a topic was removed outside the server."""
+        with self.lock:
+            self.version = None
+
+    def add(self, topic: str) -> None:
+        """Index a newly stored topic without a rebuild."""
+        with self.lock:
+            if topic not in self.topics:
+                self._add(topic)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """The stored topic a name refers to, or None if it is unknown or ambiguous."""
+        with self.lock:
+            node = self._node(normalize_topic(name))
+            if node is None:
+                return None
+            if node.topic is not None:
+                return node.topic
+            return next(iter(node.aliased)) if len(node.aliased) == 1 else None
+
+    def suggest(self, name: str, limit: int = 5) -> List[str]:
+        """Stored topics the name might mean: those starting with it first, then close spellings."""
+        key = normalize_topic(name)
+        suggestions: List[str] = []
+
+        def offer(node: TrieNode) -> None:
+            for topic in ([node.topic] if node.topic else []) + sorted(node.aliased):
+                if topic not in suggestions:
+                    suggestions.append(topic)
+
+        with self.lock:
+            # Depth-first below the name's node, shortest keys first in each branch
+            stack = [self._node(key)] if key else []
+            while stack and len(suggestions) < limit:
+                node = stack.pop()
+                if node is None:
+                    break
+                offer(node)
+                stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+            for close in difflib.get_close_matches(key, self.keys, n=limit, cutoff=0.6):
+                offer(self._node(close))
+            # Misspelled beginnings of longer names: "atention" -> attention_mechanisms
+            heads: Dict[str, List[str]] = {}
+            for other in self.keys:
+                heads.setdefault(other[:len(key)], []).append(other)
+            for close in difflib.get_close_matches(key, heads, n=limit, cutoff=0.75):
+                for other in sorted(heads[close], key=len):
+                    offer(self._node(other))
+        return suggestions[:limit]
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+# Rough token estimate, good enough for sizing chunks
+CHARS_PER_TOKEN = 4
+# Bump when the prompts change, so cached summaries are not reused
+PROMPT_VERSION = 1
+
+MAP_PROMPT = """Below are papers on the research topic "{topic}".{focus}
+
+Summarize them for a literature review: the problems addressed, methods, key
+findings and how the papers relate to each other. Refer to papers by their ID
+in square brackets, e.g. [2401.12345v1]. Be concise: at most {words} words.
+
+{text}"""
+
+COMBINE_PROMPT = """Below are partial summaries of the papers on the research topic "{topic}".{focus}
+
+Merge them into one summary of at most {words} words. Keep the paper IDs in
+square brackets and keep the points that matter most; drop repetition.
+
+{text}"""
+
+REDUCE_PROMPT = """Below are summaries covering all stored papers on the research topic "{topic}".{focus}
+
+Write a synthesis of the research landscape:
+1. Main themes and research directions
+2. Methods and how they compare
+3. Key findings, with paper IDs in square brackets
+4. Open problems and gaps
+
+{text}"""
+
+PROMPTS = {"map": MAP_PROMPT, "combine": COMBINE_PROMPT, "reduce": REDUCE_PROMPT}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def paper_digest(paper_id: str, info: Dict[str, Any]) -> str:
+    return (
+        f"[{paper_id}] {info.get('title', '')}\n"
+        f"Authors: {', '.join(info.get('authors', []))}; published {info.get('published', 'unknown')}\n"
+        f"{info.get('summary', '')}"
+    )
+
+
+def pack(texts: List[str], token_budget: int) -> List[str]:
+    """
+    Greedily join texts, in order, into chunks of at most token_budget tokens
+    (a single longer text gets a chunk of its own). Papers are passed in the
+    order they were stored, so new papers only change the last chunks.
+    """
+    chunks, current, used = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and used + tokens > token_budget:
+            chunks.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class SummaryCache:
+    """Summaries on disk, keyed by a hash of the prompt kind, topic, focus and input text."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def key(self, kind: str, topic: str, focus: str, text: str) -> str:
+        payload = json.dumps([PROMPT_VERSION, kind, topic, focus, text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)["summary"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, key: str, summary: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"summary": summary}, f)
+        os.replace(tmp_path, path)
+
+
+class SamplingBackend:
+    """
+    Completes prompts with the client's LLM through MCP sampling
+    (sampling/createMessage), so the server needs no API key. Requests are
+    sent concurrently, up to max_concurrency at once.
+    """
+
+    def __init__(self, session, max_tokens: int = 1024, max_concurrency: int = 4):
+        self.session = session
+        self.max_tokens = max_tokens
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _complete(self, prompt: str) -> str:
+        from mcp import types
+
+        async with self.semaphore:
+            result = await self.session.create_message(
+                messages=[types.SamplingMessage(role="user", content=types.TextContent(type="text", text=prompt))],
+                max_tokens=self.max_tokens,
+            )
+        if result.content.type != "text":
+            raise ValueError(f"Expected a text completion, got {result.content.type}")
+        return result.content.text
+
+    async def complete(self, prompts: List[str]) -> List[str]:
+        return list(await asyncio.gather(*(self._complete(prompt) for prompt in prompts)))
+
+
+class BatchBackend:
+    """
+    Completes prompts with the Message Batches API: all prompts of a step go
+    in one batch, at half the price of individual requests, and are polled
+    until the batch ends. Needs ANTHROPIC_API_KEY in the server's environment.
+    """
+
+    def __init__(self, model: str, max_tokens: int = 1024, poll_interval: float = 10.0):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.poll_interval = poll_interval
+        self.client = None
+
+    async def complete(self, prompts: List[str]) -> List[str]:
+        if self.client is None:
+            # Imported here so the server starts quickly
+            from anthropic import AsyncAnthropic
+            self.client = AsyncAnthropic()
+
+        batch = await self.client.messages.batches.create(requests=[
+            {
+                "custom_id": f"prompt-{i}",
+                "params": {
+                    "model": self.model,
+                    "max_tokens": self.max_tokens,
+                    "messages": [{"role": "user", "content": prompt}],
+                },
+            }
+            for i, prompt in enumerate(prompts)
+        ])
+        while batch.processing_status != "ended":
+            await asyncio.sleep(self.poll_interval)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+
+        texts: Dict[str, str] = {}
+        async for entry in await self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                texts[entry.custom_id] = "".join(
+                    block.text for block in entry.result.message.content if block.type == "text"
+                )
+        missing = [i for i in range(len(prompts)) if f"prompt-{i}" not in texts]
+        if missing:
+            raise RuntimeError(f"Batch {batch.id}: {len(missing)} of {len(prompts)} requests failed")
+        return [texts[f"prompt-{i}"] for i in range(len(prompts))]
+
+
+class TopicSummarizer:
+    """
+    Map-reduce synthesis of a topic's papers.
+
+    map: papers are packed into chunks of chunk_tokens and each chunk is
+    summarized. combine: while the summaries together exceed reduce_tokens,
+    they are packed and summarized again. reduce: one final synthesis.
+    Every step's output is cached under a hash of its input, so re-running
+    after papers were added only summarizes the chunks that changed.
+    """
+
+    def __init__(self, backend, cache: SummaryCache, chunk_tokens: int = 6000,
+                 reduce_tokens: int = 8000, summary_words: int = 250):
+        self.backend = backend
+        self.cache = cache
+        self.chunk_tokens = chunk_tokens
+        self.reduce_tokens = reduce_tokens
+        self.summary_words = summary_words
+        self.cached = 0
+        self.completed = 0
+
+    async def _run(self, kind: str, topic: str, focus: str, texts: List[str]) -> List[str]:
+        """Outputs of one step for every input text, from the cache where possible."""
+        keys = [self.cache.key(kind, topic, focus, text) for text in texts]
+        outputs = [self.cache.get(key) for key in keys]
+        missing = [i for i, output in enumerate(outputs) if output is None]
+        self.cached += len(texts) - len(missing)
+        if missing:
+            focus_line = f"\nFocus on: {focus}" if focus else ""
+            prompts = [
+                PROMPTS[kind].format(topic=topic, focus=focus_line, words=self.summary_words, text=texts[i])
+                for i in missing
+            ]
+            for i, output in zip(missing, await self.backend.complete(prompts)):
+                self.cache.put(keys[i], output)
+                outputs[i] = output
+            self.completed += len(missing)
+        return outputs
+
+    async def summarize(self, topic: str, papers: Dict[str, Dict[str, Any]], focus: str = "") -> Dict[str, Any]:
+        chunks = pack([paper_digest(paper_id, info) for paper_id, info in papers.items()], self.chunk_tokens)
+        summaries = await self._run("map", topic, focus, chunks)
+
+        rounds = 0
+        while len(summaries) > 1 and sum(estimate_tokens(s) for s in summaries) > self.reduce_tokens:
+            groups = pack(summaries, self.reduce_tokens)
+            if len(groups) == len(summaries):
+                # Every summary fills a group on its own; merging pairs still makes progress
+                groups = ["\n\n".join(summaries[i:i + 2]) for i in range(0, len(summaries), 2)]
+            summaries = await self._run("combine", topic, focus, groups)
+            rounds += 1
+
+        synthesis = (await self._run("reduce", topic, focus, ["\n\n---\n\n".join(summaries)]))[0]
+        return {
+            "topic": topic,
+            "papers": len(papers),
+            "chunks": len(chunks),
+            "combine_rounds": rounds,
+            "cached_steps": self.cached,
+            "llm_calls": self.completed,
+            "synthesis": synthesis,
+        }
@@ -0,0 +1,240 @@
+# Shared helper: canonical copy in mcp-course/L7/mcp_project/tracing.py, kept in sync by tools/sync_helpers.py
+import contextvars
+import functools
+import inspect
+import json
+import os
+import re
+import secrets
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# W3C traceparent: version 00, 32-hex trace id, 16-hex parent span id, 2-hex flags
+TRACEPARENT_PATTERN = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}")
+# Span currently active in this task/thread
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation; children share the trace_id of their parent."""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str,
+                 parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value, used to correlate server spans."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str) -> None:
+        """Record a point in time within the span, e.g. the first streamed token."""
+        offset = (time.perf_counter() - self._start) * 1000
+        self.events.append({"name": name, "offset_ms": round(offset, 3)})
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = (time.perf_counter() - self._start) * 1000
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.export({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.tracer.service,
+            "start": self.start_time,
+            "duration_ms": round(duration, 3),
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        })
+
+
+class _NoopSpan:
+    traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def add_event(self, name):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonlExporter:
+    """Appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class Tracer:
+    """
+    Minimal span tracer. With no exporter configured spans are no-ops, so
+    instrumented code costs next to nothing when tracing is off.
+    """
+
+    def __init__(self, service: str, exporter=None):
+        self.service = service
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, parent: Optional[str] = None, **attributes):
+        """
+        Start a span as a context manager. parent may be a traceparent string
+        from another process; otherwise the current span is the parent. A
+        parent that is not a valid traceparent (it comes from the client
+        unchecked) starts a new root trace rather than failing the call.
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+
+        current = _current_span.get()
+        if parent:
+            match = TRACEPARENT_PATTERN.fullmatch(parent) if isinstance(parent, str) else None
+            if match and set(match.group(1)) != {"0"} and set(match.group(2)) != {"0"}:
+                trace_id, parent_id = match.groups()
+            else:
+                trace_id, parent_id = secrets.token_hex(16), None
+        elif current is not None:
+            trace_id, parent_id = current.trace_id, current.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        return Span(self, name, trace_id, parent_id, attributes)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        try:
+            self.exporter.export(record)
+        except Exception as e:
+            print(f"Error exporting span: {e}", file=sys.stderr)
+
+    def child_env(self) -> Dict[str, str]:
+        """Environment variables that turn tracing on in spawned servers."""
+        if isinstance(self.exporter, JsonlExporter):
+            return {"TRACE_FILE": self.exporter.path}
+        return {}
+
+
+def current_span():
+    """The active span, or a no-op stand-in when there is none."""
+    span = _current_span.get()
+    return span if span is not None else _NOOP_SPAN
+
+
+def current_traceparent() -> Optional[str]:
+    return current_span().traceparent
+
+
+def get_tracer(service: str) -> Tracer:
+    """Tracer exporting to the JSONL file named by TRACE_FILE, if set."""
+    path = os.getenv("TRACE_FILE")
+    return Tracer(service, JsonlExporter(path) if path else None)
+
+
+async def call_tool(session, tool_name: str, arguments: Dict[str, Any]):
+    """session.call_tool that forwards the current trace context in _meta."""
+    from mcp import types
+
+    traceparent = current_traceparent()
+    if traceparent is None:
+        return await session.call_tool(tool_name, arguments=arguments)
+
+    request = types.ClientRequest(types.CallToolRequest(
+        method="tools/call",
+        params=types.CallToolRequestParams(
+            name=tool_name,
+            arguments=arguments,
+            _meta=types.RequestParams.Meta(traceparent=traceparent),
+        ),
+    ))
+    return await session.send_request(request, types.CallToolResult)
+
+
+def traced(tracer: Tracer, mcp, kind: str = "tool"):
+    """
+    Decorator for FastMCP handlers that records a span per call, parented to
+    the client's span when the request carries a traceparent in _meta.
+    Apply it below @mcp.tool()/@mcp.resource() so FastMCP sees the signature.
+    """
+    def decorator(fn):
+        def start_span():
+            parent = None
+            try:
+                meta = mcp.get_context().request_context.meta
+                parent = getattr(meta, "traceparent", None)
+            except Exception:
+                pass
+            return tracer.span(f"{kind}.{fn.__name__}", parent=parent)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with start_span():
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with start_span():
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize(path: str) -> None:
+    """Print count, mean and p95 duration per span name from a JSONL trace file."""
+    durations = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            durations[(record["service"], record["name"])].append(record["duration_ms"])
+
+    print(f"{'service':<12} {'span':<32} {'count':>6} {'mean ms':>10} {'p95 ms':>10}")
+    for (service, name), values in sorted(durations.items()):
+        values.sort()
+        p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+        print(f"{service:<12} {name:<32} {len(values):>6} {statistics.mean(values):>10.1f} {p95:>10.1f}")
+
+
+if __name__ == "__main__":
+    summarize(sys.argv[1] if len(sys.argv) > 1 else "traces.jsonl")
@@ -0,0 +1,101 @@
+"""
+Keeps the copies of the shared helper modules identical.
+
+The lessons are run as plain scripts from their own project directories, so
+helpers such as response_cache.py are copied into every directory that
+uses them instead of being imported from one package. Each helper has one
+canonical copy, in mcp-course/L7/mcp_project/; edit that one and run this
+script to copy it over the others.
+
+Usage:
+    python tools/sync_helpers.py            # copy every canonical helper over its copies
+    python tools/sync_helpers.py --check    # only report copies that differ (exit 1 if any)
+    pytest tools/sync_helpers.py
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+CANONICAL_DIR = "mcp-course/L7/mcp_project"
+
+# Helper module -> project directories holding a copy of it
+COPIES: Dict[str, List[str]] = {
+    "async_input.py": [
+        "mcp-course/L4/mcp_project",
+        "mcp-course/L6/mcp_project",
+        "local_llm/mcp_project",
+        "local_llm/mcp_project/local_api_llm",
+    ],
+    "response_cache.py": [
+        "mcp-course/L4/mcp_project",
+        "local_llm/mcp_project",
+        "local_llm/mcp_project/local_api_llm",
+    ],
+    "tool_cache.py": ["local_llm/mcp_project", "local_llm/mcp_project/local_api_llm"],
+    "tracing.py": ["local_llm/mcp_project", "local_llm/mcp_project/local_api_llm"],
+    "instrumentation.py": ["local_llm/mcp_project"],
+    "file_watcher.py": ["local_llm/mcp_project"],
+    "serve.py": ["local_llm/mcp_project"],
+}
+
+
+def header(name: str) -> str:
+    """First line of every copy, naming the canonical one."""
+    return f"# Shared helper: canonical copy in {CANONICAL_DIR}/{name}, kept in sync by tools/sync_helpers.py\n"
+
+
+def drifted() -> List[str]:
+    """Copies whose contents differ from the canonical helper."""
+    problems = []
+    for name, directories in COPIES.items():
+        canonical = (ROOT / CANONICAL_DIR / name).read_text()
+        if not canonical.startswith(header(name)):
+            problems.append(f"{CANONICAL_DIR}/{name}: missing the shared-helper header")
+        for directory in directories:
+            copy = ROOT / directory / name
+            if not copy.exists():
+                problems.append(f"{directory}/{name}: missing")
+            elif copy.read_text() != canonical:
+                problems.append(f"{directory}/{name}: differs from {CANONICAL_DIR}/{name}")
+    return problems
+
+
+def sync() -> int:
+    """Copy every canonical helper over its copies; returns the number of files written."""
+    written = 0
+    for name, directories in COPIES.items():
+        canonical = (ROOT / CANONICAL_DIR / name).read_text()
+        for directory in directories:
+            copy = ROOT / directory / name
+            if not copy.exists() or copy.read_text() != canonical:
+                copy.write_text(canonical)
+                print(f"📝 {directory}/{name}")
+                written += 1
+    return written
+
+
+def test_copies_identical():
+    problems = drifted()
+    assert not problems, "\n".join(problems)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the copies of the shared helper modules")
+    parser.add_argument("--check", action="store_true", help="only report copies that differ")
+    args = parser.parse_args()
+
+    if args.check:
+        problems = drifted()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ All helper copies match their canonical module")
+        return
+    print(f"✅ {sync()} helper copies updated")
+
+
+if __name__ == "__main__":
+    main()